@@ -1,15 +1,50 @@
 import os
 import sys
+import re
 import json
-import requests
-from slack_helper import send_message_to_slack
+from concurrent.futures import ThreadPoolExecutor
+from slack_helper import send_message_to_slack_async
+from news_helper import NewsFeedCache, fetch_news, feed_version
+from memory_helper import ConversationMemory
+from intent_router import IntentRouter, intent_router
+from semantic_cache import SemanticCache
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.gpt_cache import default_cache
+from common.llm_client import get_llm_client
+from common.tracing import span, propagate
+from common.tokens import count_tokens, truncate_tokens
 
 RapidAPI_KEY = os.environ.get("RAPIDAPI_KEY", "5e2236446emshb04ffd7cef7d164p1f7f37jsnf92bac5a8714") # set juptyer notebook system variable
 
+def _shingles(text:str, n:int=3) -> set:
+    normalized = re.sub(r"\W+", "", text.lower())
+    return {normalized[i:i+n] for i in range(max(len(normalized) - n + 1, 1))}
+
+def is_near_duplicate(shingles:set, seen:list, threshold:float=0.8) -> bool:
+    """
+    이미 본 텍스트와 거의 같은 텍스트인지 확인 (문자 3-gram Jaccard 유사도)
+
+    Args:
+    shingles (set): 확인할 텍스트의 3-gram 집합
+    seen (list): 이미 본 텍스트들의 3-gram 집합 목록
+    threshold (float): 중복으로 판단할 유사도 기준
+
+    Returns:
+    bool: 중복 여부
+    """
+    for other in seen:
+        union = len(shingles | other)
+        if union and len(shingles & other) / union >= threshold:
+            return True
+    return False
+
 def postprocessing_news_data(news_data:dict) -> dict:
     """
     API 응답에서 뉴스 데이터 후처리
 
+    본문이나 다른 서브 뉴스와 거의 같은 내용의 서브 뉴스는 제외합니다.
+
     Args:
     news_data (dict): 뉴스 API의 응답
 
@@ -18,18 +53,78 @@ def postprocessing_news_data(news_data:dict) -> dict:
     """
     snippets = {}
     for item in news_data['items']:
-        cur_snippet = "Main Content: "+item["snippet"]+ "\nURL: "+item["newsUrl"]
+        parts = ["Main Content: " + item["snippet"], "URL: " + item["newsUrl"]]
         if item["hasSubnews"]:
-            cur_snippet += "\nSub Content: "
+            seen = [_shingles(item["snippet"])]
+            sub_snippets = []
             for sub_item in item["subnews"]:
-                cur_snippet += " " + sub_item["snippet"]
-        snippets[item["title"]] = cur_snippet
+                shingles = _shingles(sub_item["snippet"])
+                if not is_near_duplicate(shingles, seen):
+                    seen.append(shingles)
+                    sub_snippets.append(sub_item["snippet"])
+            parts.append("Sub Content: " + " ".join(sub_snippets))
+        snippets[item["title"]] = "\n".join(parts)
     return snippets
 
+def compact_news_data(news_result:dict, token_budget:int=2000, model:str="gpt-4-turbo") -> tuple:
+    """
+    뉴스 딕셔너리를 토큰 예산에 맞는 한 줄 형식으로 압축
+
+    각 뉴스는 "- 제목 | 본문 | URL | 서브 뉴스" 한 줄로 표현되고, 예산을 넘으면 모든 뉴스의 본문/서브 뉴스를
+    같은 토큰 수로 줄입니다. 그래도 넘치면 뒤쪽 뉴스부터 제외합니다. 같은 입력에는 항상 같은 결과를 반환합니다.
+
+    Args:
+    news_result (dict): call_news_api 의 결과 (뉴스 제목을 키로, 스니펫을 값으로 하는 딕셔너리)
+    token_budget (int): 압축 결과의 최대 토큰 수
+    model (str): 토큰 수 계산에 사용할 모델
+
+    Returns:
+    tuple: (압축된 뉴스 텍스트, {"tokens_before": 압축 전 토큰 수, "tokens_after": 압축 후 토큰 수, "items": 포함된 뉴스 수})
+    """
+    items = []
+    for title, snippet in news_result.items():
+        main, _, rest = snippet.partition("\nURL: ")
+        url, _, sub = rest.partition("\nSub Content: ")
+        items.append((title.strip(), main.replace("Main Content: ", "", 1).strip(), url.strip(), " ".join(sub.split())))
+
+    def _line(title, main, url, sub):
+        return " | ".join(part for part in (f"- {title}", main, url, sub) if part)
+
+    lines = [_line(*item) for item in items]
+    text = "\n".join(lines)
+    if count_tokens(text, model) > token_budget and items:
+        # 제목과 URL은 유지하고 본문/서브 뉴스만 균등하게 줄임
+        fixed = sum(count_tokens(_line(title, "", url, ""), model) + 1 for title, _, url, _ in items)
+        per_item = max((token_budget - fixed) // len(items), 0)
+        lines = []
+        for title, main, url, sub in items:
+            main = truncate_tokens(main, per_item, model)
+            sub = truncate_tokens(sub, per_item - count_tokens(main, model), model)
+            lines.append(_line(title, main, url, sub))
+        while len(lines) > 1 and count_tokens("\n".join(lines), model) > token_budget:
+            lines.pop()
+        text = "\n".join(lines)
+
+    stats = {"tokens_before": count_tokens(str(news_result), model), "tokens_after": count_tokens(text, model), "items": len(lines)}
+    return text, stats
+
+def _fetch_news_snippets(key:tuple) -> dict:
+    category, language_location = key
+    return postprocessing_news_data(fetch_news(category, language_location, api_key=RapidAPI_KEY))
+
+# (category, language_location) 별 뉴스 캐시 (5분 동안은 그대로 사용, 30분까지는 백그라운드 갱신)
+news_feed_cache = NewsFeedCache(_fetch_news_snippets, ttl=300, stale_ttl=1800)
+
+# 같은 뉴스(카테고리/언어/피드 버전)에 대한 비슷한 요청은 이전 요약 스트림을 재사용 (SUMMARY_CACHE_DIR 이 있으면 디스크에 저장)
+summary_cache = SemanticCache(normalize=IntentRouter().residual, path=os.environ.get("SUMMARY_CACHE_DIR") or None)
+news_feed_cache.listeners.append(summary_cache.invalidate_feed)
+
 def call_news_api(category:str, language_location:str) -> dict:
     """
     뉴스 API 호출
 
+    같은 카테고리/언어의 뉴스는 news_feed_cache 에서 가져오고, 공용 HTTP 세션으로 필요할 때만 API를 호출합니다.
+
     Args:
     category (str): 뉴스 카테고리
     language_location (str): 뉴스의 언어 및 위치
@@ -38,42 +133,93 @@ def call_news_api(category:str, language_location:str) -> dict:
     dict: 뉴스 제목을 키로, 스니펫을 값으로 하는 딕셔너리 반환
     """
     assert category in ["entertainment", "world", "business", "health", "science", "sport", "technology"], "category should be one of 'entertainment', 'world', 'business', 'health', 'science', 'sport', 'technology'"
-    url = "https://google-news13.p.rapidapi.com/" + category
-
     assert language_location in ["ko-KR", "en-US"], "language_location should be one of 'ko-KR', 'en-US'"
-    querystring = {"lr":language_location}
 
-    headers = {
-		"X-RapidAPI-Key": RapidAPI_KEY,
-		"X-RapidAPI-Host": "google-news13.p.rapidapi.com"
-	}
-
-    response = requests.get(url, headers=headers, params=querystring)
-    # print(f"API run successful: {len(response.json()['items'])} news items found.")
-    output = postprocessing_news_data(response.json())
+    with span("news.call", category=category, language_location=language_location):
+        output = news_feed_cache.get((category, language_location))
     return output
 
-def execute_function_call(message) -> dict:
+def execute_tool_call(tool_call) -> dict:
+    """
+    tool call 하나 실행
+
+    Args:
+    tool_call (object): GPT 응답 메시지의 tool call
+
+    Returns:
+    dict: 함수 실행 결과
+    """
+    arguments = json.loads(tool_call.function.arguments)
+    if tool_call.function.name == "call_news_api":
+        return call_news_api(arguments["category"], arguments["language_location"])
+    elif tool_call.function.name == "send_message_to_slack":
+        # 전송은 백그라운드 큐에서 처리하고, 대화 턴은 기다리지 않음
+        return send_message_to_slack_async(arguments["text"]).summary()
+    raise ValueError(f"unknown function: {tool_call.function.name}")
+
+def execute_function_call(message, max_workers:int=4) -> list:
     """
     GPT 응답에서 함수 호출 실행
 
+    한 메시지에 여러 tool call 이 있으면 worker pool 에서 동시에 실행하므로,
+    전체 소요 시간은 가장 느린 호출의 시간과 비슷합니다.
+
     Args:
     message (dict): GPT 응답의 메시지
+    max_workers (int): 동시에 실행할 최대 함수 호출 수
 
     Returns:
-    dict: 뉴스 제목을 키로, 스니펫을 값으로 하는 딕셔너리 반환
+    list: tool call 순서대로의 함수 실행 결과 (call_news_api 는 뉴스 제목을 키로, 스니펫을 값으로 하는 딕셔너리)
     """
     # 함수 호출 및 결과 처리 로직 구현
-    if message.tool_calls[0].function.name == "call_news_api":
-        cat = json.loads(message.tool_calls[0].function.arguments)["category"]
-        lang = json.loads(message.tool_calls[0].function.arguments)["language_location"]
-        results = call_news_api(cat, lang)
-    elif message.tool_calls[0].function.name == "send_message_to_slack":
-        text = json.loads(message.tool_calls[0].function.arguments)["text"]
-        results = send_message_to_slack(text)
+    tool_calls = message.tool_calls or []
+    if len(tool_calls) <= 1:
+        return [execute_tool_call(tool_call) for tool_call in tool_calls]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tool_calls))) as executor:
+        results = list(executor.map(propagate(execute_tool_call), tool_calls))
     return results
 
-def run_gpt(client, model:str, messages:list, max_token:int=150, temperature:float=0.7, is_json:bool=False, seed:int=None, tools:list=None, tool_choice:str=None, stream:bool=False):
+def merge_news_results(tool_calls:list, results:list) -> dict:
+    """
+    여러 call_news_api 결과를 하나의 뉴스 딕셔너리로 병합
+
+    Args:
+    tool_calls (list): GPT 응답 메시지의 tool call 목록
+    results (list): tool call 순서대로의 실행 결과
+
+    Returns:
+    dict: 뉴스 제목을 키로, 스니펫을 값으로 하는 딕셔너리 (결과가 여러 개면 제목 앞에 [카테고리/언어] 표시)
+    """
+    news = [(tool_call, result) for tool_call, result in zip(tool_calls, results) if tool_call.function.name == "call_news_api"]
+    if len(news) == 1:
+        return news[0][1]
+    merged = {}
+    for tool_call, result in news:
+        arguments = json.loads(tool_call.function.arguments)
+        for title, snippet in result.items():
+            merged[f"[{arguments['category']}/{arguments['language_location']}] {title}"] = snippet
+    return merged
+
+def gpt_request(model:str, messages:list, max_token:int=150, temperature:float=0.7, is_json:bool=False, seed:int=None, tools:list=None, tool_choice:str=None, stream:bool=False) -> dict:
+    """
+    run_gpt 가 보내는 chat completion 요청 생성 (인자는 run_gpt 참고)
+
+    Returns:
+    dict: client.chat.completions.create 의 keyword arguments
+    """
+    return dict(
+        model=model,
+        messages=messages,
+        max_tokens=max_token,
+        temperature=temperature,
+        response_format = {'type' : 'json_object'} if is_json else {'type' : 'text'},
+        seed=seed,
+        tools=tools,
+        tool_choice="auto" if tools else tool_choice,
+        stream=stream
+    )
+
+def run_gpt(client, model:str, messages:list, max_token:int=150, temperature:float=0.7, is_json:bool=False, seed:int=None, tools:list=None, tool_choice:str=None, stream:bool=False, cache=None):
     """
     GPT 모델 실행
 
@@ -88,25 +234,53 @@ def run_gpt(client, model:str, messages:list, max_token:int=150, temperature:flo
     tools (list): 사용할 도구 목록
     tool_choice (str): 도구 선택 방법
     stream (bool): 스트리밍 모드 사용 여부
+    cache (ResponseCache): 응답 캐시 (None이면 GPT_CACHE_DIR 환경변수가 설정된 경우에만 기본 캐시 사용)
 
     Returns:
-    object: GPT 응답 객체
+    object: GPT 응답 객체 (stream=True 인 경우 청크 제너레이터)
     """
     # GPT 실행 및 응답 반환 로직 구현
-    response = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        max_tokens=max_token,
-        temperature=temperature,
-        response_format = {'type' : 'json_object'} if is_json else {'type' : 'text'},
-        seed=seed,
-        tools=tools,
-        tool_choice="auto" if tools else tool_choice,
-        stream=stream
-    )
+    request = gpt_request(model, messages, max_token, temperature, is_json, seed, tools, tool_choice, stream)
+    # 공용 LLM 클라이언트가 RPM/TPM 제한, 재시도, 캐시, 트레이싱을 처리
+    response = get_llm_client(client).chat(request, cache=cache or default_cache())
     return response
 
-def generate_news_summary(client, user_prompt:str, news_result:dict, model:str):
+def news_summary_messages(user_prompt:str, news_result:dict, model:str, token_budget:int=2000) -> list:
+    """
+    generate_news_summary 에서 GPT에 전달할 메시지 목록 생성
+
+    Args:
+    user_prompt (str): 사용자 프롬프트
+    news_result (dict): call_news_api 의 결과
+    model (str): 토큰 수 계산에 사용할 모델
+    token_budget (int): 프롬프트에 넣을 뉴스 데이터의 최대 토큰 수
+
+    Returns:
+    list: 시스템 메시지와 유저 메시지
+    """
+    news_text, news_stats = compact_news_data(news_result, token_budget=token_budget, model=model)
+    print(f"News payload: {news_stats['tokens_before']} -> {news_stats['tokens_after']} tokens ({news_stats['items']} items)")
+
+    system_message = "너는 사람들의 관심에 맞는 오늘의 뉴스를 간결하고 재미있게 요약해서 전달하는 뉴스 앵커야."# 뉴스 앵커로서 관심사에 맞는 뉴스 요약 제공 역할 부여
+    user_message = f"""
+    유저의 관심 주제와 원하는 언어는 {user_prompt}이야.
+    
+    아래 삼중 따옴표 안에 오늘의 뉴스를 제공할게.  
+    한 줄에 뉴스 하나씩 "- 제목 | 뉴스 내용 | URL | 관련 뉴스" 형식으로 구성되어 있어.
+    다양한 주제 중 너가 가장 중요하다고 생각되는 대표적인 주제 7가지를 뽑아서 내가 이해하기 쉽도록 비슷한 주제끼리 묶어서 요약해줘.
+    단, 요약을 할 땐 일반적인 내용이 아닌 구체적인 정보를 포함해서 제공해야해.
+    사용자가 읽기 쉽도록 위트를 섞어서 재미있게 정보를 전달해줘.
+    원본 뉴스 URL 정보를 요약본에 반드시 함께 제공해줘.
+
+    \"\"\"{news_text}\"\"\"
+    """
+    messages = [
+        {"role": "system", "content": system_message},
+        {"role": "user", "content": user_message}
+    ]
+    return messages
+
+def generate_news_summary(client, user_prompt:str, news_result:dict, model:str, cache=None, token_budget:int=2000):
     """
     이 함수는 사용자의 입력을 받아 GPT 모델을 이용하여 관련 뉴스를 요약하여 반환합니다.
     주어진 뉴스 데이터를 기반으로 사용자가 이해하기 쉽게 주요 뉴스 주제를 요약하고,
@@ -118,6 +292,8 @@ def generate_news_summary(client, user_prompt:str, news_result:dict, model:str):
     selected_topic (str): 사용자가 선택한 뉴스의 주제.
     news_result (dict): API로부터 받은 뉴스 데이터 딕셔너리로 call_news_api 함수의 결과 값입니다.
     model (str): 사용할 GPT 모델의 식별자.
+    cache (ResponseCache): 응답 캐시. 동일한 요청이면 캐시된 스트림을 그대로 재생합니다.
+    token_budget (int): 프롬프트에 넣을 뉴스 데이터의 최대 토큰 수 (compact_news_data 참고)
 
     Returns:
     generator: 요약된 뉴스 내용을 순차적으로 반환하는 제너레이터. 각 청크는 특정 뉴스 아이템의 요약을 포함합니다. (yield 사용)
@@ -128,44 +304,109 @@ def generate_news_summary(client, user_prompt:str, news_result:dict, model:str):
     3. 'run_gpt' 함수를 호출하여 GPT 모델을 실행합니다. 이 때, 필요한 매개변수를 전달하며 스트리밍 모드를 사용하여 응답을 받습니다.
     4. 응답받은 데이터를 순차적으로 처리하여 외부로 반환합니다. 각 청크에서는 뉴스의 요약 정보가 포함되어 있습니다.
     """
-    system_message = "너는 사람들의 관심에 맞는 오늘의 뉴스를 간결하고 재미있게 요약해서 전달하는 뉴스 앵커야."# 뉴스 앵커로서 관심사에 맞는 뉴스 요약 제공 역할 부여
-    user_message = f"""
-    유저의 관심 주제와 원하는 언어는 {user_prompt}이야.
-    
-    아래 삼중 따옴표 안에 오늘의 뉴스를 제공할게.  
-    Key는 뉴스의 제목, Value는 뉴스 내용으로 구성되어 있어.
-    다양한 주제 중 너가 가장 중요하다고 생각되는 대표적인 주제 7가지를 뽑아서 내가 이해하기 쉽도록 비슷한 주제끼리 묶어서 요약해줘.
-    단, 요약을 할 땐 일반적인 내용이 아닌 구체적인 정보를 포함해서 제공해야해.
-    사용자가 읽기 쉽도록 위트를 섞어서 재미있게 정보를 전달해줘.
-    원본 뉴스 URL 정보를 요약본에 반드시 함께 제공해줘.
-
-    \"\"\"{news_result}\"\"\"
-    """
+    messages = news_summary_messages(user_prompt, news_result, model, token_budget)
     max_token = 3000
-    messages = [
-        {"role": "system", "content": system_message},
-        {"role": "user", "content": user_message}
-    ]
-    response = run_gpt(client, model, messages, max_token, stream=True)
+    response = run_gpt(client, model, messages, max_token, stream=True, cache=cache)
     for chunk in response:
         yield chunk.choices[0].delta.content
         
 
-def run_news_summary(client, user_prompt:str, messages:list):
+def news_feeds(tool_calls:list, results:list) -> list:
+    """
+    실행된 call_news_api 별 (category, language_location, 피드 버전) 목록 (semantic cache 의 scope)
+    """
+    feeds = []
+    for tool_call, result in zip(tool_calls, results):
+        if tool_call.function.name == "call_news_api":
+            arguments = json.loads(tool_call.function.arguments)
+            feeds.append((arguments["category"], arguments["language_location"], feed_version(result)))
+    return feeds
+
+def cached_news_summary(client, user_prompt:str, tool_calls:list, results:list, model:str, semantic_cache:SemanticCache=None):
+    """
+    generate_news_summary 를 semantic cache 를 거쳐 실행
+
+    같은 (카테고리, 언어, 피드 버전) 뉴스에 대해 비슷한 요청이 있었으면 GPT 호출 없이 저장된 요약을 재생합니다.
+
+    Args:
+    client (object): API 클라이언트 객체
+    user_prompt (str): 사용자 프롬프트
+    tool_calls (list): 실행된 tool call 목록
+    results (list): tool call 순서대로의 실행 결과
+    model (str): 모델 식별자
+    semantic_cache (SemanticCache): 요약 캐시 (None 이면 캐시 없이 실행)
+
+    Returns:
+    generator: 요약 스트림
+    """
+    news_result = merge_news_results(tool_calls, results)
+    if semantic_cache is None:
+        return generate_news_summary(client, user_prompt, news_result=news_result, model=model)
+
+    feeds = news_feeds(tool_calls, results)
+    with span("news.summary_cache") as s:
+        chunks = semantic_cache.get(user_prompt, feeds)
+        s.set(cache="hit" if chunks is not None else "miss")
+    if chunks is not None:
+        return iter(chunks)
+    return semantic_cache.record(user_prompt, feeds, generate_news_summary(client, user_prompt, news_result=news_result, model=model))
+
+def run_news_summary(client, user_prompt:str, messages:list, memory:ConversationMemory=None, router:IntentRouter=intent_router, semantic_cache:SemanticCache=summary_cache):
     """
     뉴스 요약 실행
 
+    router 가 확신하는 요청(예: "IT 뉴스 영어로", "슬랙으로 보내줘")은 function 선택용 GPT 호출 없이 바로 실행하고,
+    애매한 요청만 GPT tool calling 으로 function 을 선택합니다.
+
     Args:
     client (object): API 클라이언트 객체
     user_prompt (str): 사용자 프롬프트
-    messages (list): GPT에 전달할 메시지 목록
+    messages (list): 대화 기록 (읽기만 하고 수정하지 않음)
+    memory (ConversationMemory): 대화 메모리. 없으면 messages 로 만들며, function 선택에는 필요한 부분만 전달됩니다.
+    router (IntentRouter): 로컬 intent router (None 이면 항상 GPT 로 function 선택)
+    semantic_cache (SemanticCache): 뉴스 요약 캐시 (None 이면 항상 새로 요약)
 
     Returns:
     str: 뉴스 요약 결과
     """
     # 뉴스 요약 로직 구현
     # 뉴스 스니펫 생성 후 generate_news_summary 함수를 실행해 최종 요약 결과를 반환
+    if memory is None:
+        memory = ConversationMemory.from_messages(messages)
+    model = "gpt-4-turbo"
+
+    route = router.route(user_prompt, memory.last_message("assistant")) if router is not None else None
+    if route is not None and router.confident(route):
+        assistant_message = route.tool_message()
+    else:
+        assistant_message = select_functions(client, user_prompt, memory, model)
+    tool_calls = assistant_message.tool_calls or []
+    if not tool_calls: # 호출할 함수가 없으면 모델의 답변을 그대로 반환
+        return iter([assistant_message.content or ""])
 
+    # 독립적인 tool call 들을 동시에 실행 (결과는 tool_calls 순서). tool 메시지는 호출한 쪽의 대화 기록(messages)에 넣지 않음
+    results = execute_function_call(assistant_message)
+
+    # function 이름에 따라서 결과를 처리(후처리)하는 로직을 추가
+    function_names = [tool_call.function.name for tool_call in tool_calls]
+    if "call_news_api" in function_names:
+        return cached_news_summary(client, user_prompt, tool_calls, results, model, semantic_cache)
+    elif "send_message_to_slack" in function_names:
+        return results[0] if len(results) == 1 else results
+
+def select_functions(client, user_prompt:str, memory:ConversationMemory, model:str="gpt-4-turbo"):
+    """
+    GPT tool calling 으로 실행할 function 선택
+
+    Args:
+    client (object): API 클라이언트 객체
+    user_prompt (str): 사용자 프롬프트
+    memory (ConversationMemory): 대화 메모리 (function 선택에 필요한 부분만 전달)
+    model (str): 모델 식별자
+
+    Returns:
+    object: tool call 이 담긴 GPT 응답 메시지
+    """
     system_message = "너는 유저가 입력한 요청을 보고 적절한 function을 불러주는 유능한 비서야."# RapidAPI를 통해 관심사에 맞는 뉴스 찾는 역할 부여
     user_message = f"""
     만약 유저 메세지가 관심 주제와 언어-지역 정보를 포함하고 있다면, RapidAPI 가이드라인을 참고해서 뉴스 데이터를 가져오는 function을 불러줘.
@@ -180,6 +421,7 @@ def run_news_summary(client, user_prompt:str, messages:list):
     너는 다음 단계에 따라서 뉴스 요약본을 생성해줘.
     1. 나의 관심 주제를 보고 이를 [entertainment, world, business, health, science, sports, technology] 중 하나로 변환해줘.
     2. 변환된 뉴스 카테고리와 내가 설정한 언어를 기반으로 RapidAPI를 사용해서 뉴스 데이터를 가져와줘.
+    3. 유저가 여러 주제나 여러 언어를 요청하면, 각 (주제, 언어) 조합마다 function을 한 번씩 함께 불러줘.
 
     # Slack API 가이드라인
 
@@ -187,12 +429,11 @@ def run_news_summary(client, user_prompt:str, messages:list):
     {user_prompt}
 
     ## Message History
-    {messages}
+    {memory.routing_context()}
 
     ## Guideline
     너는 Message History에서 assiatant message 중에서 마지막 content (뉴스 요약본)을 Slack 메시지로 보내줘.
     """
-    model = "gpt-4-turbo"
     max_token = 3000
     messages = [
         {"role": "system", "content": system_message},
@@ -247,16 +488,4 @@ def run_news_summary(client, user_prompt:str, messages:list):
         }
     ]
     response = run_gpt(client, model, messages, max_token, tools=tools)
-    assistant_message = response.choices[0].message
-    assistant_message.content = str(assistant_message.tool_calls[0].function) 
-    messages.append({"role": assistant_message.role, "content": assistant_message.content})
-
-    if assistant_message.tool_calls:
-        results = execute_function_call(assistant_message)
-        messages.append({"role": "tool", "tool_call_id": assistant_message.tool_calls[0].id, "name": assistant_message.tool_calls[0].function.name, "content": results})
-
-    # function 이름에 따라서 결과를 처리(후처리)하는 로직을 추가
-    if assistant_message.tool_calls[0].function.name == "call_news_api":
-        return generate_news_summary(client, user_prompt, news_result=results, model=model)
-    elif assistant_message.tool_calls[0].function.name == "send_message_to_slack":
-        return results
+    return response.choices[0].message
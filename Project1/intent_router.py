@@ -0,0 +1,216 @@
+import os
+import re
+import sys
+import json
+import itertools
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.tracing import span
+
+# 카테고리별 키워드와 가중치 (1.0 이상이면 그 카테고리로 확신)
+CATEGORY_LEXICON = {
+    "technology": {"기술": 1.0, "테크": 1.0, "아이티": 1.0, "IT": 1.0, "인공지능": 1.0, "ai": 0.8, "반도체": 1.0, "스마트폰": 1.0, "컴퓨터": 1.0, "소프트웨어": 1.0,
+                   "스타트업": 0.8, "로봇": 0.8, "코딩": 1.0, "개발자": 0.8, "빅테크": 1.0, "tech": 1.0, "technology": 1.0, "software": 1.0, "gadget": 1.0,
+                   "gadgets": 1.0, "smartphone": 1.0, "semiconductor": 1.0, "chip": 0.8, "chips": 0.8, "startup": 0.8, "startups": 0.8, "computer": 1.0,
+                   "computing": 1.0, "artificial intelligence": 1.0, "robot": 0.8, "robotics": 1.0, "cyber": 0.8, "cybersecurity": 1.0},
+    "business": {"경제": 1.0, "비즈니스": 1.0, "주식": 1.0, "증시": 1.0, "금융": 1.0, "기업": 0.8, "부동산": 1.0, "환율": 1.0, "투자": 1.0, "코스피": 1.0,
+                 "코스닥": 1.0, "시장": 0.6, "무역": 0.8, "재테크": 1.0, "business": 1.0, "economy": 1.0, "economic": 1.0, "stock": 1.0, "stocks": 1.0,
+                 "market": 0.6, "markets": 0.8, "finance": 1.0, "financial": 1.0, "investing": 1.0, "investment": 1.0, "earnings": 1.0, "wall street": 1.0, "trade": 0.6},
+    "entertainment": {"연예": 1.0, "엔터": 1.0, "영화": 1.0, "드라마": 1.0, "가요": 1.0, "음악": 0.8, "케이팝": 1.0, "아이돌": 1.0, "예능": 1.0, "방송": 0.6,
+                      "배우": 1.0, "가수": 1.0, "셀럽": 1.0, "entertainment": 1.0, "movie": 1.0, "movies": 1.0, "film": 0.8, "films": 0.8, "music": 0.8,
+                      "celebrity": 1.0, "celebrities": 1.0, "hollywood": 1.0, "k-pop": 1.0, "kpop": 1.0, "drama": 1.0, "tv": 0.6},
+    "world": {"세계": 1.0, "국제": 1.0, "외신": 1.0, "글로벌": 1.0, "해외": 0.8, "전쟁": 0.8, "외교": 1.0, "world": 1.0, "international": 1.0, "global": 1.0,
+              "foreign": 0.8, "overseas": 0.8, "war": 0.8, "diplomacy": 1.0, "geopolitics": 1.0},
+    "health": {"건강": 1.0, "의료": 1.0, "병원": 1.0, "질병": 1.0, "의학": 1.0, "백신": 1.0, "코로나": 1.0, "헬스케어": 1.0, "다이어트": 0.8, "운동": 0.4,
+               "health": 1.0, "medical": 1.0, "medicine": 1.0, "disease": 1.0, "hospital": 1.0, "covid": 1.0, "vaccine": 1.0, "vaccines": 1.0,
+               "wellness": 1.0, "healthcare": 1.0, "fitness": 0.6, "diet": 0.8},
+    "science": {"과학": 1.0, "우주": 1.0, "연구": 0.6, "물리": 1.0, "화학": 1.0, "생물": 1.0, "천문": 1.0, "기후": 0.8, "환경": 0.6, "nasa": 1.0,
+                "science": 1.0, "scientific": 1.0, "space": 0.8, "research": 0.6, "physics": 1.0, "chemistry": 1.0, "biology": 1.0, "astronomy": 1.0,
+                "climate": 0.8, "ai": 0.3},
+    "sport": {"스포츠": 1.0, "축구": 1.0, "야구": 1.0, "농구": 1.0, "배구": 1.0, "골프": 1.0, "올림픽": 1.0, "테니스": 1.0, "손흥민": 1.0, "프리미어리그": 1.0,
+              "경기 결과": 1.0, "운동": 0.4, "sport": 1.0, "sports": 1.0, "football": 1.0, "soccer": 1.0, "baseball": 1.0, "basketball": 1.0, "golf": 1.0,
+              "olympic": 1.0, "olympics": 1.0, "tennis": 1.0, "nba": 1.0, "mlb": 1.0, "premier league": 1.0, "game": 0.4, "games": 0.4},
+}
+
+LANGUAGE_LEXICON = {
+    "ko-KR": ["한국어", "한글", "국문", "korean"],
+    "en-US": ["영어", "영문", "english"],
+}
+# 나라 이름은 언어 요청이 아니라 주제일 수 있음 ("미국 증시 소식", "tech news about Korea") - confidence 만 낮춤
+COUNTRY_WORDS = ["한국", "국내", "미국", "korea", "america", "american", "usa", "US"]
+
+# 카테고리 자체를 가리키는 일반적인 이름 (residual 에서 제거). 손흥민, 반도체, 부동산 같은 세부 주제어는
+# 같은 카테고리라도 요약 내용이 달라지므로 residual 에 남김
+CATEGORY_NAMES = ["기술", "테크", "아이티", "IT", "tech", "technology", "경제", "비즈니스", "business", "economy", "economic",
+                  "연예", "엔터", "entertainment", "세계", "국제", "외신", "글로벌", "world", "international", "global",
+                  "건강", "health", "과학", "science", "스포츠", "sport", "sports"]
+
+SLACK_WORDS = ["slack", "슬랙"]
+SEND_WORDS = ["보내", "전송", "공유", "올려", "send", "post", "share", "forward"]
+NEGATION_WORDS = ["말고", "빼고", "제외", "아니", "지마", "지 마", "않", "안 ", "except", "not ", "don't", "without"]
+# 뉴스를 요청하는 표현 (residual 에서 제거, 긴 표현부터)
+REQUEST_WORDS = ["요약해줘", "알려줘", "보여줘", "요약해", "요약", "뉴스", "소식", "오늘", "최신", "관련",
+                 "headlines", "please", "latest", "today", "news", "give", "show", "tell", "what's", "me", "the", "in", "and", "about"]
+
+HANGUL = re.compile(r"[가-힣]")
+
+def keyword_pattern(keyword:str):
+    """
+    Compiled pattern of a lexicon keyword
+
+    영어 키워드는 단어 경계로, 한국어 키워드는 조사가 붙으므로 부분 문자열로 매칭합니다.
+    대문자가 들어간 키워드("IT", "US")는 일반 단어("it", "us")와 구분하도록 대소문자를 구분합니다.
+    """
+    pattern = re.escape(keyword)
+    if keyword.isascii():
+        pattern = r"(?<![A-Za-z0-9])" + pattern + r"(?![A-Za-z0-9])"
+    return re.compile(pattern, 0 if keyword != keyword.lower() else re.IGNORECASE)
+
+class Route:
+    """
+    Decision of the local intent router
+
+    intent: "news", "slack" or None when the router found nothing
+    calls: list of (function name, arguments) to execute
+    confidence: 0..1, the caller falls back to the LLM below its threshold
+    """
+
+    def __init__(self, intent:str=None, calls:list=None, confidence:float=0.0, reason:str=""):
+        self.intent = intent
+        self.calls = calls or []
+        self.confidence = confidence
+        self.reason = reason
+
+    def tool_message(self):
+        """
+        The decision as an assistant message with tool calls (same shape as the LLM response)
+        """
+        from openai.types.chat import ChatCompletionMessage, ChatCompletionMessageToolCall
+        ids = itertools.count(1)
+        tool_calls = [ChatCompletionMessageToolCall(id=f"local_call_{next(ids)}", type="function", function={"name": name, "arguments": json.dumps(arguments, ensure_ascii=False)})
+                      for name, arguments in self.calls]
+        return ChatCompletionMessage(role="assistant", content=None, tool_calls=tool_calls)
+
+    def __repr__(self):
+        return f"Route(intent={self.intent}, calls={self.calls}, confidence={self.confidence:.2f}, reason={self.reason!r})"
+
+class IntentRouter:
+    """
+    Keyword router choosing call_news_api / send_message_to_slack without an LLM call
+
+    Clear prompts ("IT 뉴스 영어로", "send it to slack") are routed locally; prompts with
+    weak, conflicting or negated cues get a low confidence so the tool-calling LLM decides.
+    """
+
+    def __init__(self, threshold:float=0.75, category_lexicon:dict=CATEGORY_LEXICON, language_lexicon:dict=LANGUAGE_LEXICON):
+        """
+        Args:
+        threshold (float): 이 값 이상의 confidence 일 때만 로컬에서 처리
+        category_lexicon (dict): {카테고리: {키워드: 가중치}}
+        language_lexicon (dict): {언어-지역: [키워드]}
+        """
+        self.threshold = threshold
+        self.categories = {category: [(keyword_pattern(keyword), weight) for keyword, weight in keywords.items()] for category, keywords in category_lexicon.items()}
+        self.language_patterns = {language: [keyword_pattern(keyword) for keyword in keywords] for language, keywords in language_lexicon.items()}
+        self.country_patterns = [keyword_pattern(keyword) for keyword in COUNTRY_WORDS]
+        self.slack_patterns = [keyword_pattern(keyword) for keyword in SLACK_WORDS]
+        self.request_patterns = [keyword_pattern(keyword) for keyword in REQUEST_WORDS]
+        self.name_patterns = [keyword_pattern(keyword) for keyword in CATEGORY_NAMES]
+
+    def category_scores(self, text:str) -> dict:
+        scores = {}
+        for category, keywords in self.categories.items():
+            score = sum(weight for pattern, weight in keywords if pattern.search(text))
+            if score:
+                scores[category] = score
+        return scores
+
+    def languages(self, text:str) -> tuple:
+        """
+        Requested languages and the confidence of the guess
+        """
+        found = [language for language, patterns in self.language_patterns.items() if any(pattern.search(text) for pattern in patterns)]
+        if found:
+            return found, 0.95
+        # 언어를 말하지 않았으면 프롬프트의 문자로 추정. 나라 이름이 있으면 그 나라 언어를 원하는지 알 수 없으므로 GPT 에 맡김
+        guess = ["ko-KR"] if HANGUL.search(text) else ["en-US"]
+        if any(pattern.search(text) for pattern in self.country_patterns):
+            return guess, 0.5
+        return guess, 0.85 if guess == ["ko-KR"] else 0.8
+
+    def route(self, text:str, last_assistant_message:str="") -> Route:
+        """
+        Route a user prompt
+
+        Args:
+        text (str): 유저 메시지
+        last_assistant_message (str): Slack 으로 보낼 마지막 assistant 메시지
+
+        Returns:
+        Route: 결정 결과 (confident(route) 로 로컬 처리 여부 확인)
+        """
+        with span("router.route") as s:
+            route = self._route(" ".join(text.split()), last_assistant_message)
+            s.set(intent=route.intent, confidence=route.confidence, local=self.confident(route))
+        return route
+
+    def _route(self, text:str, last_assistant_message:str) -> Route:
+        lowered = text.lower()
+        negated = any(word in lowered for word in NEGATION_WORDS)
+        slack = any(pattern.search(text) for pattern in self.slack_patterns)
+        scores = self.category_scores(text)
+
+        if slack:
+            if scores and any(score >= 1.0 for score in scores.values()):
+                return Route("slack", confidence=0.3, reason="news and slack cues in one prompt")
+            if not last_assistant_message:
+                return Route("slack", confidence=0.3, reason="no assistant message to send")
+            # 외부로 메시지를 보내므로 전송 동사가 있고 부정 표현이 없을 때만 로컬에서 처리
+            if negated:
+                return Route("slack", confidence=0.3, reason="negated slack request")
+            confidence = 0.95 if any(word in lowered for word in SEND_WORDS) else 0.5
+            return Route("slack", [("send_message_to_slack", {"text": last_assistant_message})], confidence, "slack keyword")
+
+        if not scores:
+            return Route(None, confidence=0.0, reason="no category keyword")
+
+        strong = [category for category, score in sorted(scores.items(), key=lambda x: -x[1]) if score >= 1.0]
+        if strong:
+            categories = strong
+            # 선택되지 않은 카테고리에도 단서가 있으면 애매한 것으로 봄
+            weak = [category for category, score in scores.items() if category not in strong and score >= 0.5]
+            category_confidence = 0.7 if weak else 1.0
+        else:
+            best = max(scores, key=scores.get)
+            categories, category_confidence = [best], scores[best]
+
+        languages, language_confidence = self.languages(text)
+        confidence = min(category_confidence, language_confidence) * (0.5 if negated else 1.0)
+        calls = [("call_news_api", {"category": category, "language_location": language}) for category in categories for language in languages]
+        return Route("news", calls, confidence, f"categories={scores}")
+
+    def residual(self, text:str) -> str:
+        """
+        What is left of a prompt after removing category names, language and request words
+
+        "IT 뉴스 한국어로" 와 "korean tech news" 는 모두 빈 문자열이 되고,
+        "IT 뉴스 세 줄로 짧게" 는 "세 줄로 짧게" 처럼 요약 방식에 대한 요구만 남습니다.
+        "손흥민 소식" 과 "야구 뉴스" 처럼 세부 주제어는 남기므로 같은 카테고리라도 서로 다른 요청으로 구분됩니다.
+
+        Args:
+        text (str): 유저 메시지
+
+        Returns:
+        str: 남은 단어들 (한 글자 조사 등은 제외)
+        """
+        patterns = self.name_patterns + [pattern for language_patterns in self.language_patterns.values() for pattern in language_patterns]
+        for pattern in patterns + self.request_patterns:
+            text = pattern.sub(" ", text)
+        words = re.findall(r"[\w']+", text.lower())
+        return " ".join(word for word in words if len(word) > 1)
+
+    def confident(self, route:Route) -> bool:
+        return bool(route.calls) and route.confidence >= self.threshold
+
+# run_news_summary 기본 라우터 (INTENT_ROUTER=0 이면 항상 LLM 으로 function 선택)
+intent_router = IntentRouter() if os.environ.get("INTENT_ROUTER", "1") != "0" else None
@@ -0,0 +1,124 @@
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.tokens import count_tokens, truncate_tokens
+
+class ConversationMemory:
+    """
+    대화 기록을 제한된 토큰 안에서 유지하는 메모리
+
+    최근 window_turns 개의 메시지는 그대로 보관하고, 창 밖으로 밀려난 메시지는
+    rolling summary 에 점진적으로 합칩니다. context() 결과는 항상 max_tokens 이하입니다.
+    """
+
+    def __init__(self, window_turns:int=4, max_tokens:int=4000, summary_tokens:int=500, turn_tokens:int=300, summarizer=None, model:str="gpt-4-turbo"):
+        """
+        Args:
+        window_turns (int): 그대로 보관할 최근 메시지 수
+        max_tokens (int): context() 결과의 최대 토큰 수
+        summary_tokens (int): rolling summary 의 최대 토큰 수
+        turn_tokens (int): 요약에 합칠 때 메시지 하나당 최대 토큰 수 (기본 요약 방식)
+        summarizer (callable): (기존 요약, 밀려난 메시지 목록) -> 새 요약. None 이면 LLM 없이 메시지 앞부분을 이어붙임
+        model (str): 토큰 수 계산에 사용할 모델
+        """
+        self.window_turns = window_turns
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.turn_tokens = turn_tokens
+        self.summarizer = summarizer
+        self.model = model
+        self.summary = ""
+        self.recent = []
+
+    @classmethod
+    def from_messages(cls, messages:list, **kwargs):
+        """
+        st.session_state.messages 같은 메시지 목록으로 메모리 생성
+        """
+        memory = cls(**kwargs)
+        for message in messages:
+            memory.add(message["role"], message["content"])
+        return memory
+
+    def add(self, role:str, content) -> None:
+        """
+        메시지 추가. 창 밖으로 밀려난 메시지는 rolling summary 에 합쳐집니다.
+        """
+        self.recent.append({"role": role, "content": content if isinstance(content, str) else str(content)})
+        if len(self.recent) > self.window_turns:
+            evicted = self.recent[:-self.window_turns]
+            self.recent = self.recent[-self.window_turns:]
+            self._fold(evicted)
+
+    def _fold(self, evicted:list) -> None:
+        if self.summarizer is not None:
+            summary = self.summarizer(self.summary, evicted)
+        else:
+            lines = [f"[{m['role']}] {truncate_tokens(' '.join(m['content'].split()), self.turn_tokens, self.model)}" for m in evicted]
+            summary = "\n".join(filter(None, [self.summary] + lines))
+        # 예산을 넘으면 오래된 앞부분부터 버림
+        while count_tokens(summary, self.model) > self.summary_tokens and "\n" in summary:
+            summary = summary.split("\n", 1)[1]
+        self.summary = truncate_tokens(summary, self.summary_tokens, self.model)
+
+    def last_message(self, role:str="assistant") -> str:
+        """
+        최근 창에서 role 의 마지막 메시지 (없으면 빈 문자열)
+        """
+        for message in reversed(self.recent):
+            if message["role"] == role:
+                return message["content"]
+        return ""
+
+    def context(self) -> str:
+        """
+        rolling summary + 최근 메시지 (max_tokens 이하)
+        """
+        parts = [f"## Summary of earlier conversation\n{self.summary}"] if self.summary else []
+        used = count_tokens("\n".join(parts), self.model)
+        recent = []
+        for message in reversed(self.recent): # 최근 메시지부터 예산 안에서 포함
+            line = truncate_tokens(f"[{message['role']}] {message['content']}", self.max_tokens - used, self.model)
+            if not line:
+                break
+            recent.append(line)
+            used += count_tokens(line, self.model) + 1
+        return "\n".join(parts + list(reversed(recent)))
+
+    def routing_context(self, max_tokens:int=None) -> str:
+        """
+        function 선택에 필요한 부분만 반환 (Slack 전송용 마지막 assistant 메시지 + 요약)
+        """
+        max_tokens = max_tokens or self.max_tokens
+        last = truncate_tokens(self.last_message("assistant"), max_tokens, self.model)
+        summary = truncate_tokens(self.summary, max_tokens - count_tokens(last, self.model), self.model)
+        parts = []
+        if summary:
+            parts.append(f"## Summary of earlier conversation\n{summary}")
+        parts.append(f"## Last assistant message\n{last}")
+        return "\n".join(parts)
+
+def make_gpt_summarizer(client, model:str="gpt-3.5-turbo", max_token:int=300):
+    """
+    LLM 으로 rolling summary 를 갱신하는 summarizer 생성
+
+    Args:
+    client (object): API 클라이언트 객체
+    model (str): 요약에 사용할 모델
+    max_token (int): 요약 최대 토큰 수
+
+    Returns:
+    callable: ConversationMemory 의 summarizer
+    """
+    from gpt_helper import run_gpt
+
+    def summarizer(summary:str, evicted:list) -> str:
+        new_turns = "\n".join(f"[{m['role']}] {m['content']}" for m in evicted)
+        messages = [
+            {"role": "system", "content": "너는 대화 내용을 짧게 요약하는 비서야. 유저의 관심 주제, 언어, 요청 사항 위주로 요약해줘."},
+            {"role": "user", "content": f"기존 요약:\n{summary}\n\n새 대화:\n{new_turns}\n\n기존 요약에 새 대화를 반영한 요약을 작성해줘."}
+        ]
+        response = run_gpt(client, model, messages, max_token, temperature=0.2)
+        return response.choices[0].message.content
+    return summarizer
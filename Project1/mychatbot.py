@@ -1,18 +1,22 @@
 import streamlit as st
-from gpt_helper import run_news_summary
-from openai import OpenAI
+from memory_helper import ConversationMemory
+from news_service import ServiceBusy, get_news_service
+from common.clients import get_client # news_service(gpt_helper) 가 상위 폴더를 sys.path 에 추가함
 
 with st.sidebar:
     openai_api_key = st.text_input("OpenAI API Key", key="chatbot_api_key", type="password", value="")
     "[Get an OpenAI API key](https://platform.openai.com/account/api-keys)"
     "[View the source code](https://github.com/streamlit/llm-examples/blob/main/Chatbot.py)"
     "[![Open in GitHub Codespaces](https://github.com/codespaces/badge.svg)](https://codespaces.new/streamlit/llm-examples?quickstart=1)"
-    client = OpenAI(api_key=openai_api_key)
+    client = get_client(openai_api_key)
 
 st.title("📰 News For You")
 
 if "messages" not in st.session_state:
     st.session_state["messages"] = [{"role": "assistant", "content": "안녕하세요! 관심 있는 주제와 언어를 알려주세요. 오늘의 주요 뉴스를 요약해드립니다. 🌟"}]
+if "memory" not in st.session_state:
+    # 화면에는 전체 기록을 보여주고, GPT 에는 제한된 메모리만 전달
+    st.session_state["memory"] = ConversationMemory.from_messages(st.session_state["messages"])
 
 for msg in st.session_state.messages:
     st.chat_message(msg["role"]).write(msg["content"])
@@ -24,9 +28,16 @@ if prompt:
         st.stop()
 
     st.session_state.messages.append({"role": "user", "content": prompt})
+    st.session_state.memory.add("user", prompt)
     st.chat_message("user").write(prompt)
 
-    msg_generator = run_news_summary(client, prompt, st.session_state.messages)
+    # 모든 세션이 공용 서비스를 사용 (같은 뉴스/요약 작업은 한 번만 실행되어 여러 세션에 전달)
+    msg_generator = get_news_service(client).stream(prompt, memory=st.session_state.memory)
     with st.chat_message("assistant"):
-        assistant_msg = st.write_stream(msg_generator)
-    st.session_state.messages.append({"role": "assistant", "content": assistant_msg})
\ No newline at end of file
+        try:
+            assistant_msg = st.write_stream(msg_generator)
+        except ServiceBusy:
+            st.warning("요청이 많아 잠시 후 다시 시도해주세요.")
+            st.stop()
+    st.session_state.messages.append({"role": "assistant", "content": assistant_msg})
+    st.session_state.memory.add("assistant", assistant_msg)
\ No newline at end of file
@@ -0,0 +1,182 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.tracing import span, current_span
+
+NEWS_API_URL = os.environ.get("RAPIDAPI_NEWS_URL", "https://google-news13.p.rapidapi.com")
+NEWS_API_HOST = "google-news13.p.rapidapi.com"
+NEWS_API_TIMEOUT = (3.05, 10) # (connect, read) 초
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session() -> requests.Session:
+    """
+    Shared HTTP session with connection pooling and retries
+
+    Returns:
+        requests.Session: session reused by every news request of the process
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=("GET",),
+                respect_retry_after_header=True,
+            )
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+    return _session
+
+def fetch_news(category:str, language_location:str, api_key:str, base_url:str=None, timeout=NEWS_API_TIMEOUT) -> dict:
+    """
+    RapidAPI google-news 호출
+
+    Args:
+    category (str): 뉴스 카테고리
+    language_location (str): 뉴스의 언어 및 위치
+    api_key (str): RapidAPI key
+    base_url (str): API 주소 (로컬 stub 서버로 테스트할 때 변경, 기본값은 RAPIDAPI_NEWS_URL 환경변수)
+    timeout (tuple): (connect, read) timeout
+
+    Returns:
+    dict: 뉴스 API의 응답
+    """
+    url = (base_url or NEWS_API_URL).rstrip("/") + "/" + category
+    headers = {
+        "X-RapidAPI-Key": api_key,
+        "X-RapidAPI-Host": NEWS_API_HOST
+    }
+    with span("news.fetch", category=category, language_location=language_location) as s:
+        response = get_session().get(url, headers=headers, params={"lr": language_location}, timeout=timeout)
+        s.set(status=response.status_code, bytes_downloaded=len(response.content))
+        response.raise_for_status()
+        return response.json()
+
+def feed_version(data) -> str:
+    """
+    Short content hash of a news feed, changes only when the feed content changes
+    """
+    canonical = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+class NewsFeedCache:
+    """
+    TTL cache of news feeds keyed by (category, language_location)
+
+    Fresh entries (younger than ttl) are returned as is. Stale entries (younger than stale_ttl)
+    are returned immediately while a background thread refreshes them (stale-while-revalidate).
+    Older or missing entries are fetched synchronously; concurrent callers of the same key
+    wait for a single fetch. Functions in listeners are called with (key, version) whenever
+    a refetch changes the content of a feed.
+    """
+
+    def __init__(self, fetch, ttl:float=300, stale_ttl:float=1800):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._key_locks = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.listeners = []
+
+    def _key_lock(self, key) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _load(self, key) -> dict:
+        data = self.fetch(key)
+        entry = {"data": data, "version": feed_version(data), "fetched": time.time()}
+        with self._lock:
+            previous = self._entries.get(key)
+            self._entries[key] = entry
+        if previous and previous["version"] != entry["version"]:
+            for listener in self.listeners:
+                listener(key, entry["version"])
+        return entry
+
+    def _refresh(self, key) -> None:
+        try:
+            with self._key_lock(key):
+                self._load(key)
+        except Exception as e: # 백그라운드 갱신 실패 시 기존 데이터를 계속 사용
+            print(f"News refresh failed for {key}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get_entry(self, key) -> dict:
+        """
+        Cached entry of a key, fetching or refreshing it when needed
+
+        Returns:
+            dict: {"data": feed, "version": content hash, "fetched": timestamp}
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        age = time.time() - entry["fetched"] if entry else None
+
+        if entry and age < self.ttl:
+            self.hits += 1
+            current_span().set(cache="hit")
+            return entry
+        if entry and age < self.stale_ttl:
+            self.stale_hits += 1
+            current_span().set(cache="stale")
+            with self._lock:
+                start = key not in self._refreshing
+                self._refreshing.add(key)
+            if start:
+                threading.Thread(target=self._refresh, args=(key,), daemon=True).start()
+            return entry
+
+        with self._key_lock(key):
+            # 다른 스레드가 먼저 가져왔으면 그 결과를 사용
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry and time.time() - entry["fetched"] < self.ttl:
+                self.hits += 1
+                current_span().set(cache="hit")
+                return entry
+            self.misses += 1
+            current_span().set(cache="miss")
+            return self._load(key)
+
+    def get(self, key):
+        """
+        Cached feed of a key
+        """
+        return self.get_entry(key)["data"]
+
+    def invalidate(self, key=None) -> None:
+        """
+        Drop one key (or every key when key is None)
+        """
+        with self._lock:
+            keys = list(self._entries) if key is None else [key]
+            for k in keys:
+                self._entries.pop(k, None)
+        for k in keys:
+            for listener in self.listeners:
+                listener(k, None)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "stale_hits": self.stale_hits, "misses": self.misses, "keys": len(self._entries)}
@@ -0,0 +1,320 @@
+import os
+import sys
+import json
+import time
+import queue
+import asyncio
+import threading
+from gpt_helper import (call_news_api, execute_function_call, gpt_request, merge_news_results, news_feeds, news_summary_messages,
+                        select_functions, summary_cache)
+from intent_router import IntentRouter, intent_router
+from memory_helper import ConversationMemory
+from semantic_cache import SemanticCache, feeds_scope
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.clients import client_key
+from common.llm_client import get_llm_client
+from common.tracing import default_tracer
+
+class ServiceBusy(Exception):
+    """
+    Raised when the service queue is full (admission control)
+    """
+
+class SingleFlight:
+    """
+    Runs one coroutine per key at a time; concurrent callers of the same key share its result
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._inflight = {}
+
+    async def do(self, key, fn):
+        """
+        Await fn() for key, or the already running call of the same key
+
+        Args:
+        key: 동일한 작업을 구분하는 키
+        fn (callable): awaitable 을 반환하는 함수
+
+        Returns:
+        fn() 의 결과
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._inflight[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # 기다리던 요청 하나가 취소되어도 공유 작업은 계속 실행
+        return await asyncio.shield(task)
+
+    def __len__(self):
+        return len(self._inflight)
+
+class StreamFanout:
+    """
+    One upstream token stream delivered to any number of subscribers
+
+    Chunks are kept until the stream ends, so a subscriber joining late first
+    replays what was already generated and then follows the live stream.
+    """
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.subscribers = 0
+        self.task = None # 생성 task 참조 (참조가 없으면 실행 중에 GC 될 수 있음)
+        self._changed = asyncio.Condition()
+
+    async def publish(self, chunk) -> None:
+        async with self._changed:
+            self.chunks.append(chunk)
+            self._changed.notify_all()
+
+    async def close(self, error:Exception=None) -> None:
+        async with self._changed:
+            self.done, self.error = True, error
+            self._changed.notify_all()
+
+    async def subscribe(self):
+        self.subscribers += 1
+        i = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: i < len(self.chunks) or self.done)
+                chunks, done = self.chunks[i:], self.done
+            for chunk in chunks:
+                yield chunk
+            i += len(chunks)
+            if done and i >= len(self.chunks):
+                if self.error is not None:
+                    raise self.error
+                return
+
+class NewsService:
+    """
+    asyncio backend of the news chatbot shared by every Streamlit session
+
+    Identical in-flight work is done once: news fetches are coalesced per (category, language)
+    and summaries per (feeds and their versions, prompt residual), with the upstream token
+    stream fanned out to every waiting request. The residual keeps sub-topic words, so
+    "손흥민 소식" and "야구 뉴스" over the same sports feed are summarized separately. At most max_inflight requests run at a time,
+    up to max_queue wait for a slot and further requests fail fast with ServiceBusy.
+    The event loop runs in a background thread; stream() is the blocking entry point.
+    """
+
+    def __init__(self, client, max_inflight:int=64, max_queue:int=256, model:str="gpt-4-turbo", router:IntentRouter=intent_router, semantic_cache:SemanticCache=summary_cache):
+        """
+        Args:
+        client (object): API 클라이언트 객체
+        max_inflight (int): 동시에 처리하는 최대 요청 수
+        max_queue (int): 처리 슬롯을 기다릴 수 있는 최대 요청 수 (넘으면 ServiceBusy)
+        model (str): 모델 식별자
+        router (IntentRouter): 로컬 intent router (None 이면 항상 GPT 로 function 선택)
+        semantic_cache (SemanticCache): 뉴스 요약 캐시 (None 이면 캐시 없이 요약)
+        """
+        self.client = client
+        self.llm = get_llm_client(client)
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.model = model
+        self.router = router
+        self.semantic_cache = semantic_cache
+        self.fetches = SingleFlight()
+        self.summaries = {} # key -> StreamFanout
+        self.metrics = {"admitted": 0, "rejected": 0, "completed": 0, "errors": 0, "cancelled": 0, "queued": 0, "max_queued": 0, "inflight": 0,
+                        "coalesced_summaries": 0, "summary_cache_hits": 0, "upstream_streams": 0}
+        self.loop = asyncio.new_event_loop()
+        self._slots = None
+        self._thread = threading.Thread(target=self._run, name="news-service", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self._slots = asyncio.Semaphore(self.max_inflight)
+        self.loop.run_forever()
+
+    async def _admit(self) -> float:
+        if self.metrics["queued"] >= self.max_queue:
+            self.metrics["rejected"] += 1
+            raise ServiceBusy(f"news service busy ({self.metrics['queued']} requests waiting)")
+        self.metrics["queued"] += 1
+        self.metrics["max_queued"] = max(self.metrics["max_queued"], self.metrics["queued"])
+        start = time.perf_counter()
+        try:
+            await self._slots.acquire()
+        finally:
+            self.metrics["queued"] -= 1
+        self.metrics["admitted"] += 1
+        self.metrics["inflight"] += 1
+        return time.perf_counter() - start
+
+    def _release(self) -> None:
+        self.metrics["inflight"] -= 1
+        self._slots.release()
+
+    async def handle(self, prompt:str, memory:ConversationMemory=None):
+        """
+        Answer one user prompt (async generator of response chunks)
+
+        Args:
+        prompt (str): 유저 메시지
+        memory (ConversationMemory): 대화 메모리 (Slack 전송과 GPT function 선택에 사용)
+        """
+        memory = memory or ConversationMemory()
+        queue_seconds = await self._admit()
+        span = default_tracer().span("service.request", queue_ms=round(queue_seconds * 1000, 3))
+        try:
+            async for chunk in self._answer(prompt, memory, span):
+                yield chunk
+            self.metrics["completed"] += 1
+        except (GeneratorExit, asyncio.CancelledError) as e: # 클라이언트가 연결을 끊은 경우
+            self.metrics["cancelled"] += 1
+            span.finish(e)
+            raise
+        except BaseException as e:
+            self.metrics["errors"] += 1
+            span.finish(e)
+            raise
+        finally:
+            self._release()
+        span.finish()
+
+    async def _answer(self, prompt:str, memory:ConversationMemory, span):
+        route = self.router.route(prompt, memory.last_message("assistant")) if self.router is not None else None
+        if route is not None and self.router.confident(route):
+            message = route.tool_message()
+        else:
+            message = await asyncio.to_thread(select_functions, self.client, prompt, memory, self.model)
+        tool_calls = message.tool_calls or []
+        names = [tool_call.function.name for tool_call in tool_calls]
+        span.set(route="local" if route is not None and self.router.confident(route) else "gpt", functions=",".join(names))
+
+        if not tool_calls:
+            yield message.content or ""
+            return
+        if "call_news_api" not in names:
+            results = await asyncio.to_thread(execute_function_call, message)
+            for result in results:
+                yield result
+            return
+
+        news_calls = [tool_call for tool_call in tool_calls if tool_call.function.name == "call_news_api"]
+        results = await asyncio.gather(*[self._fetch(tool_call) for tool_call in news_calls])
+        feeds = news_feeds(news_calls, results)
+
+        chunks = self.semantic_cache.get(prompt, feeds) if self.semantic_cache is not None else None
+        if chunks is not None:
+            self.metrics["summary_cache_hits"] += 1
+            span.set(cache="hit")
+            for chunk in chunks:
+                yield chunk
+            return
+
+        key = self._summary_key(prompt, feeds)
+        fanout = self.summaries.get(key)
+        if fanout is None:
+            fanout = self.summaries[key] = StreamFanout()
+            fanout.task = asyncio.ensure_future(self._produce(key, fanout, prompt, feeds, merge_news_results(news_calls, results)))
+        else:
+            self.metrics["coalesced_summaries"] += 1
+            span.set(coalesced=True)
+        async for chunk in fanout.subscribe():
+            yield chunk
+
+    def _summary_key(self, prompt:str, feeds:list) -> tuple:
+        # semantic cache 와 같은 residual 을 사용 (캐시가 없으면 router 의 residual, 둘 다 없으면 프롬프트 그대로)
+        if self.semantic_cache is not None:
+            normalize = self.semantic_cache.normalize
+        elif self.router is not None:
+            normalize = self.router.residual
+        else:
+            normalize = lambda text: text
+        return (feeds_scope(feeds), normalize(prompt).strip())
+
+    async def _fetch(self, tool_call) -> dict:
+        arguments = json.loads(tool_call.function.arguments)
+        key = (arguments["category"], arguments["language_location"])
+        return await self.fetches.do(key, lambda: asyncio.to_thread(call_news_api, *key))
+
+    async def _produce(self, key:tuple, fanout:StreamFanout, prompt:str, feeds:list, news_result:dict) -> None:
+        # 요청한 세션이 중간에 나가도 다른 구독자를 위해 끝까지 생성
+        self.metrics["upstream_streams"] += 1
+        try:
+            messages = await asyncio.to_thread(news_summary_messages, prompt, news_result, self.model)
+            stream = await self.llm.achat(gpt_request(self.model, messages, 3000, stream=True))
+            async for chunk in stream:
+                content = chunk.choices[0].delta.content if chunk.choices else None
+                if content:
+                    await fanout.publish(content)
+            if self.semantic_cache is not None:
+                self.semantic_cache.set(prompt, feeds, fanout.chunks)
+            await fanout.close()
+        except Exception as e:
+            await fanout.close(e)
+        finally:
+            self.summaries.pop(key, None)
+
+    def stream(self, prompt:str, memory:ConversationMemory=None):
+        """
+        Blocking generator over handle() for the Streamlit script thread
+
+        Raises:
+        ServiceBusy: 대기열이 가득 찬 경우
+        """
+        chunks = queue.Queue()
+        done = object()
+
+        async def _pump():
+            try:
+                async for chunk in self.handle(prompt, memory):
+                    chunks.put((chunk, None))
+                chunks.put((done, None))
+            except BaseException as e:
+                chunks.put((done, e))
+
+        future = asyncio.run_coroutine_threadsafe(_pump(), self.loop)
+        try:
+            while True:
+                chunk, error = chunks.get()
+                if chunk is done:
+                    if error is not None:
+                        raise error
+                    return
+                yield chunk
+        finally:
+            future.cancel()
+
+    def stats(self) -> dict:
+        """
+        Request counters and queue depth ("queued" requests waiting, "inflight" being answered)
+        """
+        return {**self.metrics, "coalesced_fetches": self.fetches.coalesced, "active_fetches": len(self.fetches), "active_summaries": len(self.summaries)}
+
+    def close(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+
+_services = {}
+_services_lock = threading.Lock()
+
+def get_news_service(client, **kwargs) -> NewsService:
+    """
+    Process wide NewsService of an OpenAI client's account (shared by every Streamlit session)
+
+    Args:
+    client (object): API 클라이언트 객체
+    kwargs: NewsService 를 처음 만들 때 사용할 인자
+
+    Returns:
+    NewsService: 공용 서비스
+    """
+    key = client_key(client.api_key, str(client.base_url))
+    with _services_lock:
+        service = _services.get(key)
+        if service is None:
+            service = _services[key] = NewsService(client, **kwargs)
+    return service
@@ -0,0 +1,189 @@
+import os
+import re
+import json
+import zlib
+import threading
+import numpy as np
+
+class HashingEmbedder:
+    """
+    Local text embedding from hashed word and character 3-gram features
+
+    Needs no model or API call (a few microseconds per prompt) and is stable across
+    processes, so vectors can be stored on disk. Any callable mapping text to a vector
+    of the same dim (e.g. an embeddings API wrapper) can be used instead.
+    """
+
+    def __init__(self, dim:int=256):
+        self.dim = dim
+
+    def _features(self, text:str) -> list:
+        features = []
+        for word in re.findall(r"[\w']+", text.lower()):
+            features.append("w:" + word)
+            padded = f"<{word}>"
+            features += ["c:" + padded[i:i+3] for i in range(max(len(padded) - 2, 1))]
+        return features or ["<empty>"] # 빈 텍스트끼리는 같은 벡터
+
+    def __call__(self, text:str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature in self._features(text):
+            h = zlib.crc32(feature.encode("utf-8"))
+            vector[h % self.dim] += 1.0 if (h >> 16) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+def feeds_scope(feeds:list) -> str:
+    """
+    Scope key of a summary: the resolved (category, language_location, feed version) list
+    """
+    return ";".join(f"{category}/{language}@{version}" for category, language, version in sorted(feeds))
+
+class SemanticCache:
+    """
+    Cache of news summary streams looked up by prompt similarity
+
+    An entry is stored with its scope (the resolved categories/languages and the feed version
+    of each) and the embedding of the prompt. A lookup only considers entries of the same scope,
+    so a summary is never reused for other news or after the feed changed, and among those
+    returns the most similar prompt when the cosine similarity reaches threshold.
+    Vectors live in a NumPy matrix (memory-mapped under path when given) with LRU eviction.
+    """
+
+    def __init__(self, embed=None, threshold:float=0.9, max_entries:int=256, path:str=None, normalize=None):
+        """
+        Args:
+        embed (callable): 텍스트 -> 정규화된 벡터 (기본값 HashingEmbedder)
+        threshold (float): 캐시를 사용할 최소 cosine 유사도
+        max_entries (int): 최대 저장 개수 (넘으면 가장 오래 사용하지 않은 항목부터 제거)
+        path (str): 저장 폴더 (vectors.npy 는 memory-map, entries.json 에 요약 저장). 없으면 메모리에만 저장
+        normalize (callable): 임베딩 전에 프롬프트를 정리하는 함수 (예: IntentRouter.residual)
+        """
+        self.embed = embed or HashingEmbedder()
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.path = path
+        self.normalize = normalize or (lambda text: text)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._tick = 0
+        dim = len(self.embed(""))
+        self._entries = [None] * max_entries # slot -> {"scope", "prompt", "chunks", "used"}
+        if path:
+            os.makedirs(path, exist_ok=True)
+            vectors_path = os.path.join(path, "vectors.npy")
+            if os.path.exists(vectors_path):
+                self._vectors = np.load(vectors_path, mmap_mode="r+")
+                self._load_entries()
+            if not os.path.exists(vectors_path) or self._vectors.shape != (max_entries, dim):
+                self._vectors = np.lib.format.open_memmap(vectors_path, mode="w+", dtype=np.float32, shape=(max_entries, dim))
+                self._entries = [None] * max_entries
+        else:
+            self._vectors = np.zeros((max_entries, dim), dtype=np.float32)
+
+    def _load_entries(self) -> None:
+        try:
+            with open(os.path.join(self.path, "entries.json"), encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        if len(entries) == self.max_entries:
+            self._entries = entries
+            self._tick = max((entry["used"] for entry in entries if entry), default=0)
+
+    def _save_entries(self) -> None:
+        if not self.path:
+            return
+        self._vectors.flush()
+        tmp = os.path.join(self.path, "entries.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, ensure_ascii=False)
+        os.replace(tmp, os.path.join(self.path, "entries.json"))
+
+    def _search(self, scope:str, vector:np.ndarray) -> tuple:
+        slots = [i for i, entry in enumerate(self._entries) if entry and entry["scope"] == scope]
+        if not slots:
+            return None, 0.0
+        similarities = self._vectors[slots] @ vector
+        best = int(np.argmax(similarities))
+        return slots[best], float(similarities[best])
+
+    def get(self, prompt:str, feeds:list):
+        """
+        Cached summary chunks of a similar prompt over the same feeds
+
+        Args:
+        prompt (str): 유저 메시지
+        feeds (list): [(category, language_location, feed version)]
+
+        Returns:
+        list: 요약 스트림의 청크 목록 (없으면 None)
+        """
+        vector = self.embed(self.normalize(prompt))
+        with self._lock:
+            slot, similarity = self._search(feeds_scope(feeds), vector)
+            if slot is None or similarity < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._tick += 1
+            self._entries[slot]["used"] = self._tick
+            return list(self._entries[slot]["chunks"])
+
+    def set(self, prompt:str, feeds:list, chunks:list) -> None:
+        """
+        Store the summary chunks of a prompt (replacing the least recently used entry when full)
+        """
+        vector = self.embed(self.normalize(prompt))
+        scope = feeds_scope(feeds)
+        with self._lock:
+            slot, similarity = self._search(scope, vector)
+            if slot is None or similarity < self.threshold:
+                free = [i for i, entry in enumerate(self._entries) if entry is None]
+                if free:
+                    slot = free[0]
+                else:
+                    slot = min(range(self.max_entries), key=lambda i: self._entries[i]["used"])
+                    self.evictions += 1
+            self._tick += 1
+            self._vectors[slot] = vector
+            self._entries[slot] = {"scope": scope, "prompt": prompt, "chunks": list(chunks), "used": self._tick}
+            self._save_entries()
+
+    def record(self, prompt:str, feeds:list, stream):
+        """
+        Pass a summary stream through and store it once it was consumed to the end
+        """
+        chunks = []
+        for chunk in stream:
+            chunks.append(chunk)
+            yield chunk
+        # 중간에 끊긴 스트림은 저장하지 않음
+        self.set(prompt, feeds, [chunk for chunk in chunks if chunk is not None])
+
+    def invalidate_feed(self, key:tuple, version:str=None) -> None:
+        """
+        Drop entries built from a feed (category, language_location) other than version
+
+        NewsFeedCache listener: called when a feed is refreshed with new content.
+        """
+        category, language = key
+        prefix = f"{category}/{language}@"
+        with self._lock:
+            dropped = False
+            for i, entry in enumerate(self._entries):
+                if entry and any(part.startswith(prefix) and part != prefix + str(version) for part in entry["scope"].split(";")):
+                    self._entries[i] = None
+                    dropped = True
+            if dropped:
+                self._save_entries()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries = [None] * self.max_entries
+            self._save_entries()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "entries": sum(1 for entry in self._entries if entry)}
@@ -1,14 +1,217 @@
+import os
+import time
+import queue
+import random
+import itertools
+import sys
+import threading
 import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.tracing import span, traced
 slack_token = ""
 channel_id = ""
 
+SLACK_API_URL = os.environ.get("SLACK_API_URL", "https://slack.com/api") # 로컬 fake Slack 서버로 테스트할 때 변경
+SLACK_TIMEOUT = (3.05, 10)
+MAX_MESSAGE_CHARS = 4000 # Slack 권장 메시지 길이
+
+def split_message(text:str, limit:int=MAX_MESSAGE_CHARS) -> list:
+    """
+    Split long text into chunks within the Slack message limit
+
+    Chunks are cut at the last newline (or space) before the limit when possible.
+    """
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit)
+        if cut <= 0:
+            cut = text.rfind(" ", 0, limit)
+        if cut <= 0:
+            cut = limit
+        chunks.append(text[:cut])
+        text = text[cut:].lstrip("\n")
+    if text or not chunks:
+        chunks.append(text)
+    return chunks
+
+class SlackError(Exception):
+    """
+    Raised when Slack answers {"ok": false} (invalid_auth, channel_not_found, not_in_channel, ...)
+    """
+
+    def __init__(self, response:dict):
+        super().__init__(f"slack error: {response.get('error', 'unknown')}")
+        self.response = response
+
+class DeliveryHandle:
+    """
+    Result of a queued Slack message, returned before the message is delivered
+    """
+
+    def __init__(self, delivery_id:int, channel_id:str, chunks:list):
+        self.delivery_id = delivery_id
+        self.channel_id = channel_id
+        self.chunks = chunks
+        self.responses = []
+        self.error = None
+        self._done = threading.Event()
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout:float=None) -> dict:
+        """
+        Block until every chunk is delivered
+
+        Returns:
+            dict: Slack response of the last chunk
+
+        Raises:
+            TimeoutError: when the delivery is not finished within timeout
+            Exception: the delivery error, when it failed
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"slack delivery {self.delivery_id} not finished")
+        if self.error is not None:
+            raise self.error
+        return self.responses[-1]
+
+    def summary(self) -> dict:
+        """
+        Delivery state for the chat turn: "ok" is None while the message is still queued
+        """
+        if not self.done():
+            return {"ok": None, "status": "queued", "delivery_id": self.delivery_id, "chunks": len(self.chunks)}
+        if self.error is not None:
+            return {"ok": False, "status": "failed", "error": str(self.error), "delivery_id": self.delivery_id, "chunks": len(self.chunks)}
+        return {"ok": True, "status": "sent", "delivery_id": self.delivery_id, "chunks": len(self.chunks)}
+
+class SlackDeliveryQueue:
+    """
+    Background queue delivering Slack messages with a pooled session
+
+    Messages are split into chunks, sent in order and spaced per channel
+    (min_interval seconds). A chunk answered with {"ok": false} fails the
+    delivery (SlackError) and the remaining chunks are not sent.
+    429 and "ratelimited" responses are retried after Retry-After,
+    network errors and 5xx responses with exponential backoff.
+    Each channel has its own queue and worker thread, so waiting for one
+    channel's interval or Retry-After never delays the other channels.
+    A worker exits after idle_timeout seconds without messages.
+    """
+
+    def __init__(self, api_url:str=SLACK_API_URL, min_interval:float=1.0, max_retries:int=5, idle_timeout:float=60.0):
+        self.api_url = api_url.rstrip("/")
+        self.min_interval = min_interval
+        self.max_retries = max_retries
+        self.idle_timeout = idle_timeout
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+        self.session.mount("http://", HTTPAdapter(pool_connections=2, pool_maxsize=4))
+        self._queues = {} # channel -> queue.Queue
+        self._workers = {} # channel -> worker thread
+        self._ids = itertools.count(1)
+        self._next_send = {} # channel 별 다음 전송 가능 시각 (해당 channel 의 worker 만 사용)
+        self._lock = threading.Lock()
+
+    def submit(self, text:str, channel_id:str=channel_id, slack_token:str=slack_token) -> DeliveryHandle:
+        """
+        Queue a message and return immediately
+
+        Returns:
+            DeliveryHandle: handle to wait for or inspect the delivery
+        """
+        handle = DeliveryHandle(next(self._ids), channel_id, split_message(text))
+        with self._lock:
+            channel_queue = self._queues.setdefault(channel_id, queue.Queue())
+            channel_queue.put((handle, slack_token))
+            if channel_id not in self._workers:
+                worker = self._workers[channel_id] = threading.Thread(target=self._run, args=(channel_id, channel_queue), name=f"slack-{channel_id}", daemon=True)
+                worker.start()
+        return handle
+
+    def _run(self, channel_id:str, channel_queue:queue.Queue) -> None:
+        while True:
+            try:
+                handle, token = channel_queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                # submit 과 같은 lock 안에서 확인하므로 종료 직전에 들어온 메시지는 남지 않음
+                with self._lock:
+                    if channel_queue.empty():
+                        del self._workers[channel_id]
+                        return
+                continue
+            try:
+                with span("slack.deliver", delivery_id=handle.delivery_id, chunks=len(handle.chunks)):
+                    for chunk in handle.chunks:
+                        handle.responses.append(self._post(handle.channel_id, token, chunk))
+            except Exception as e:
+                handle.error = e
+            finally:
+                handle._done.set()
+                channel_queue.task_done()
+
+    def _post(self, channel_id:str, token:str, text:str) -> dict:
+        with span("slack.post", channel=channel_id, bytes_uploaded=len(text.encode("utf-8"))) as s:
+            return self._post_with_retries(s, channel_id, token, text)
+
+    def _post_with_retries(self, s, channel_id:str, token:str, text:str) -> dict:
+        for attempt in range(self.max_retries + 1):
+            s.set(attempts=attempt + 1)
+            wait = self._next_send.get(channel_id, 0) - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._next_send[channel_id] = time.monotonic() + self.min_interval
+            try:
+                response = self.session.post(
+                    self.api_url + "/chat.postMessage",
+                    headers={"Authorization": "Bearer " + token},
+                    data={"channel": channel_id, "text": text},
+                    timeout=SLACK_TIMEOUT,
+                )
+            except requests.RequestException:
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(min(2 ** attempt, 30) * (0.5 + random.random() / 2))
+                continue
+
+            s.set(status=response.status_code)
+            body = response.json() if response.status_code == 200 else {}
+            if response.status_code == 429 or body.get("error") == "ratelimited":
+                retry_after = float(response.headers.get("Retry-After", 1))
+                self._next_send[channel_id] = time.monotonic() + retry_after
+                continue
+            if response.status_code >= 500 and attempt < self.max_retries:
+                time.sleep(min(2 ** attempt, 30) * (0.5 + random.random() / 2))
+                continue
+            response.raise_for_status()
+            # Slack 은 대부분의 오류를 HTTP 200 + {"ok": false} 로 응답
+            if not body.get("ok"):
+                s.set(slack_error=body.get("error"))
+                raise SlackError(body)
+            return body
+        raise RuntimeError(f"slack delivery to {channel_id} rate limited {self.max_retries + 1} times")
+
+    def join(self) -> None:
+        """
+        Block until every queued message is processed
+        """
+        with self._lock:
+            queues = list(self._queues.values())
+        for channel_queue in queues:
+            channel_queue.join()
+
+delivery_queue = SlackDeliveryQueue()
+
+def send_message_to_slack_async(text:str, channel_id:str=channel_id, slack_token:str=slack_token) -> DeliveryHandle:
+    return delivery_queue.submit(text, channel_id, slack_token)
+
+@traced("slack.send")
 def send_message_to_slack(text:str, channel_id:str=channel_id, slack_token:str=slack_token):
-    url = 'https://slack.com/api/chat.postMessage'
-    headers = {'Authorization': 'Bearer ' + slack_token}
-    data = {'channel': channel_id, 'text': text}
-    response = requests.post(url, headers=headers, data=data)
-    return response.json()  # You can print or log the response to see if it was successful
+    return send_message_to_slack_async(text, channel_id, slack_token).wait()  # You can print or log the response to see if it was successful
 
 if __name__ == "__main__":
     response = send_message_to_slack("Hello, world!")
-    print(response)
\ No newline at end of file
+    print(response)
@@ -2,22 +2,67 @@ import os
 import sys
 import json
 import time
+import random
+import threading
 
-def list_assistants(client) -> dict:
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.clients import client_key
+from common.tracing import span, default_tracer
+
+def list_assistants(client, page_size:int=100) -> dict:
     """
     List all the assistants in the account
 
+    Follows the cursor pagination, so accounts with more than one page of assistants are fully listed.
+
     Args:
         client: OpenAI client object
+        page_size: number of assistants fetched per request
     
     Returns:
         dict: {assistant_name: assistant_id}
     """
     my_assistants = client.beta.assistants.list(
         order="desc",
-        limit="20",
+        limit=page_size,
     )
-    return {assistant.name : assistant.id for assistant in my_assistants.data}
+    return {assistant.name : assistant.id for assistant in my_assistants} # 다음 페이지는 순회하면서 자동으로 가져옴
+
+class AssistantCatalog:
+    """
+    TTL cache of list_assistants per account (API key and base url), shared by every Streamlit session of the process
+    """
+
+    def __init__(self, ttl:float=300):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, client) -> dict:
+        """
+        {assistant_name: assistant_id} of the client's account, listed again only after ttl seconds
+        """
+        key = client_key(client.api_key, str(client.base_url))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                return entry[1]
+        assistants = list_assistants(client)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), assistants)
+        return assistants
+
+    def invalidate(self, client=None) -> None:
+        """
+        Forget the cached list of one client (every client when None), e.g. after creating an assistant
+        """
+        with self._lock:
+            if client is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(client_key(client.api_key, str(client.base_url)), None)
+
+assistant_catalog = AssistantCatalog()
 
 def create_thread(client):
     """
@@ -32,6 +77,24 @@ def create_thread(client):
     thread = client.beta.threads.create() # 채워넣기
     return thread
 
+def add_message(client, thread, user_message):
+    """
+    Add a user message to the thread
+
+    Args:
+        client: OpenAI client object
+        thread: OpenAI thread object
+        user_message: str
+
+    Returns:
+        message: OpenAI message object
+    """
+    return client.beta.threads.messages.create(
+        thread_id = thread.id,
+        role = "user",
+        content = user_message
+    )
+
 def add_message_run(client, assistant_id, thread, user_message):
     """
     Add a message to the thread and run the assistant
@@ -58,28 +121,198 @@ def add_message_run(client, assistant_id, thread, user_message):
     )
     return run
 
-def wait_on_run(client, run, thread):
+class RunMetrics:
+    """
+    Timing of a single assistant run
+
+    ttft: seconds from the start of the run to the first text token
+    ttc: seconds from the start of the run to completion
+    """
+
+    def __init__(self):
+        self.run_id = None
+        self.mode = None
+        self.status = None
+        self.usage = None
+        self.api_calls = 0
+        self.started_at = time.perf_counter()
+        self.first_token_at = None
+        self.completed_at = None
+
+    def first_token(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+
+    def complete(self, run):
+        self.run_id = getattr(run, "id", self.run_id)
+        self.status = getattr(run, "status", self.status)
+        self.usage = getattr(run, "usage", self.usage)
+        self.completed_at = time.perf_counter()
+
+    @property
+    def ttft(self):
+        return None if self.first_token_at is None else self.first_token_at - self.started_at
+
+    @property
+    def ttc(self):
+        return None if self.completed_at is None else self.completed_at - self.started_at
+
+    def __repr__(self):
+        ttft = "-" if self.ttft is None else f"{self.ttft:.2f}s"
+        ttc = "-" if self.ttc is None else f"{self.ttc:.2f}s"
+        return f"RunMetrics(run={self.run_id}, mode={self.mode}, status={self.status}, ttft={ttft}, ttc={ttc}, api_calls={self.api_calls})"
+
+def wait_on_run(client, run, thread, timeout:float=300, initial_interval:float=0.1, max_interval:float=2.0, tool_handler=None, metrics:RunMetrics=None):
     """
     Wait for the run to finish
 
+    Polls with exponential backoff and jitter (initial_interval doubling up to max_interval)
+    until the run leaves queued/in_progress or the deadline passes.
+
     Args:
         client: OpenAI client object
         run: OpenAI run object
         thread: OpenAI thread object
+        timeout: overall deadline in seconds; the run is cancelled and TimeoutError raised when it passes
+        initial_interval: first polling interval in seconds
+        max_interval: maximum polling interval in seconds
+        tool_handler: function(run) -> tool_outputs list, called when the run requires action.
+            Without it a run in requires_action is returned to the caller.
+        metrics: optional RunMetrics to record the run timing
     
     Returns:
         run: OpenAI run object
     """
     # 채워넣기
-    while run.status == "queued" or run.status == "in_progress":
+    with span("assistant.poll", run_id=run.id) as s:
+        run = _poll_run(client, run, thread, timeout, initial_interval, max_interval, tool_handler, metrics)
+        s.set(status=run.status)
+    return run
+
+def _poll_run(client, run, thread, timeout, initial_interval, max_interval, tool_handler, metrics):
+    deadline = time.monotonic() + timeout
+    interval = initial_interval
+    if metrics is not None:
+        metrics.mode = metrics.mode or "poll"
+    while True:
+        if run.status == "requires_action" and tool_handler is not None:
+            run = client.beta.threads.runs.submit_tool_outputs(
+                thread_id=thread.id,
+                run_id=run.id,
+                tool_outputs=tool_handler(run),
+            )
+            interval = initial_interval
+            continue
+        if run.status not in ("queued", "in_progress", "cancelling"):
+            break
+        if time.monotonic() > deadline:
+            client.beta.threads.runs.cancel(thread_id=thread.id, run_id=run.id)
+            raise TimeoutError(f"run {run.id} did not finish within {timeout}s")
+        time.sleep(min(interval, max(deadline - time.monotonic(), 0)) * random.uniform(0.8, 1.2))
+        interval = min(interval * 2, max_interval)
         run = client.beta.threads.runs.retrieve(
             thread_id=thread.id,
             run_id=run.id,
         )
-        time.sleep(0.5)
+        if metrics is not None:
+            metrics.api_calls += 1
+    if metrics is not None:
+        metrics.complete(run)
     return run
 
-def get_response_pretty_print(client, thread, verbose=True):
+def stream_run(client, assistant_id, thread, tool_handler=None, metrics:RunMetrics=None):
+    """
+    Run the assistant and yield the response text as it is generated
+
+    Args:
+        client: OpenAI client object
+        assistant_id: str
+        thread: OpenAI thread object
+        tool_handler: function(run) -> tool_outputs list, called when the run requires action
+        metrics: optional RunMetrics to record time-to-first-token and time-to-completion
+
+    Yields:
+        str: text deltas of the assistant messages
+    """
+    runs = client.beta.threads.runs
+    # openai 버전에 따라 runs.stream 또는 runs.create_and_stream 사용
+    start_stream = getattr(runs, "stream", None) or runs.create_and_stream
+    manager = start_stream(thread_id=thread.id, assistant_id=assistant_id)
+    if metrics is not None:
+        metrics.mode = "stream"
+        metrics.api_calls += 1
+    run = None
+    while manager is not None:
+        with manager as stream:
+            for event in stream:
+                if event.event == "thread.message.delta":
+                    for part in event.data.delta.content or []:
+                        if part.type == "text" and part.text and part.text.value:
+                            if metrics is not None:
+                                metrics.first_token()
+                            yield part.text.value
+                elif event.event.startswith("thread.run.") and not event.event.startswith("thread.run.step."):
+                    run = event.data
+                    if metrics is not None:
+                        metrics.run_id = run.id
+        manager = None
+        if run is not None and run.status == "requires_action" and tool_handler is not None:
+            manager = runs.submit_tool_outputs_stream(thread_id=thread.id, run_id=run.id, tool_outputs=tool_handler(run))
+            if metrics is not None:
+                metrics.api_calls += 1
+    if metrics is not None and run is not None:
+        metrics.complete(run)
+
+def run_and_stream(client, assistant_id, thread, tool_handler=None, metrics:RunMetrics=None, timeout:float=300):
+    """
+    Run the assistant, streaming the response when possible
+
+    Falls back to add-run + wait_on_run polling when the client cannot stream or the
+    stream fails before the run is created, then yields the last assistant message text in one piece.
+
+    Args:
+        client: OpenAI client object
+        assistant_id: str
+        thread: OpenAI thread object (the user message must already be added)
+        tool_handler: function(run) -> tool_outputs list, called when the run requires action
+        metrics: optional RunMetrics to record the run timing
+        timeout: polling deadline in seconds
+
+    Yields:
+        str: response text
+    """
+    metrics = metrics if metrics is not None else RunMetrics()
+    # 제너레이터는 yield 사이에 다른 코드가 실행되므로 with 대신 직접 finish 호출
+    run_span = default_tracer().span("assistant.run", thread_id=thread.id)
+    try:
+        runs = client.beta.threads.runs
+        streamed = False
+        if hasattr(runs, "stream") or hasattr(runs, "create_and_stream"):
+            try:
+                yield from stream_run(client, assistant_id, thread, tool_handler=tool_handler, metrics=metrics)
+                streamed = True
+            except Exception as e:
+                # run 이 만들어진 뒤의 오류는 polling 으로 다시 실행하면 중복 run 이 되므로 그대로 전달
+                if metrics.run_id is not None:
+                    raise
+                print(f"Streaming run failed ({e!r}), falling back to polling")
+                metrics.mode = None
+        if not streamed:
+            run = runs.create(thread_id=thread.id, assistant_id=assistant_id)
+            run = wait_on_run(client, run, thread, timeout=timeout, tool_handler=tool_handler, metrics=metrics)
+            messages = client.beta.threads.messages.list(thread_id=thread.id, order="desc", limit=1)
+            for content in messages.data[0].content if messages.data else []:
+                if content.type == "text":
+                    metrics.first_token()
+                    yield content.text.value
+    except BaseException as e:
+        run_span.finish(e)
+        raise
+    run_span.set(run_id=metrics.run_id, mode=metrics.mode, status=metrics.status, ttft=metrics.ttft, api_calls=metrics.api_calls)
+    run_span.record_usage(metrics.usage)
+    run_span.finish()
+
+def get_response_pretty_print(client, thread, verbose=True, message_cache=None):
     """
     Get the response messages from the thread
 
@@ -87,13 +320,19 @@ def get_response_pretty_print(client, thread, verbose=True):
         client: OpenAI client object
         thread: OpenAI thread object
         verbose: bool
+        message_cache: optional ThreadMessageCache of the thread; only new messages are fetched and printed
     
     Returns:
-        messages: OpenAI message object
+        messages: OpenAI message object (the ThreadMessageCache when message_cache is given)
     """
-    messages = client.beta.threads.messages.list(thread_id=thread.id, order="asc") # message의 create_timestamp 기준으로 오름차순 정렬
+    if message_cache is not None:
+        new_messages = message_cache.refresh()
+        messages = message_cache
+    else:
+        messages = client.beta.threads.messages.list(thread_id=thread.id, order="asc") # message의 create_timestamp 기준으로 오름차순 정렬
+        new_messages = messages
     if verbose:
-        for m in messages:
+        for m in new_messages:
             try:
                 print(f"[{m.role}]: {m.content[0].text.value}\n\n")
             except:
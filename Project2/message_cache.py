@@ -0,0 +1,104 @@
+import os
+import re
+import threading
+
+class ThreadMessageCache:
+    """
+    Local copy of the messages of a thread
+
+    refresh() only lists the messages created after the last seen message id
+    (cursor pagination with `after`), so each turn transfers only the new messages.
+    Call it after a run has finished so the cached messages are complete.
+    """
+
+    def __init__(self, client, thread_id:str, page_size:int=100):
+        self.client = client
+        self.thread_id = thread_id
+        self.page_size = page_size
+        self.data = []
+        self.last_id = None
+
+    def refresh(self) -> list:
+        """
+        Fetch the messages added since the last refresh
+
+        Returns:
+            list: new OpenAI message objects in ascending order
+        """
+        params = {"thread_id": self.thread_id, "order": "asc", "limit": self.page_size}
+        if self.last_id:
+            params["after"] = self.last_id
+        new_messages = list(self.client.beta.threads.messages.list(**params)) # 페이지를 넘기며 모두 가져옴
+        if new_messages:
+            self.data.extend(new_messages)
+            self.last_id = new_messages[-1].id
+        return new_messages
+
+    def latest(self, role:str="assistant"):
+        """
+        Last cached message of the role (None if there is none)
+        """
+        for message in reversed(self.data):
+            if message.role == role:
+                return message
+        return None
+
+    def __iter__(self):
+        return iter(self.data)
+
+class FileContentCache:
+    """
+    Bounded on-disk cache of file contents keyed by file_id
+
+    Files generated by the assistant (e.g. code interpreter images) are downloaded once;
+    the least recently used files are removed when max_bytes is exceeded.
+    """
+
+    def __init__(self, cache_dir:str="./.cache/files", max_bytes:int=200*1024*1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, file_id:str) -> str:
+        return os.path.join(self.cache_dir, re.sub(r"[^0-9A-Za-z_-]", "_", file_id))
+
+    def get(self, client, file_id:str) -> bytes:
+        """
+        Content of a file, downloaded with client.files.content only on a cache miss
+        """
+        path = self._path(file_id)
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+            os.utime(path) # LRU 순서 갱신
+            self.hits += 1
+            return content
+        except OSError:
+            pass
+
+        self.misses += 1
+        content = client.files.content(file_id).content
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+        self._evict()
+        return content
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            for file_name in os.listdir(self.cache_dir):
+                if file_name.endswith(".tmp"):
+                    continue
+                st = os.stat(os.path.join(self.cache_dir, file_name))
+                entries.append((st.st_mtime, file_name, st.st_size))
+            total = sum(size for _, _, size in entries)
+            for _, file_name, size in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                os.remove(os.path.join(self.cache_dir, file_name))
+                total -= size
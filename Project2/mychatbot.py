@@ -1,51 +1,70 @@
+import os
+import sys
 import streamlit as st
-from assistant_helper import list_assistants, create_thread, add_message_run, wait_on_run, get_response_pretty_print
-from openai import OpenAI
+from assistant_helper import assistant_catalog, create_thread, add_message, run_and_stream, RunMetrics, get_response_pretty_print
+from message_cache import ThreadMessageCache, FileContentCache
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.clients import get_client
+
+file_cache = FileContentCache() # assistant 가 생성한 파일(이미지)을 다시 내려받지 않도록 디스크에 캐시
 
 with st.sidebar:
     openai_api_key = st.text_input("OpenAI API Key", key="chatbot_api_key", type="password", value="")
     "[Get an OpenAI API key](https://platform.openai.com/account/api-keys)"
-    st.session_state = {}
     if openai_api_key:
-        client = OpenAI(api_key=openai_api_key)
+        client = get_client(openai_api_key) # rerun 마다 client 를 새로 만들지 않고 API key 별로 재사용
         # 계정의 모든 assistant를 가져와 st.selectbox에 넣기
-        # 채워 넣기
-        st.session_state["open_api_key"] = openai_api_key
-        assistant_name2id = list_assistants(client)
+        if st.button("Assistant 목록 새로고침"):
+            assistant_catalog.invalidate(client)
+        assistant_name2id = assistant_catalog.get(client)
         assistant_name = st.selectbox("Assistant 를 선택하세요.", assistant_name2id.keys()) # 유저가 선택한 assistant_name
         st.write(f"당신은 {assistant_name}을 선택했군요! ") 
         assistant_id = assistant_name2id[assistant_name] # 유저가 선택한 assistant_id
+
+        # API key 나 assistant 가 바뀌면 대화(thread)를 새로 시작하고, 그 외에는 rerun 사이에 유지
+        if st.session_state.get("open_api_key") != openai_api_key or st.session_state.get("assistant_id") != assistant_id:
+            for key in ("messages", "thread", "message_cache"):
+                st.session_state.pop(key, None)
+        st.session_state["open_api_key"] = openai_api_key
         st.session_state["assistant_id"] = assistant_id
         st.session_state["assistant_name"] = assistant_name
 
 st.title("Ask Me Anything! 🤖")
 
-if st.session_state.get("open_api_key", None) and st.session_state.get("assistant_id", None):
+if openai_api_key and st.session_state.get("assistant_id", None):
     if "messages" not in st.session_state:
         st.session_state["messages"] = [{"role": "assistant", "content": f"안녕하세요! 저는 {st.session_state['assistant_name']}입니다. 무엇을 도와드릴까요? 🤖"}]
         # thread 생성
         thread = create_thread(client) # 채워 넣기
         st.session_state["thread"] = thread
+        st.session_state["message_cache"] = ThreadMessageCache(client, thread.id)
+    thread = st.session_state["thread"]
 
     for msg in st.session_state["messages"]:
-        st.chat_message(msg["role"]).write(msg["content"])
+        if msg.get("type") == "image_file": # 이전에 생성된 이미지는 디스크 캐시에서 다시 그림
+            st.chat_message(msg["role"]).image(file_cache.get(client, msg["content"]))
+        else:
+            st.chat_message(msg["role"]).write(msg["content"])
 
     prompt = st.chat_input("질문을 입력하세요.")
     if prompt:
         st.session_state["messages"].append({"role": "user", "content": prompt})
         st.chat_message("user").write(prompt)
 
-        # user의 prompt를 assistant에게 전달 (message 생성 후 run)
-        run = add_message_run(client, assistant_id, thread, prompt) # 채워 넣기
-        run = wait_on_run(client, run, thread) # 채워 넣기
-        messages = get_response_pretty_print(client, thread, verbose=True) # 채워 넣기
+        # user의 prompt를 assistant에게 전달 (message 생성 후 run, 응답은 생성되는 대로 스트리밍)
+        add_message(client, thread, prompt)
+        metrics = RunMetrics()
         
         with st.chat_message("assistant"):
-            if messages.data[-1].content[0].type == "image_file":
-                file_id = messages.data[-1].content[0].image_file.file_id
-                image_encoded = client.files.content(file_id).content
+            response_text = st.write_stream(run_and_stream(client, assistant_id, thread, metrics=metrics))
+            messages = get_response_pretty_print(client, thread, verbose=True, message_cache=st.session_state["message_cache"]) # 새 메시지만 가져옴
+            last_message = messages.latest("assistant")
+            if last_message is not None and last_message.content[0].type == "image_file":
+                file_id = last_message.content[0].image_file.file_id
+                image_encoded = file_cache.get(client, file_id)
                 st.image(image_encoded)
-                st.session_state["messages"].append({"role": "assistant", "content": file_id})
-            elif messages.data[-1].content[0].type == "text":
-                st.write(messages.data[-1].content[0].text.value)
-                st.session_state["messages"].append({"role": "assistant", "content": messages.data[-1].content[0].text.value})
\ No newline at end of file
+                st.session_state["messages"].append({"role": "assistant", "content": file_id, "type": "image_file"})
+            else:
+                st.session_state["messages"].append({"role": "assistant", "content": response_text})
+            st.caption(f"첫 토큰 {metrics.ttft or 0:.2f}s · 완료 {metrics.ttc or 0:.2f}s")
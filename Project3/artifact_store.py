@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from contextlib import contextmanager
+from download_cache import youtube_video_id
+
+DEFAULT_ARTIFACT_DIR = os.environ.get("ARTIFACT_DIR", "./data/artifacts")
+MANIFEST = "manifest.json"
+
+def data_digest(data) -> str:
+    """
+    Short sha256 of the canonical JSON encoding of data (used to chain stage parameters)
+    """
+    canonical = json.dumps(data, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+def file_digest(path:str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+class ArtifactStore:
+    """
+    Persistent outputs of the video pipeline stages
+
+    Each artifact is a directory root/<video id>/<stage>-<params digest>/ holding the stage output
+    and a manifest with the stage parameters and the sha256 of every file. The manifest is written
+    last and the directory is moved into place atomically, so an interrupted stage leaves no artifact.
+    An artifact with a missing manifest or a file that does not match it is invalid and recomputed.
+    Stage parameters include the digest of the stage inputs, so a changed transcript invalidates
+    the segmentation built from it while unchanged stages are reused.
+    """
+
+    def __init__(self, root:str=DEFAULT_ARTIFACT_DIR, max_bytes:int=2*1024**3, max_age:float=7*24*3600, verify:bool=True):
+        """
+        root: store directory
+        max_bytes: total size kept by gc()
+        max_age: seconds since last use after which gc() removes an artifact
+        verify: check the sha256 of every file when loading (otherwise only sizes)
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.verify = verify
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def run_dir(self, youtube_url:str) -> str:
+        """
+        Directory of one video (artifacts and the raw_data/ media links)
+        """
+        path = os.path.join(self.root, youtube_video_id(youtube_url))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def path(self, youtube_url:str, stage:str, params:dict) -> str:
+        return os.path.join(self.run_dir(youtube_url), f"{stage}-{data_digest([stage, params])}")
+
+    def _manifest(self, path:str) -> dict:
+        try:
+            with open(os.path.join(path, MANIFEST), encoding="utf-8") as f:
+                manifest = json.load(f)
+            for name, info in manifest["files"].items():
+                file_path = os.path.join(path, name)
+                if os.path.getsize(file_path) != info["size"] or (self.verify and file_digest(file_path) != info["sha256"]):
+                    return None
+            return manifest
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def get(self, youtube_url:str, stage:str, params:dict) -> dict:
+        """
+        Manifest of a valid artifact, or None when it is missing or invalid
+
+        return: {"stage", "params", "files": {name: {"size", "sha256"}}, "digest", "created"} plus "path"
+        """
+        path = self.path(youtube_url, stage, params)
+        manifest = self._manifest(path) if os.path.isdir(path) else None
+        with self._lock:
+            if manifest is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if manifest is None:
+            if os.path.isdir(path):
+                print(f"Artifact {os.path.basename(path)} is invalid, recomputing")
+                shutil.rmtree(path, ignore_errors=True)
+            return None
+        os.utime(os.path.join(path, MANIFEST)) # gc 의 LRU 순서 갱신
+        return {**manifest, "path": path}
+
+    @contextmanager
+    def create(self, youtube_url:str, stage:str, params:dict):
+        """
+        Write a new artifact: yields a temporary directory and commits it when the block succeeds
+
+        return (on exit): the committed manifest is available as the yielded dict's "manifest"
+        """
+        path = self.path(youtube_url, stage, params)
+        tmp_path = f"{path}.{threading.get_ident()}.{int(time.time() * 1000)}.tmp"
+        os.makedirs(tmp_path)
+        result = {"path": tmp_path, "manifest": None}
+        try:
+            yield result
+            files = {}
+            for name in sorted(os.listdir(tmp_path)):
+                file_path = os.path.join(tmp_path, name)
+                files[name] = {"size": os.path.getsize(file_path), "sha256": file_digest(file_path)}
+            manifest = {"stage": stage, "params": params, "files": files, "digest": data_digest(files), "created": time.time()}
+            with open(os.path.join(tmp_path, MANIFEST), "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False)
+            try:
+                os.replace(tmp_path, path)
+            except OSError: # 같은 artifact 를 다른 실행이 먼저 저장한 경우 그 결과를 사용
+                shutil.rmtree(tmp_path, ignore_errors=True)
+            result["path"] = path
+            result["manifest"] = {**manifest, "path": path}
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+    def load_json(self, youtube_url:str, stage:str, params:dict, name:str="data.json"):
+        """
+        Data of a valid JSON artifact, or None
+        """
+        manifest = self.get(youtube_url, stage, params)
+        if manifest is None:
+            return None
+        with open(os.path.join(manifest["path"], name), encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_json(self, youtube_url:str, stage:str, params:dict, data, name:str="data.json") -> dict:
+        """
+        Store data as a JSON artifact
+
+        return: manifest of the artifact
+        """
+        with self.create(youtube_url, stage, params) as artifact:
+            with open(os.path.join(artifact["path"], name), "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, default=str)
+        return artifact["manifest"]
+
+    def cached_json(self, youtube_url:str, stage:str, params:dict, compute):
+        """
+        Data of a JSON artifact, computing and storing it with compute() when missing or invalid
+        """
+        data = self.load_json(youtube_url, stage, params)
+        if data is None:
+            data = compute()
+            self.save_json(youtube_url, stage, params, data)
+        return data
+
+    def _artifacts(self) -> list:
+        artifacts = []
+        for video_id in os.listdir(self.root):
+            run_dir = os.path.join(self.root, video_id)
+            if not os.path.isdir(run_dir):
+                continue
+            for name in os.listdir(run_dir):
+                path = os.path.join(run_dir, name)
+                if name == "raw_data" or not os.path.isdir(path):
+                    continue
+                manifest_path = os.path.join(path, MANIFEST)
+                used = os.path.getmtime(manifest_path if os.path.exists(manifest_path) else path)
+                size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+                artifacts.append((used, path, size, name.endswith(".tmp")))
+        return artifacts
+
+    def gc(self, max_bytes:int=None, max_age:float=None) -> dict:
+        """
+        Remove artifacts unused for max_age seconds, then the least recently used ones until the
+        store is under max_bytes. Videos left without artifacts lose their raw_data/ as well.
+
+        return: {"removed": number of artifacts removed, "bytes_freed": ..., "bytes_kept": ...}
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        max_age = self.max_age if max_age is None else max_age
+        now = time.time()
+        removed, freed = 0, 0
+        with self._lock:
+            artifacts = sorted(self._artifacts())
+            total = sum(size for _, _, size, _ in artifacts)
+            for used, path, size, tmp in artifacts:
+                # 중단된 작업의 임시 폴더는 1시간이 지나면 삭제
+                expired = now - used > (3600 if tmp else max_age)
+                if not expired and (tmp or total <= max_bytes):
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+                removed += 1
+                freed += size
+                total -= size
+            for video_id in os.listdir(self.root):
+                run_dir = os.path.join(self.root, video_id)
+                # 아직 artifact 를 만들기 전인 실행 중인 영상은 남겨둠
+                if os.path.isdir(run_dir) and all(name == "raw_data" for name in os.listdir(run_dir)) and now - os.path.getmtime(run_dir) > 3600:
+                    shutil.rmtree(run_dir, ignore_errors=True)
+        return {"removed": removed, "bytes_freed": freed, "bytes_kept": total}
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,101 @@
+import os
+import re
+import sys
+import subprocess
+from frame_extractor import FFMPEG_BIN
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.tracing import span
+
+FFPROBE_BIN = os.environ.get("FFPROBE_BIN", "ffprobe")
+
+def probe_duration(audio_path:str) -> float:
+    """
+    Duration of a media file in seconds (ffprobe)
+    """
+    command = [FFPROBE_BIN, "-v", "error", "-show_entries", "format=duration", "-of", "default=noprint_wrappers=1:nokey=1", audio_path]
+    with span("ffmpeg.probe"):
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return float(output.strip())
+
+def detect_silences(audio_path:str, noise:str="-30dB", min_silence:float=0.5) -> list:
+    """
+    Silent intervals of the audio file (ffmpeg silencedetect filter)
+
+    return: list of (silence_start, silence_end) in seconds
+    """
+    command = [FFMPEG_BIN, "-hide_banner", "-nostats", "-i", audio_path, "-af", f"silencedetect=noise={noise}:d={min_silence}", "-f", "null", "-"]
+    with span("ffmpeg.silence"):
+        log = subprocess.run(command, check=True, capture_output=True, text=True).stderr
+    starts = [float(x) for x in re.findall(r"silence_start: (-?[\d.]+)", log)]
+    ends = [float(x) for x in re.findall(r"silence_end: (-?[\d.]+)", log)]
+    return list(zip(starts, ends))
+
+def plan_chunks(duration:float, chunk_seconds:float=600, overlap_seconds:float=5, silences:list=None) -> list:
+    """
+    Plan overlapping chunk windows covering the whole audio
+
+    Each window is chunk_seconds long and overlaps the next one by overlap_seconds.
+    When silences are given, a cut is moved to the middle of the last silence inside
+    the final 20% of the window so words are not cut in half.
+
+    return: list of (start, end) in seconds
+    """
+    chunks = []
+    start = 0.0
+    while start < duration:
+        end = min(start + chunk_seconds, duration)
+        if silences and end < duration:
+            lower = start + chunk_seconds * 0.8
+            candidates = [(s + e) / 2 for s, e in silences if lower <= (s + e) / 2 <= end]
+            if candidates:
+                end = candidates[-1]
+        chunks.append((start, end))
+        if end >= duration:
+            break
+        start = max(end - overlap_seconds, start + 1)
+    return chunks
+
+def split_audio(audio_path:str, chunks:list, output_dir:str) -> list:
+    """
+    Cut the audio into chunk files without re-encoding
+
+    return: list of chunk file paths in chunk order
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    ext = os.path.splitext(audio_path)[1] or ".m4a"
+    paths = []
+    with span("ffmpeg.split", chunks=len(chunks)):
+        for i, (start, end) in enumerate(chunks):
+            path = os.path.join(output_dir, f"chunk{i:04d}{ext}")
+            command = [FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-y", "-ss", f"{start:.3f}", "-to", f"{end:.3f}", "-i", audio_path, "-c", "copy", path]
+            subprocess.run(command, check=True, stdin=subprocess.DEVNULL)
+            paths.append(path)
+    return paths
+
+def merge_segments(chunks:list, chunk_segments:list) -> list:
+    """
+    Stitch the transcripts of overlapping chunks into a single timeline
+
+    Segment timestamps are shifted by the chunk offset. Inside an overlap, segments
+    whose midpoint is before the middle of the overlap are taken from the earlier chunk
+    and the rest from the later chunk, so every part of the audio is transcribed once.
+
+    chunks: list of (start, end) windows from plan_chunks
+    chunk_segments: list of transcript segments per chunk (timestamps relative to the chunk)
+
+    return: list of segments on the original timeline
+    """
+    merged = []
+    for i, ((start, end), segments) in enumerate(zip(chunks, chunk_segments)):
+        keep_from = (start + chunks[i - 1][1]) / 2 if i > 0 else float("-inf")
+        keep_to = (chunks[i + 1][0] + end) / 2 if i + 1 < len(chunks) else float("inf")
+        for segment in segments:
+            shifted = dict(segment)
+            shifted["start"] = segment["start"] + start
+            shifted["end"] = min(segment["end"] + start, end)
+            mid = (shifted["start"] + shifted["end"]) / 2
+            if keep_from <= mid < keep_to:
+                merged.append(shifted)
+    merged.sort(key=lambda x: x["start"])
+    return merged
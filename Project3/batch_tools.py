@@ -0,0 +1,411 @@
+"""
+Batch API mode for offline bulk video summarization
+
+    $ python Project3/batch_tools.py --urls urls.txt --work-dir ./data/batch --topics 5
+
+Segmentation and summary requests of many videos are written to JSONL files, submitted
+through the Batch API (cheaper, outside the online rate limits) and mapped back to their
+videos and topics. Every step is persisted under work_dir, so running the same command
+again after a crash resumes where it stopped instead of submitting new batches.
+"""
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+from gpt_tools import download_youtube, transcribe_audio, plan_segment_windows, segmentation_request, parse_segment_ranges, finish_segmentation, extract_image_frames, summary_request
+from download_cache import youtube_video_id
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.tracing import span
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+MAX_BATCH_FILE_BYTES = 100 * 1024 * 1024 # Batch API 입력 파일 크기 제한
+TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+def _write_json(path:str, data) -> None:
+    # 중간에 죽어도 깨진 파일이 남지 않도록 임시 파일에 쓰고 교체
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def _read_json(path:str, default=None):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+class BatchJob:
+    """
+    One Batch API job persisted under work_dir
+
+    work_dir/requests.jsonl: batch input, one request per line
+    work_dir/state.json: digest of the input, input file id, batch id and status
+    work_dir/results.jsonl: downloaded results, one {"custom_id", "body" | "error"} per line
+    work_dir/retry/: job resubmitting only the requests that failed or got no result
+    """
+
+    def __init__(self, client, work_dir:str, completion_window:str="24h"):
+        self.client = client
+        self.work_dir = work_dir
+        self.completion_window = completion_window
+        self.requests_path = os.path.join(work_dir, "requests.jsonl")
+        self.state_path = os.path.join(work_dir, "state.json")
+        self.results_path = os.path.join(work_dir, "results.jsonl")
+        os.makedirs(work_dir, exist_ok=True)
+        self.state = _read_json(self.state_path, {})
+        self.retry = None
+
+    def _save(self) -> None:
+        _write_json(self.state_path, self.state)
+
+    def write_requests(self, requests:dict) -> None:
+        """
+        Write the batch input file
+
+        requests: {custom_id: chat request built with build_chat_request}
+
+        A job whose input changed starts over; an unchanged input keeps the submitted batch.
+        When that batch ended without a result for every request, the successful results are kept
+        and only the failed or missing requests are written to a retry job (self.retry). A batch
+        that failed, expired or was cancelled without any output is submitted again as a whole.
+        """
+        lines = []
+        for custom_id, request in requests.items():
+            body = {key: value for key, value in request.items() if value is not None and key != "stream"}
+            lines.append(json.dumps({"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body}, ensure_ascii=False))
+        content = ("\n".join(lines) + "\n").encode("utf-8")
+        digest = hashlib.sha256(content).hexdigest()
+        if self.state.get("digest") == digest and os.path.exists(self.requests_path):
+            if not self.done:
+                return
+            if self.state.get("status") != "completed" and not self.state.get("output_file_id"):
+                print(f"Batch {self.state.get('batch_id')} of {self.work_dir} ended {self.state.get('status')} without output, resubmitting")
+                for key in ("batch_id", "status", "output_file_id", "error_file_id", "request_counts"):
+                    self.state.pop(key, None)
+                if os.path.exists(self.results_path):
+                    os.remove(self.results_path)
+                self._save()
+                return
+            results = self.results()
+            failed = {custom_id: request for custom_id, request in requests.items() if "body" not in results.get(custom_id, {})}
+            if failed:
+                print(f"Batch {self.state.get('batch_id')} of {self.work_dir}: retrying {len(failed)} of {len(requests)} requests")
+                self.retry = BatchJob(self.client, os.path.join(self.work_dir, "retry"), self.completion_window)
+                self.retry.write_requests(failed)
+            return
+        if self.state:
+            print(f"Batch input of {self.work_dir} changed, starting a new job")
+        if os.path.exists(self.results_path):
+            os.remove(self.results_path)
+        with open(self.requests_path + ".tmp", "wb") as f:
+            f.write(content)
+        os.replace(self.requests_path + ".tmp", self.requests_path)
+        self.state = {"digest": digest, "requests": len(lines), "bytes": len(content)}
+        self._save()
+
+    def active(self) -> "BatchJob":
+        """
+        The job whose batch is still to be waited for (the innermost retry job)
+        """
+        return self.retry.active() if self.retry is not None else self
+
+    def submit(self) -> str:
+        """
+        Upload the input file and create the batch (each step only once)
+
+        return: batch id
+        """
+        if not self.state.get("input_file_id"):
+            with open(self.requests_path, "rb") as f:
+                self.state["input_file_id"] = self.client.files.create(file=f, purpose="batch").id
+            self._save()
+        if not self.state.get("batch_id"):
+            batch = self.client.batches.create(input_file_id=self.state["input_file_id"], endpoint=BATCH_ENDPOINT, completion_window=self.completion_window)
+            self.state.update(batch_id=batch.id, status=batch.status)
+            self._save()
+        return self.state["batch_id"]
+
+    @property
+    def done(self) -> bool:
+        return self.state.get("status") in TERMINAL_STATUSES
+
+    def poll(self):
+        """
+        Retrieve the batch once and record its status
+
+        return: OpenAI batch object
+        """
+        batch = self.client.batches.retrieve(self.state["batch_id"])
+        self.state.update(status=batch.status, output_file_id=batch.output_file_id, error_file_id=batch.error_file_id)
+        if batch.request_counts is not None:
+            self.state["request_counts"] = batch.request_counts.model_dump()
+        self._save()
+        return batch
+
+    def results(self) -> dict:
+        """
+        Results of a finished batch, downloaded once and kept in results.jsonl
+
+        Successful results of a finished retry job replace the failed ones and are kept as well.
+
+        return: {custom_id: {"body": chat completion dict} or {"error": message}}
+        """
+        if os.path.exists(self.results_path):
+            with open(self.results_path, encoding="utf-8") as f:
+                rows = [json.loads(line) for line in f if line.strip()]
+            results = {row["custom_id"]: row for row in rows}
+        else:
+            results = self._download_results()
+        if self.retry is not None and self.retry.done:
+            results.update({custom_id: row for custom_id, row in self.retry.results().items() if "body" in row})
+        elif os.path.exists(self.results_path):
+            return results
+        with open(self.results_path + ".tmp", "w", encoding="utf-8") as f:
+            for row in results.values():
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        os.replace(self.results_path + ".tmp", self.results_path)
+        return results
+
+    def _download_results(self) -> dict:
+        results = {}
+        for key in ("error_file_id", "output_file_id"):
+            if not self.state.get(key):
+                continue
+            for line in self.client.files.content(self.state[key]).text.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                response = item.get("response") or {}
+                if item.get("error") or response.get("status_code") != 200:
+                    error = item.get("error") or (response.get("body") or {}).get("error") or f"status {response.get('status_code')}"
+                    results[item.get("custom_id")] = {"custom_id": item.get("custom_id"), "error": str(error)}
+                else:
+                    results[item["custom_id"]] = {"custom_id": item["custom_id"], "body": response["body"]}
+        return results
+
+def split_requests(requests:dict, max_bytes:int=MAX_BATCH_FILE_BYTES) -> list:
+    """
+    Split requests into parts whose JSONL input stays under max_bytes
+
+    return: list of {custom_id: request} dicts
+    """
+    parts, part, size = [], {}, 0
+    for custom_id, request in requests.items():
+        n = len(json.dumps(request, ensure_ascii=False).encode("utf-8")) + len(custom_id) + 100
+        if part and size + n > max_bytes:
+            parts.append(part)
+            part, size = {}, 0
+        part[custom_id] = request
+        size += n
+    if part:
+        parts.append(part)
+    return parts
+
+def run_batch(client, requests:dict, work_dir:str, max_bytes:int=MAX_BATCH_FILE_BYTES, timeout:float=24*3600, initial_interval:float=2.0, max_interval:float=60.0) -> dict:
+    """
+    Submit requests as one or more batches, wait for all of them and collect the results
+
+    client: OpenAI client
+    requests: {custom_id: chat request built with build_chat_request}
+    work_dir: folder holding the job state (reuse it to resume)
+    max_bytes: maximum size of one batch input file
+    timeout: seconds to wait for the batches
+    initial_interval, max_interval: polling interval bounds (exponential backoff with jitter)
+
+    return: {custom_id: {"body": chat completion dict} or {"error": message}}
+    """
+    jobs = []
+    for i, part in enumerate(split_requests(requests, max_bytes)):
+        job = BatchJob(client, os.path.join(work_dir, f"part-{i:03d}"))
+        job.write_requests(part)
+        job.submit()
+        job.active().submit()
+        jobs.append(job)
+
+    parents, jobs = jobs, [job.active() for job in jobs] # 재시도 중인 part 는 retry job 을 기다림
+    with span("batch.wait", jobs=len(jobs), requests=len(requests)) as s:
+        deadline = time.monotonic() + timeout
+        interval = initial_interval
+        # 모든 batch 를 한 루프에서 polling 하고, 진행이 없으면 간격을 늘림
+        while not all(job.done for job in jobs):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"batches under {work_dir} did not finish within {timeout}s")
+            time.sleep(interval * random.uniform(0.8, 1.2))
+            progressed = False
+            for job in jobs:
+                if job.done:
+                    continue
+                before = job.state.get("request_counts"), job.state.get("status")
+                job.poll()
+                progressed |= (job.state.get("request_counts"), job.state.get("status")) != before
+            counts = [job.state.get("request_counts") or {} for job in jobs]
+            print(f"Batch progress: {sum(c.get('completed', 0) for c in counts)}/{len(requests)} ({', '.join(job.state['status'] for job in jobs)})")
+            interval = initial_interval if progressed else min(interval * 2, max_interval)
+        s.set(statuses=[job.state["status"] for job in jobs])
+
+    results = {}
+    for job in parents:
+        results.update(job.results())
+    for custom_id in requests:
+        results.setdefault(custom_id, {"custom_id": custom_id, "error": "no result (batch ended before the request was processed)"})
+    return results
+
+def _json_content(result:dict):
+    if "error" in result:
+        raise ValueError(result["error"])
+    return json.loads(result["body"]["choices"][0]["message"]["content"])
+
+def batch_text_segmentation(client, videos:dict, work_dir:str, token_budget:int=6000, failed:set=None, **batch_kwargs) -> dict:
+    """
+    text_segmentation of many transcripts through the Batch API
+
+    client: OpenAI client
+    videos: {video_id: (topic_num, text_segments)}
+    work_dir: folder holding the job state
+    token_budget: maximum transcript tokens per request
+    failed: optional set that receives the ids of videos with a failed window
+    batch_kwargs: run_batch arguments
+
+    return: {video_id: dict of topic groups with start and end timestamps}
+            A window whose request failed is kept as a single group.
+    """
+    requests, windows = {}, {}
+    for video_id, (topic_num, text_segments) in videos.items():
+        windows[video_id] = plan_segment_windows(text_segments, topic_num, token_budget)
+        for k, (s, e, n) in enumerate(windows[video_id]):
+            requests[f"{video_id}:seg:{k}"] = segmentation_request(n, text_segments, s, e)
+
+    results = run_batch(client, requests, work_dir, **batch_kwargs)
+
+    output = {}
+    for video_id, (topic_num, text_segments) in videos.items():
+        ranges = []
+        for k, (s, e, n) in enumerate(windows[video_id]):
+            try:
+                segment_info = _json_content(results[f"{video_id}:seg:{k}"])
+            except (ValueError, KeyError, IndexError) as error:
+                print(f"{video_id} window {k} segmentation failed: {error}")
+                segment_info = {}
+                if failed is not None:
+                    failed.add(video_id)
+            ranges += parse_segment_ranges(segment_info, s, e)
+        output[video_id] = finish_segmentation(ranges, text_segments, topic_num) if text_segments else {}
+    return output
+
+def batch_video_summary(client, videos:dict, work_dir:str, preprocessor=None, **batch_kwargs) -> dict:
+    """
+    make_video_summary of many videos through the Batch API
+
+    client: OpenAI client
+    videos: {video_id: (paragraphs, img_folder_path)}
+    work_dir: folder holding the job state
+    preprocessor: optional ImagePreprocessor that downscales and recompresses the frames
+    batch_kwargs: run_batch arguments
+
+    return: {video_id: list of responses in topic order (same shape as make_video_summary)}
+    """
+    requests = {}
+    for video_id, (paragraphs, img_folder_path) in videos.items():
+        for i, paragraph in enumerate(paragraphs):
+            requests[f"{video_id}:topic{i+1}"] = summary_request(paragraph, os.path.join(img_folder_path, f"topic{i+1}"), preprocessor=preprocessor)
+
+    results = run_batch(client, requests, work_dir, **batch_kwargs)
+
+    output = {}
+    for video_id, (paragraphs, _) in videos.items():
+        outputs = []
+        for i in range(len(paragraphs)):
+            try:
+                outputs.append(_json_content(results[f"{video_id}:topic{i+1}"]))
+            except (ValueError, KeyError, IndexError) as e:
+                print(f"{video_id} paragraph {i+1} summary failed: {e}")
+                outputs.append({"image index": 0, "summary": "", "error": str(e)})
+        output[video_id] = outputs
+    return output
+
+def run_nightly(client, urls:list, work_dir:str="./data/batch", topic_num:int=5, preprocessor=None, **batch_kwargs) -> dict:
+    """
+    Summarize many videos: online download and transcription, batched segmentation and summaries
+
+    Transcripts, segmentations and summaries are saved under work_dir/videos/<video id>,
+    so a rerun after a crash skips the finished steps. A segmentation or summary with a failed
+    request is returned but not saved, so the next run requests it again.
+
+    client: OpenAI client
+    urls: youtube video urls
+    work_dir: folder holding the videos and the batch jobs
+    topic_num: number of topics per video
+    preprocessor: optional ImagePreprocessor that downscales and recompresses the frames
+    batch_kwargs: run_batch arguments
+
+    return: {url: list of responses in topic order}
+    """
+    videos = {youtube_video_id(url): url for url in urls}
+    folders = {video_id: os.path.join(work_dir, "videos", video_id) for video_id in videos}
+
+    transcripts = {}
+    for video_id, url in videos.items():
+        path = os.path.join(folders[video_id], "transcript.json")
+        transcripts[video_id] = _read_json(path)
+        if transcripts[video_id] is None:
+            raw_data_path = os.path.join(folders[video_id], "raw_data")
+            download_youtube(url, output_path=raw_data_path)
+            transcripts[video_id] = transcribe_audio(client, os.path.join(raw_data_path, "audio.m4a"))
+            _write_json(path, transcripts[video_id])
+
+    segment_infos = {video_id: _read_json(os.path.join(folders[video_id], "segments.json")) for video_id in videos}
+    pending = {video_id: (topic_num, transcripts[video_id]) for video_id, info in segment_infos.items() if info is None}
+    failed = set()
+    if pending:
+        for video_id, info in batch_text_segmentation(client, pending, os.path.join(work_dir, "jobs", "segmentation"), failed=failed, **batch_kwargs).items():
+            segment_infos[video_id] = info
+            if video_id not in failed:
+                _write_json(os.path.join(folders[video_id], "segments.json"), info)
+
+    summaries = {video_id: _read_json(os.path.join(folders[video_id], "summary.json")) for video_id in videos}
+    pending = {}
+    for video_id, summary in summaries.items():
+        if summary is None:
+            video_path = os.path.join(folders[video_id], "raw_data", "video.mp4")
+            paragraphs = extract_image_frames(segment_infos[video_id], transcripts[video_id], folders[video_id], video_path)
+            pending[video_id] = (paragraphs, folders[video_id])
+    if pending:
+        for video_id, outputs in batch_video_summary(client, pending, os.path.join(work_dir, "jobs", "summary"), preprocessor=preprocessor, **batch_kwargs).items():
+            summaries[video_id] = outputs
+            # 실패한 구간이 있는 영상은 저장하지 않고 다음 실행에서 다시 요청
+            if video_id in failed or any(output.get("error") for output in outputs):
+                print(f"{video_id} has failed requests, not saving its results")
+                continue
+            _write_json(os.path.join(folders[video_id], "summary.json"), outputs)
+
+    return {url: summaries[video_id] for video_id, url in videos.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--urls", required=True, help="text file with one youtube url per line")
+    parser.add_argument("--work-dir", default="./data/batch")
+    parser.add_argument("--topics", type=int, default=5)
+    parser.add_argument("--base-url", default=os.environ.get("OPENAI_BASE_URL"), help="API base url (e.g. a local stand-in server)")
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    parser.add_argument("--max-poll-interval", type=float, default=60.0)
+    args = parser.parse_args()
+
+    from common.clients import get_client
+    from common.image_prep import default_image_preprocessor
+
+    with open(args.urls, encoding="utf-8") as f:
+        urls = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    client = get_client(os.environ.get("OPENAI_API_KEY", ""), base_url=args.base_url)
+    summaries = run_nightly(client, urls, args.work_dir, args.topics, preprocessor=default_image_preprocessor(),
+                            initial_interval=args.poll_interval, max_interval=args.max_poll_interval)
+    _write_json(os.path.join(args.work_dir, "summaries.json"), summaries)
+    failed = sum(1 for outputs in summaries.values() for output in outputs if output.get("error"))
+    print(f"{len(summaries)} videos summarized ({failed} failed topics) -> {os.path.join(args.work_dir, 'summaries.json')}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Frame extraction benchmark on a generated local test video
+
+    $ python bench_frame_extraction.py --duration 600 --topics 10
+
+Compares the previous approach (one shell-spawned ffmpeg per topic, serially) with the
+frame_extractor modes: serial, pool and single_pass.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from frame_extractor import FFMPEG_BIN, extract_frames, frame_rate
+
+def make_test_video(path:str, duration:int, size:str="1280x720", rate:int=30) -> None:
+    command = [
+        FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-y",
+        "-f", "lavfi", "-i", f"testsrc=duration={duration}:size={size}:rate={rate}",
+        "-c:v", "libx264", "-pix_fmt", "yuv420p", "-g", str(rate * 2), path,
+    ]
+    subprocess.run(command, check=True)
+
+def seconds2hmd(x:float) -> str:
+    # gpt_tools.seconds2hmd 와 동일 (openai, yt_dlp 없이 실행할 수 있도록 복사)
+    hours, remainder = divmod(int(x), 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return "{:02}:{:02}:{:02}".format(hours, minutes, seconds)
+
+def legacy_extract(video_path:str, windows:list, number_pic_per_topic:int) -> None:
+    # 기존 extract_image_frames 의 방식 (주제마다 shell 을 통해 ffmpeg 실행)
+    for s, e, cur_img_dir in windows:
+        os.makedirs(cur_img_dir, exist_ok=True)
+        s_format, e_format = seconds2hmd(s), seconds2hmd(e)
+        fps_ratio = frame_rate(s, e, number_pic_per_topic)
+        command = f"{FFMPEG_BIN} -hide_banner -loglevel error -y -ss {s_format} -to {e_format} -i '{video_path}' -vf \"fps={fps_ratio}\" \"{cur_img_dir}/output%d.png\""
+        subprocess.run(command, shell=True)
+
+def count_frames(windows:list) -> int:
+    return sum(len([f for f in os.listdir(d) if f.endswith(".png")]) for _, _, d in windows)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=int, default=300, help="test video length in seconds")
+    parser.add_argument("--topics", type=int, default=10, help="number of topic windows")
+    parser.add_argument("--pics", type=int, default=3, help="frames per topic")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if shutil.which(FFMPEG_BIN) is None:
+        sys.exit(f"{FFMPEG_BIN} not found")
+
+    work_dir = tempfile.mkdtemp(prefix="frame_bench_")
+    try:
+        video_path = os.path.join(work_dir, "video test.mp4") # 공백이 포함된 경로도 처리되는지 확인
+        make_test_video(video_path, args.duration)
+
+        step = args.duration / args.topics
+        runners = {
+            "legacy_shell": lambda w: legacy_extract(video_path, w, args.pics),
+            "serial": lambda w: extract_frames(video_path, w, args.pics, mode="serial"),
+            "pool": lambda w: extract_frames(video_path, w, args.pics, mode="pool"),
+            "single_pass": lambda w: extract_frames(video_path, w, args.pics, mode="single_pass"),
+        }
+
+        print(f"video: {args.duration}s, topics: {args.topics}, frames/topic: {args.pics}, cpus: {os.cpu_count()}")
+        print(f"{'mode':<14}{'best (s)':>10}{'mean (s)':>10}{'frames':>8}")
+        for name, runner in runners.items():
+            timings = []
+            for r in range(args.repeat):
+                out_dir = os.path.join(work_dir, f"{name}_{r}")
+                windows = [(i * step, (i + 1) * step, os.path.join(out_dir, f"topic{i+1}")) for i in range(args.topics)]
+                start = time.perf_counter()
+                runner(windows)
+                timings.append(time.perf_counter() - start)
+            print(f"{name:<14}{min(timings):>10.2f}{sum(timings) / len(timings):>10.2f}{count_frames(windows):>8}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
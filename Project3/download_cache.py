@@ -0,0 +1,123 @@
+import os
+import re
+import time
+import shutil
+import hashlib
+import threading
+
+DEFAULT_CACHE_DIR = os.environ.get("YOUTUBE_CACHE_DIR", "./.cache/youtube")
+
+YOUTUBE_ID_PATTERN = re.compile(r"(?:v=|/shorts/|/embed/|/live/|youtu\.be/)([0-9A-Za-z_-]{11})")
+
+def youtube_video_id(youtube_url:str) -> str:
+    """
+    Video id of a youtube url (hash of the url for other urls)
+
+    youtube_url: youtube video url
+
+    return: 11 character youtube id, or "url-<sha256 prefix>" when the url has no id
+    """
+    match = YOUTUBE_ID_PATTERN.search(youtube_url)
+    if match:
+        return match.group(1)
+    return "url-" + hashlib.sha256(youtube_url.strip().encode("utf-8")).hexdigest()[:16]
+
+class DownloadCache:
+    """
+    Content addressed cache of downloaded media keyed by (video id, format)
+
+    Files live outside ./data and are shared by every run; the artifact store only keeps links to them.
+    The total size is bounded and the least recently used files are evicted first.
+    """
+
+    def __init__(self, cache_dir:str=DEFAULT_CACHE_DIR, max_bytes:int=5*1024**3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, video_id:str, format_name:str) -> str:
+        safe_format = re.sub(r"[^0-9A-Za-z_.-]", "_", format_name)
+        return os.path.join(self.cache_dir, f"{video_id}.{safe_format}")
+
+    def get(self, video_id:str, format_name:str) -> str:
+        """
+        Cached file path, or None on a miss
+        """
+        path = self.path(video_id, format_name)
+        if os.path.isfile(path):
+            os.utime(path) # LRU 순서 갱신
+            return path
+        return None
+
+    def put(self, video_id:str, format_name:str, src_path:str) -> str:
+        """
+        Move a freshly downloaded file into the cache
+
+        return: cached file path
+        """
+        path = self.path(video_id, format_name)
+        os.replace(src_path, path)
+        self.evict(keep=(path,)) # 호출한 쪽이 link 하기 전에 방금 넣은 파일이 지워지지 않도록 제외
+        return path
+
+    def evict(self, keep:tuple=()) -> None:
+        """
+        Remove the least recently used files until the cache is under max_bytes
+
+        keep: file paths that are never evicted (they still count towards the total)
+        """
+        with self._lock:
+            entries = []
+            for file_name in os.listdir(self.cache_dir):
+                file_path = os.path.join(self.cache_dir, file_name)
+                if os.path.isfile(file_path) and not file_name.endswith((".tmp", ".part")):
+                    st = os.stat(file_path)
+                    entries.append((st.st_mtime, file_path, st.st_size))
+            total = sum(size for _, _, size in entries)
+            for _, file_path, size in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if file_path in keep:
+                    continue
+                os.remove(file_path)
+                total -= size
+
+def link_or_copy(src_path:str, dst_path:str) -> None:
+    """
+    Hard link src_path to dst_path (copy when linking is not possible)
+    """
+    if os.path.exists(dst_path):
+        os.remove(dst_path)
+    try:
+        os.link(src_path, dst_path)
+    except OSError:
+        shutil.copyfile(src_path, dst_path)
+
+def fetch_with_cache(cache:DownloadCache, youtube_url:str, format_name:str, dst_path:str, download) -> bool:
+    """
+    Place the media of youtube_url at dst_path, downloading it only on a cache miss
+
+    cache: DownloadCache object (None disables caching)
+    youtube_url: youtube video url
+    format_name: yt-dlp format selector, part of the cache key
+    dst_path: where the file should end up
+    download: function(tmp_path) downloading the media into tmp_path
+
+    return: True on a cache hit
+    """
+    if cache is None:
+        download(dst_path)
+        return False
+
+    video_id = youtube_video_id(youtube_url)
+    cached = cache.get(video_id, format_name)
+    if cached is None:
+        tmp_path = f"{cache.path(video_id, format_name)}.{threading.get_ident()}.{int(time.time())}.tmp"
+        download(tmp_path)
+        cached = cache.put(video_id, format_name, tmp_path)
+        hit = False
+    else:
+        hit = True
+    link_or_copy(cached, dst_path)
+    return hit
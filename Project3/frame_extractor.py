@@ -0,0 +1,100 @@
+import os
+import sys
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.tracing import span, propagate
+
+FFMPEG_BIN = os.environ.get("FFMPEG_BIN", "ffmpeg")
+
+def frame_rate(start:float, end:float, number_pic_per_topic:int) -> float:
+    """
+    Frame rate that yields number_pic_per_topic frames inside [start, end]
+
+    예를 들어 30초 분량이라고 하면, 10초마다 1 이미지씩 생성.
+    """
+    return number_pic_per_topic / max(round(end - start), 1)
+
+def build_topic_command(video_path:str, start:float, end:float, out_dir:str, number_pic_per_topic:int=3) -> list:
+    """
+    Build the ffmpeg argument list extracting the frames of a single topic window
+
+    video_path: path to the video file
+    start, end: topic window in seconds
+    out_dir: folder to save the frames (output1.png, output2.png, ...)
+    number_pic_per_topic: number of frames to extract
+
+    return: argument list for subprocess (no shell involved)
+    """
+    return [
+        FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-y",
+        "-ss", f"{start:.3f}", "-to", f"{end:.3f}", "-i", video_path,
+        "-vf", f"fps={frame_rate(start, end, number_pic_per_topic)}",
+        os.path.join(out_dir, "output%d.png"),
+    ]
+
+def build_single_pass_command(video_path:str, windows:list, number_pic_per_topic:int=3) -> list:
+    """
+    Build one ffmpeg argument list that decodes the video once and writes the frames of every window
+
+    The decoded stream is split into one branch per window; each branch is trimmed to its window,
+    sampled with the fps filter and written to its own folder.
+
+    video_path: path to the video file
+    windows: list of (start, end, out_dir)
+    number_pic_per_topic: number of frames to extract per window
+
+    return: argument list for subprocess (no shell involved)
+    """
+    # 첫 구간 이전은 디코딩할 필요가 없으므로 입력 단계에서 건너뜀
+    offset = min(start for start, _, _ in windows)
+    last = max(end for _, end, _ in windows)
+
+    branches = [f"[0:v]split={len(windows)}" + "".join(f"[s{i}]" for i in range(len(windows)))]
+    for i, (start, end, _) in enumerate(windows):
+        rate = frame_rate(start, end, number_pic_per_topic)
+        branches.append(f"[s{i}]trim=start={start - offset:.3f}:end={end - offset:.3f},setpts=PTS-STARTPTS,fps={rate}[o{i}]")
+
+    command = [
+        FFMPEG_BIN, "-hide_banner", "-loglevel", "error", "-y",
+        "-ss", f"{offset:.3f}", "-to", f"{last:.3f}", "-i", video_path,
+        "-filter_complex", ";".join(branches),
+    ]
+    for i, (_, _, out_dir) in enumerate(windows):
+        command += ["-map", f"[o{i}]", os.path.join(out_dir, "output%d.png")]
+    return command
+
+def _run(command:list, windows:int=1) -> None:
+    with span("ffmpeg.frames", windows=windows):
+        subprocess.run(command, check=True, stdin=subprocess.DEVNULL)
+
+def extract_frames(video_path:str, windows:list, number_pic_per_topic:int=3, mode:str="single_pass", max_workers:int=None) -> None:
+    """
+    Extract frames of every topic window from the video
+
+    video_path: path to the video file
+    windows: list of (start, end, out_dir) in seconds
+    number_pic_per_topic: number of frames to extract per window
+    mode: "single_pass" (decode the video once for all windows),
+          "pool" (one ffmpeg per window in a bounded pool sized to the cpu count),
+          "serial" (one ffmpeg per window, one after another)
+    max_workers: pool size for mode="pool" (default: os.cpu_count())
+    """
+    if not windows:
+        return
+    for _, _, out_dir in windows:
+        os.makedirs(out_dir, exist_ok=True)
+
+    if mode == "single_pass":
+        _run(build_single_pass_command(video_path, windows, number_pic_per_topic), windows=len(windows))
+    elif mode == "pool":
+        commands = [build_topic_command(video_path, s, e, d, number_pic_per_topic) for s, e, d in windows]
+        # ffmpeg 자체가 별도 프로세스이므로 스레드 풀로 동시에 실행되는 프로세스 수만 제한함
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as executor:
+            list(executor.map(propagate(_run), commands))
+    elif mode == "serial":
+        for s, e, d in windows:
+            _run(build_topic_command(video_path, s, e, d, number_pic_per_topic))
+    else:
+        raise ValueError(f"unknown frame extraction mode: {mode}")
@@ -1,45 +1,108 @@
 import os
 import sys
 import json
+import math
 import base64
-import subprocess
+from concurrent.futures import ThreadPoolExecutor
 import yt_dlp
 import openai
 
-def download_youtube(youtube_url:str, output_path:str="./data/raw_data") -> None:
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.gpt_cache import default_cache
+from common.llm_client import get_llm_client
+from common.tracing import span, propagate
+from common.tokens import count_tokens
+from frame_extractor import extract_frames
+from segment_index import SegmentIndex
+from download_cache import DownloadCache, fetch_with_cache
+from audio_chunker import probe_duration, detect_silences, plan_chunks, split_audio, merge_segments
+
+TRANSCRIPTION_MODEL = "whisper-1"
+SEGMENTATION_MODEL = "gpt-4-turbo"
+SUMMARY_MODEL = "gpt-4-turbo"
+
+MEDIA_FORMATS = {
+    "audio": ("bestaudio/best", "audio.m4a"),
+    "video": ("bestvideo/best", "video.mp4"),
+}
+
+_download_cache = None
+
+def default_download_cache() -> DownloadCache:
+    """
+    Process wide youtube download cache (./.cache/youtube or YOUTUBE_CACHE_DIR)
+    """
+    global _download_cache
+    if _download_cache is None:
+        _download_cache = DownloadCache()
+    return _download_cache
+
+def download_media(youtube_url:str, kind:str, output_path:str="./data/raw_data", use_cache:bool=True) -> str:
+    """
+    Download the audio or the video stream of a youtube video
+
+    youtube_url: youtube video url
+    kind: "audio" or "video"
+    output_path: path to save the downloaded file
+    use_cache: reuse a previous download of the same video id and format
+
+    return: path of the downloaded file
+    """
+    os.makedirs(output_path, exist_ok=True) # 폴더 생성 코드 추가
+    format_name, file_name = MEDIA_FORMATS[kind]
+    dst_path = os.path.join(output_path, file_name)
+
+    def _download(target_path):
+        # Use yt-dlp to download the media
+        with yt_dlp.YoutubeDL({'format': format_name, 'outtmpl': target_path}) as ydl:
+            ydl.download([youtube_url])
+
+    with span("media.download", kind=kind) as s:
+        hit = fetch_with_cache(default_download_cache() if use_cache else None, youtube_url, format_name, dst_path, _download)
+        s.set(cache="hit" if hit else ("miss" if use_cache else "off"), bytes_downloaded=0 if hit else os.path.getsize(dst_path))
+    print(f"{kind.capitalize()} {'Loaded from cache' if hit else 'Downloaded Successfully'}!")
+    return dst_path
+
+def download_youtube(youtube_url:str, output_path:str="./data/raw_data", use_cache:bool=True) -> None:
     """
     Download audio and video files from youtube video url
 
+    Audio and video are downloaded at the same time, and each is served from the download cache when available.
+
     youtube_url: youtube video url
     output_path: path to save the downloaded audio and video files
+    use_cache: reuse previous downloads of the same video id and format
     """
-    os.makedirs(output_path, exist_ok=True) # 폴더 생성 코드 추가
-    output_path_audio = os.path.join(output_path, "audio.m4a")
-    output_path_video = os.path.join(output_path, "video.mp4")
-
-    # Define download options
-    ydl_opts_audio = {
-        'format': 'bestaudio/best',
-        'outtmpl': output_path_audio,
-    }
-
-    ydl_opts_video = {
-        'format': 'bestvideo/best',
-        'outtmpl': output_path_video,
-    }
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(propagate(download_media), youtube_url, kind, output_path, use_cache) for kind in ("audio", "video")]
+        for future in futures:
+            future.result()
+
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024 # whisper API 업로드 크기 제한
+
+def _transcribe_file(client, audio_path:str) -> list:
+    with span("whisper.transcribe", bytes_uploaded=os.path.getsize(audio_path)) as s, open(audio_path, "rb") as audio_file:
+        transcript = client.audio.transcriptions.create(
+            file=audio_file,
+            model=TRANSCRIPTION_MODEL,
+            response_format="verbose_json",
+            timestamp_granularities=["segment"]
+            )
+        s.set(segments=len(transcript.segments), audio_seconds=getattr(transcript, "duration", None))
     
-    # Use yt-dlp to download the audio
-    with yt_dlp.YoutubeDL(ydl_opts_audio) as ydl:
-        ydl.download([youtube_url])
-    print("Audio Downloaded Successfully!")
+    # post-process the transcript
+    erase_keys = ['id', 'seek', 'tokens', 'temperature', 'avg_logprob', 'compression_ratio', 'no_speech_prob']
+    for x in transcript.segments:
+        for k in erase_keys:
+            x.pop(k, None)
 
-    with yt_dlp.YoutubeDL(ydl_opts_video) as ydl:
-        ydl.download([youtube_url])
-    print("Video Downloaded Successfully!")
+    return transcript.segments
 
 def transcribe_audio(client, audio_path:str) -> list:
     """
     Transcribe audio file using OpenAI API
+
+    Files larger than the upload limit are transcribed with transcribe_audio_chunked.
     
     client: OpenAI client
     audio_path: path to the audio file
@@ -47,26 +110,43 @@ def transcribe_audio(client, audio_path:str) -> list:
     return: list of transcribed text segments
     """
 
-    audio_file = open(audio_path, "rb")
+    with span("transcribe_audio") as s:
+        if os.path.getsize(audio_path) > MAX_UPLOAD_BYTES:
+            s.set(chunked=True)
+            return transcribe_audio_chunked(client, audio_path)
+        return _transcribe_file(client, audio_path)
 
-    transcript = client.audio.transcriptions.create(
-        file=audio_file,
-        model="whisper-1",
-        response_format="verbose_json",
-        timestamp_granularities=["segment"]
-        )
-    
-    # post-process the transcript
-    erase_keys = ['id', 'seek', 'tokens', 'temperature', 'avg_logprob', 'compression_ratio', 'no_speech_prob']
-    for x in transcript.segments:
-        for k in erase_keys:
-            del x[k]
+def transcribe_audio_chunked(client, audio_path:str, chunk_seconds:float=600, overlap_seconds:float=5, split_on_silence:bool=True, max_workers:int=4) -> list:
+    """
+    Transcribe a long audio file in overlapping chunks, concurrently
 
-    return transcript.segments
+    client: OpenAI client
+    audio_path: path to the audio file
+    chunk_seconds: length of each chunk in seconds (keep the chunk under the upload limit)
+    overlap_seconds: overlap between neighbouring chunks
+    split_on_silence: move chunk cuts to nearby silences
+    max_workers: number of chunks transcribed at the same time
+
+    return: list of transcribed text segments on the original timeline (same shape as transcribe_audio)
+    """
+
+    duration = probe_duration(audio_path)
+    silences = detect_silences(audio_path) if split_on_silence else None
+    chunks = plan_chunks(duration, chunk_seconds, overlap_seconds, silences)
 
-def run_gpt(client, model:str, messages:list, max_token:int=150, temperature:float=0.7, is_json:bool=False, seed:int=None, tools:list=None, tool_choice:str=None, stream:bool=False):
+    chunk_dir = os.path.join(os.path.dirname(audio_path), "audio_chunks")
+    chunk_paths = split_audio(audio_path, chunks, chunk_dir)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        chunk_segments = list(executor.map(propagate(lambda path: _transcribe_file(client, path)), chunk_paths))
+    print(f"{len(chunks)} audio chunks transcribed!")
 
-    response = client.chat.completions.create(
+    return merge_segments(chunks, chunk_segments)
+
+def build_chat_request(model:str, messages:list, max_token:int=150, temperature:float=0.7, is_json:bool=False, seed:int=None, tools:list=None, tool_choice:str=None, stream:bool=False) -> dict:
+    """
+    Keyword arguments of client.chat.completions.create (also the body of a Batch API request)
+    """
+    return dict(
         model=model,
         messages=messages,
         max_tokens=max_token,
@@ -77,44 +157,188 @@ def run_gpt(client, model:str, messages:list, max_token:int=150, temperature:flo
         tool_choice="auto" if tools else tool_choice,
         stream=stream
     )
-    
-    return response
 
-def text_segmentation(client, topic_num:int, text_segments:list) -> dict:
+def run_gpt(client, model:str, messages:list, max_token:int=150, temperature:float=0.7, is_json:bool=False, seed:int=None, tools:list=None, tool_choice:str=None, stream:bool=False, cache=None):
+
+    request = build_chat_request(model, messages, max_token, temperature, is_json, seed, tools, tool_choice, stream)
+    return send_chat_request(client, request, cache=cache)
+
+def send_chat_request(client, request:dict, cache=None):
     """
-    Segment text segments into topic groups using OpenAI API
+    Send a request built with build_chat_request
 
     client: OpenAI client
+    request: keyword arguments of client.chat.completions.create
+    cache: optional ResponseCache (GPT_CACHE_DIR default cache when None)
+
+    return: GPT response object (chunk generator when request["stream"] is True)
+    """
+    # 공용 LLM 클라이언트가 RPM/TPM 제한, 재시도, 캐시, 트레이싱을 처리
+    return get_llm_client(client).chat(request, cache=cache or default_cache())
+
+def encode_transcript(text_segments:list, offset:int=0) -> str:
+    """
+    Encode transcript segments as compact "[idx] start-end text" lines
+
     text_segments: list of text segments
-    topic_num: number of topics to be segmented
+    offset: index of the first segment (for windows of a longer transcript)
 
-    return: dict of topic groups with start and end timestamps
+    return: one line per segment
+    """
+    return "\n".join(f"[{offset+i}] {x['start']:.1f}-{x['end']:.1f} {x['text'].strip()}" for i, x in enumerate(text_segments))
+
+def build_segmentation_messages(topic_num:int, transcript_lines:str) -> list:
     """
+    Build the chat messages asking for topic boundaries as segment indices
 
-    # 코드 추가
-    system_message = "Json Format: {'0' : {'start' : {start timestamp}, 'end' : {end timestamp}}, ...}" 
+    topic_num: number of topics to be segmented
+    transcript_lines: transcript encoded with encode_transcript
+
+    return: list of chat messages
+    """
+    system_message = "Json Format: {'0' : {'start' : {start segment index}, 'end' : {end segment index}}, ...}" 
     user_message = f"""
-    삼중 따옴표 안에 영상의 대본 텍스트가 리스트 형태로 담겨있어.
+    삼중 따옴표 안에 영상의 대본이 한 줄에 하나씩 "[segment index] 시작초-종료초 텍스트" 형식으로 담겨있어.
     텍스트를 보고 문맥적으로 유사한 하위 텍스트 그룹 {topic_num}개가 생성될 수 있도록 topic segmentation 을 진행해줘.
     텍스트 그룹은 반드시 비슷한 문맥 또는 하나의 주제로 묶어야 해.
     또한 텍스트 그룹간에 겹치는 부분이 없어야 해.
-    텍스트 그룹을 분리한 후에는 그룹의 시작과 끝 timestmap를 제공된 JSON Format으로 반환해줘.
+    텍스트 그룹을 분리한 후에는 그룹의 시작과 끝 segment index를 제공된 JSON Format으로 반환해줘.
     JSON Format의 key에는 텍스트 그룹의 인덱스가, value에는 JSON이 들어가야 해.
-    Value Json은 'stat' key에 텍스트 그룹의 시작 timestamp가, 'end' key에 텍스트 그룹의 종료 timestamp 를 넣어줘야 해.
+    Value Json은 'start' key에 텍스트 그룹의 첫 segment index가, 'end' key에 텍스트 그룹의 마지막 segment index 를 넣어줘야 해.
 
-    \"\"\"{text_segments}\"\"\"
+    \"\"\"{transcript_lines}\"\"\"
     """
-    model = "gpt-4-turbo"
-    max_token = 1000
     messages = [
         {"role": "system", "content": system_message},
         {"role": "user", "content": user_message}
     ]
+    return messages
+
+def parse_segment_ranges(segment_info:dict, first:int, last:int) -> list:
+    """
+    Turn the model output into sorted, non-overlapping (start index, end index) ranges
+
+    segment_info: JSON returned by the model ({'0': {'start': idx, 'end': idx}, ...})
+    first, last: index range the model was given
 
-    response = run_gpt(client, model, messages, max_token, is_json=True, temperature=0.1, seed=100)
-    segment_info = json.loads(response.choices[0].message.content)
+    return: list of (start index, end index) covering first..last
+    """
+    starts = set()
+    for item in segment_info.values():
+        try:
+            starts.add(min(max(int(item["start"]), first), last))
+        except (KeyError, TypeError, ValueError):
+            continue
+    starts = sorted(starts | {first})
+    # 각 그룹의 끝은 다음 그룹 시작 직전으로 맞춰서 겹치거나 빠지는 segment 가 없도록 함
+    return [(s, (starts[i+1] - 1) if i + 1 < len(starts) else last) for i, s in enumerate(starts)]
+
+def segmentation_request(topic_num:int, text_segments:list, first:int, last:int) -> dict:
+    """
+    Chat request segmenting text_segments[first:last+1] into topic_num groups
+    """
+    model = SEGMENTATION_MODEL
+    max_token = 1000
+    messages = build_segmentation_messages(topic_num, encode_transcript(text_segments[first:last+1], offset=first))
+    return build_chat_request(model, messages, max_token, is_json=True, temperature=0.1, seed=100)
+
+def _segment_window(client, topic_num:int, text_segments:list, first:int, last:int, cache=None) -> list:
+    response = send_chat_request(client, segmentation_request(topic_num, text_segments, first, last), cache=cache)
+    return parse_segment_ranges(json.loads(response.choices[0].message.content), first, last)
+
+def merge_segment_ranges(ranges:list, text_segments:list, topic_num:int) -> list:
+    """
+    Merge neighbouring ranges until topic_num ranges are left
+
+    The neighbouring pair with the shortest combined duration is merged first.
+    """
+    ranges = list(ranges)
+    while len(ranges) > topic_num:
+        durations = [text_segments[ranges[i+1][1]]["end"] - text_segments[ranges[i][0]]["start"] for i in range(len(ranges) - 1)]
+        i = durations.index(min(durations))
+        ranges[i:i+2] = [(ranges[i][0], ranges[i+1][1])]
+    return ranges
+
+def plan_segment_windows(text_segments:list, topic_num:int, token_budget:int=6000) -> list:
+    """
+    Split the transcript into windows of at most token_budget tokens
+
+    The topics are shared between windows in proportion to their duration.
+
+    text_segments: list of text segments
+    topic_num: number of topics of the whole transcript
+    token_budget: maximum transcript tokens per window
+
+    return: list of (first index, last index, topics of the window)
+    """
+    if not text_segments:
+        return []
+    last = len(text_segments) - 1
+    line_tokens = [count_tokens(line) for line in encode_transcript(text_segments).split("\n")]
+    if sum(line_tokens) <= token_budget:
+        return [(0, last, topic_num)]
+
+    bounds, first, used = [], 0, 0
+    for i, n in enumerate(line_tokens):
+        if used + n > token_budget and i > first:
+            bounds.append((first, i - 1))
+            first, used = i, 0
+        used += n
+    bounds.append((first, last))
+
+    total = text_segments[last]["end"] - text_segments[0]["start"] or 1
+    windows = []
+    for s, e in bounds:
+        share = (text_segments[e]["end"] - text_segments[s]["start"]) / total
+        windows.append((s, e, max(1, math.ceil(topic_num * share))))
+    return windows
+
+def finish_segmentation(ranges:list, text_segments:list, topic_num:int) -> dict:
+    """
+    Merge the window ranges down to topic_num groups and convert them to timestamps
+
+    return: dict of topic groups with start and end timestamps
+    """
+    ranges = merge_segment_ranges(ranges, text_segments, topic_num)
+    return {str(i): {"start": text_segments[s]["start"], "end": text_segments[e]["end"]} for i, (s, e) in enumerate(ranges)}
+
+def text_segmentation(client, topic_num:int, text_segments:list, cache=None, token_budget:int=6000, max_workers:int=4) -> dict:
+    """
+    Segment text segments into topic groups using OpenAI API
+
+    The transcript is sent as compact "[idx] start-end text" lines and the model answers with segment indices.
+    Transcripts longer than token_budget are split into windows that are segmented in parallel (map),
+    then neighbouring groups are merged down to topic_num (reduce).
+
+    client: OpenAI client
+    text_segments: list of text segments
+    topic_num: number of topics to be segmented
+    cache: optional ResponseCache to reuse responses of identical requests
+    token_budget: maximum transcript tokens per request
+    max_workers: number of windows segmented at the same time
+
+    return: dict of topic groups with start and end timestamps
+    """
 
-    return segment_info
+    if not text_segments:
+        return {}
+    # map: 토큰 예산에 맞게 window 를 나누고, window 길이에 비례해 주제 수를 배분
+    windows = plan_segment_windows(text_segments, topic_num, token_budget)
+
+    def _map(window):
+        s, e, n = window
+        return _segment_window(client, n, text_segments, s, e, cache=cache)
+
+    with span("video.segmentation", windows=len(windows)):
+        if len(windows) == 1:
+            ranges = _map(windows[0])
+        else:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                ranges = [r for window_ranges in executor.map(propagate(_map), windows) for r in window_ranges]
+            print(f"{len(windows)} transcript windows segmented!")
+
+    # reduce: 주제 수가 topic_num 이 되도록 인접한 그룹을 병합
+    return finish_segmentation(ranges, text_segments, topic_num)
 
 def seconds2hmd(x:float) -> str:
     """
@@ -136,7 +360,7 @@ def seconds2hmd(x:float) -> str:
 
     return time_format
 
-def extract_image_frames(topic_start_end_info:dict, transcript_segments:list, img_folder_path:str, video_path:str, number_pic_per_topic:int=3) -> list:
+def extract_image_frames(topic_start_end_info:dict, transcript_segments:list, img_folder_path:str, video_path:str, number_pic_per_topic:int=3, mode:str="single_pass") -> list:
     """
     Extract image frames from video based on the topic start and end timestamps
     
@@ -145,39 +369,22 @@ def extract_image_frames(topic_start_end_info:dict, transcript_segments:list, im
     img_folder_path: path to save the extracted images
     video_path: path to the video file
     number_pic_per_topic: number of images to be extracted per topic
+    mode: frame extraction mode of frame_extractor.extract_frames ("single_pass", "pool" or "serial")
 
     return: list of paragraph segments
     """
 
+    # 정렬된 segment 인덱스로 모든 주제의 paragraph 를 한 번에 분리 (가장 가까운 경계로 매칭)
     paragraphs = []
-    for i, timestamp_item in enumerate(topic_start_end_info.values()):
-        s,e = timestamp_item["start"], timestamp_item["end"]
-        
-        # split segment
-        ADD_FLAG = False
-        for segment in transcript_segments:
-            if segment["start"] == s:
-                paragraphs.append([]) # 새로운 paragraph segment 생성
-                ADD_FLAG=True
-
-            if ADD_FLAG:
-                paragraphs[-1].append(segment) # segment를 담기
-
-            if segment["end"] == e: # timestamp end를 만나면 해당 루프 종료
-                break
-                
-        # format timestamp
-        s_format, e_format = seconds2hmd(s), seconds2hmd(e)
-
-        # image extraction
+    windows = []
+    for i, (paragraph, s, e) in enumerate(SegmentIndex(transcript_segments).split(topic_start_end_info)):
+        paragraphs.append(paragraph)
         cur_img_dir = os.path.join(img_folder_path, f"topic{i+1}")
-        os.makedirs(cur_img_dir, exist_ok=True) # 폴더 생성
-        
-        fps_ratio = number_pic_per_topic / round(e-s) # 예를 들어 30초 분량이라고 하면, 10초마다 1 이미지씩 생성.
-        command = f"ffmpeg -ss {s_format} -to {e_format} -i '{video_path}' -vf \"fps={fps_ratio}\" \"{cur_img_dir}/output%d.png\""
-        subprocess.run(command, shell=True)
+        windows.append((s, e, cur_img_dir))
 
-        print(f"Paragraph {i+1} sucess!")
+    # 모든 구간의 이미지를 한 번에 추출
+    extract_frames(video_path, windows, number_pic_per_topic, mode=mode)
+    print(f"{len(windows)} Paragraphs sucess!")
     return paragraphs
 
 def encode_image(image_path:str) -> str:
@@ -192,49 +399,101 @@ def encode_image(image_path:str) -> str:
   with open(image_path, "rb") as image_file:
     return base64.b64encode(image_file.read()).decode('utf-8')
 
-def make_video_summary(client, paragraphs:list, img_folder_path:str):
+def build_summary_messages(paragraph:list, cur_dir:str, preprocessor=None) -> list:
+    """
+    Build the multimodal chat messages for a single paragraph segment
+
+    paragraph: list of transcript segments of the topic
+    cur_dir: folder holding the extracted frames of the topic
+    preprocessor: optional ImagePreprocessor that downscales and recompresses the frames
+
+    return: list of chat messages
+    """
+
+    image_outputs = []
+    # output1.png, output2.png, ... 순서를 유지해야 이미지 인덱스가 파일 번호와 일치함
+    file_names = sorted((f for f in os.listdir(cur_dir) if f.endswith(".png")), key=lambda f: (len(f), f))
+    for file_name in file_names:
+        if preprocessor is not None:
+            image_outputs.append(preprocessor.image_url_part(os.path.join(cur_dir, file_name)))
+            continue
+        encoded_image = encode_image(os.path.join(cur_dir, file_name))
+        image_outputs.append({"type" : "image_url", "image_url" : {"url" : "data:image/png;base64,"+encoded_image}})
+
+    transcription = "".join([item["text"] for item in paragraph])
+    system_message = """
+        너는 비디오의 대본과 이미지를 보고 핵심을 요약하는 비서야. Json Format: {"image index" : {image index number}, "summary" : {summary text}}
+    """
+
+    user_message = f"""
+        삼중 따옴표 안에 비디오의 특정 구간의 대본 텍스트를 제공할.
+        메시지에 비디오에서 구간 별로 추출한 3개의 썸네일 이미지를 보고 입력된 순서대로 0부터 시작해서 순차적으로 이미지 인덱스를 생성해줘.
+        먼저, 비디오의 주제를 가장 잘 설명하는 이미지를 선택하고 이미지 인덱스 번호를 반환해줘.
+        다음으로, 비디오의 전체 맥락을 가장 잘 설명하는 요약본을 작성해줘. 요약은 한국어로 작성하되, 대본에서 중용한 정보는 모두 포함해줘.
+        그리고 요약본에는 반드시 대표 이미지에 대한 설명도 포함시켜줘.
+
+        \"\"\"{transcription}\"\"\"
+    """
+
+    messages = [
+        {"role": "system", "content": system_message},
+        {"role": "user", "content": [{"type" : "text", "text" : user_message}] + image_outputs}
+    ]
+    return messages
+
+def summary_request(paragraph:list, cur_dir:str, preprocessor=None) -> dict:
+    """
+    Chat request summarizing a single paragraph segment with its frames
+    """
+    model = SUMMARY_MODEL
+    max_token = 2000
+    messages = build_summary_messages(paragraph, cur_dir, preprocessor=preprocessor)
+    return build_chat_request(model, messages, max_token, is_json=True)
+
+def summarize_paragraph(client, paragraph:list, cur_dir:str, cache=None, preprocessor=None) -> dict:
+    """
+    Generate the summary of a single paragraph segment
+
+    paragraph: list of transcript segments of the topic
+    cur_dir: folder holding the extracted frames of the topic
+    cache: optional ResponseCache to reuse responses of identical requests
+    preprocessor: optional ImagePreprocessor that downscales and recompresses the frames
+
+    return: {"image index": ..., "summary": ...}
+    """
+
+    with span("video.topic_summary", topic=os.path.basename(cur_dir)):
+        response = send_chat_request(client, summary_request(paragraph, cur_dir, preprocessor=preprocessor), cache=cache)
+        return json.loads(response.choices[0].message.content)
+
+def make_video_summary(client, paragraphs:list, img_folder_path:str, cache=None, max_workers:int=1, preprocessor=None):
     """
     Generate response for each paragraph segment
     
     paragraphs: list of paragraph segments
     img_folder_path: path to the image folder
+    cache: optional ResponseCache to reuse responses of identical requests
+    max_workers: number of topics summarized concurrently (1 = one after another)
+    preprocessor: optional ImagePreprocessor that downscales and recompresses the frames
     
-    return: list of generated responses from all paragraph segments
-    """
-
-    outputs = []
-    for i in range(len(paragraphs)):
-        # 코드 추가
-        image_outputs = []
-        cur_dir = f"{img_folder_path}/topic{i+1}"
-        for file_name in os.listdir(cur_dir):
-            if file_name.endswith(".png"):
-                encoded_image = encode_image(os.path.join(cur_dir, file_name))
-                image_outputs.append({"type" : "image_url", "image_url" : {"url" : "data:image/png;base64,"+encoded_image}})
-
-        transcription = "".join([item["text"] for item in paragraphs[i]])
-        system_message = """
-            너는 비디오의 대본과 이미지를 보고 핵심을 요약하는 비서야. Json Format: {"image index" : {image index number}, "summary" : {summary text}}
-        """
-
-        user_message = f"""
-            삼중 따옴표 안에 비디오의 특정 구간의 대본 텍스트를 제공할.
-            메시지에 비디오에서 구간 별로 추출한 3개의 썸네일 이미지를 보고 입력된 순서대로 0부터 시작해서 순차적으로 이미지 인덱스를 생성해줘.
-            먼저, 비디오의 주제를 가장 잘 설명하는 이미지를 선택하고 이미지 인덱스 번호를 반환해줘.
-            다음으로, 비디오의 전체 맥락을 가장 잘 설명하는 요약본을 작성해줘. 요약은 한국어로 작성하되, 대본에서 중용한 정보는 모두 포함해줘.
-            그리고 요약본에는 반드시 대표 이미지에 대한 설명도 포함시켜줘.
-
-            \"\"\"{transcription}\"\"\"
-        """
-
-        model = "gpt-4-turbo"
-        max_token = 2000
-        messages = [
-            {"role": "system", "content": system_message},
-            {"role": "user", "content": [{"type" : "text", "text" : user_message}] + image_outputs}
-        ]
-
-        response = run_gpt(client, model, messages, max_token, is_json=True)
-        outputs.append(json.loads(response.choices[0].message.content))
-
-    return outputs
\ No newline at end of file
+    return: list of generated responses from all paragraph segments, in topic order.
+            A topic that failed is returned as {"image index": 0, "summary": "", "error": message}
+    """
+
+    def _summarize(i):
+        try:
+            return summarize_paragraph(client, paragraphs[i], f"{img_folder_path}/topic{i+1}", cache=cache, preprocessor=preprocessor)
+        except Exception as e: # 한 주제의 실패가 다른 주제의 결과를 버리지 않도록 격리
+            print(f"Paragraph {i+1} summary failed: {e}")
+            return {"image index": 0, "summary": "", "error": str(e)}
+
+    with span("video.summary", topics=len(paragraphs)) as s:
+        if max_workers <= 1 or len(paragraphs) <= 1:
+            outputs = [_summarize(i) for i in range(len(paragraphs))]
+        else:
+            # executor.map 은 입력 순서대로 결과를 돌려주므로 주제 순서가 유지됨
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                outputs = list(executor.map(propagate(_summarize), range(len(paragraphs))))
+        s.set(failed=sum(1 for output in outputs if output.get("error")))
+
+    return outputs
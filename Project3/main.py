@@ -1,7 +1,9 @@
 import os
 import streamlit as st
-from openai import OpenAI
-from gpt_tools import download_youtube, transcribe_audio, text_segmentation, extract_image_frames, make_video_summary
+from pipeline import StageExecutor, video_summary_pipeline
+from artifact_store import ArtifactStore
+from common.image_prep import default_image_preprocessor # gpt_tools 가 상위 폴더를 sys.path 에 추가함
+from common.clients import get_client
 
 
 # 사이드바 설정
@@ -9,7 +11,7 @@ with st.sidebar:
     st.sidebar.header('Sidebar')
     openai_api_key = st.text_input('API키를 입력하세요.', type="password", value="")
     if openai_api_key:
-        client = OpenAI(api_key=openai_api_key)
+        client = get_client(openai_api_key)
 
 # 메인 페이지 설정
 st.header('유튜브 영상 요약 서비스 🤖')  # Korean characters for "The title of the main page"
@@ -21,30 +23,35 @@ summarize_button = st.button('Summarize')  # 요약 버튼 # True, False
 if summarize_button:
 
     folder_path = "./data"
-    raw_data_path = folder_path + "/raw_data"
 
-    # 데이터 삭제
-    os.system(f"rm -rf {folder_path}/*")
+    # 단계별 결과(전사, 주제 분할, 프레임, 주제별 요약)는 영상별로 저장해 두고 다시 실행하면 없는 단계부터 이어서 실행
+    # 오래 사용하지 않은 결과만 정리
+    store = ArtifactStore(os.path.join(folder_path, "artifacts"))
+    store.gc()
 
     with st.spinner('영상 요약 중... 🚀'):
-        ## gpt tools 코드를 이용하여 요약 작업을 수행 ## 
-        # 1. 유튜브 영상 다운로드
-        download_youtube(youtube_url=url, output_path=raw_data_path)
-        # 2. 오디오를 텍스트로 변환(전사)
-        text_segments = transcribe_audio(client, os.path.join(raw_data_path, "audio.m4a"))
-        # 3. 텍스트 세그먼트로 나누기
-        segment_info = text_segmentation(client, topic_num=summary_number, text_segments=text_segments)
-        # 4. 비디오에서 이미지 프레임을 추출
-        paragraphs = extract_image_frames(topic_start_end_info=segment_info, transcript_segments=text_segments, img_folder_path=folder_path, video_path=os.path.join(raw_data_path, "video.mp4"))
-        # 5. 비디오 요약
-        outputs = make_video_summary(client, paragraphs=paragraphs, img_folder_path=folder_path)
+        ## 다운로드 -> 전사 -> 세그먼트 -> 이미지 추출 -> 요약 단계를 겹쳐서 실행 ##
+        # 오디오가 받아지면 바로 전사를 시작하고, 주제별로 이미지가 추출되는 대로 요약을 시작함
+        # 요약이 끝난 주제부터 순서대로 화면에 출력
+        # 중간 단계에서 오류가 나도 단계별 thread pool 은 정리됨
+        with StageExecutor() as executor:
+            # 인코딩 캐시는 실행 간에 공유하고, 절약량은 실행 전후 stats 의 차이로 계산 (동시에 실행한 다른 세션의 몫이 섞일 수 있음)
+            preprocessor = default_image_preprocessor()
+            image_stats_before = preprocessor.stats()
+            topics = video_summary_pipeline(client, youtube_url=url, folder_path=folder_path, topic_num=summary_number, preprocessor=preprocessor, executor=executor, store=store)
+            for idx, _, output in topics:
+                if output.get("error"):
+                    st.error(f'주제 {idx+1} 요약 실패: {output["error"]}')
+                    continue
+                gpt_pick_img_index = int(output["image index"])+1
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.image(os.path.join(output["frame_dir"], f"output{gpt_pick_img_index}.png"), caption=f'주제 {idx+1}')
+                with col2:
+                    st.write(output["summary"])
         ########################################
-    
-    # 요약 결과 출력
-    for idx, output in enumerate(outputs):
-        gpt_pick_img_index = int(output["image index"])+1
-        col1, col2 = st.columns(2)
-        with col1:
-            st.image(os.path.join(folder_path, f"topic{idx+1}", f"output{gpt_pick_img_index}.png"), caption=f'주제 {idx+1}')
-        with col2:
-            st.write(output["summary"])
+
+    image_stats = {key: value - image_stats_before[key] for key, value in preprocessor.stats().items()}
+    st.caption(f"이미지 전처리: {image_stats['bytes_saved']/1024:.0f}KB, 약 {image_stats['tokens_saved']} image tokens 절약")
+    st.caption(f"저장된 결과 재사용: {store.stats()['hits']}개, 새로 계산: {store.stats()['misses']}개")
+    st.caption("단계별 소요 시간: " + ", ".join(f"{stage} {stats['wall_seconds']:.1f}s" for stage, stats in executor.stats().items()))
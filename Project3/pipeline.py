@@ -0,0 +1,264 @@
+import os
+import sys
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from gpt_tools import (MEDIA_FORMATS, SEGMENTATION_MODEL, SUMMARY_MODEL, TRANSCRIPTION_MODEL, download_media, summarize_paragraph,
+                       text_segmentation, transcribe_audio)
+from frame_extractor import extract_frames
+from segment_index import SegmentIndex
+from artifact_store import ArtifactStore, data_digest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.tracing import span, propagate
+
+DEFAULT_LIMITS = {
+    "download": 2,
+    "transcribe": 2,
+    "segment": 1,
+    "frames": max(1, (os.cpu_count() or 2) // 2),
+    "summary": 4,
+}
+
+class StageExecutor:
+    """
+    Runs tasks in named stages, each with its own worker pool and bounded queue
+
+    submit() blocks once a stage holds workers + queue_size tasks, so a fast stage
+    cannot pile up work in front of a slow one (backpressure). then() starts a task
+    in the next stage as soon as the tasks it depends on are done.
+    """
+
+    def __init__(self, limits:dict=None, queue_size:int=2):
+        """
+        limits: {stage name: number of workers} (DEFAULT_LIMITS for missing stages)
+        queue_size: tasks waiting per stage before submit() blocks
+        """
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.queue_size = queue_size
+        self._pools = {}
+        self._slots = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _stage(self, stage:str) -> tuple:
+        with self._lock:
+            if stage not in self._pools:
+                workers = self.limits.get(stage, 1)
+                self._pools[stage] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"stage-{stage}")
+                self._slots[stage] = threading.BoundedSemaphore(workers + self.queue_size)
+                self._stats[stage] = {"tasks": 0, "errors": 0, "busy_seconds": 0.0, "queue_seconds": 0.0, "first_start": None, "last_end": None}
+            return self._pools[stage], self._slots[stage], self._stats[stage]
+
+    def submit(self, stage:str, fn, *args, **kwargs) -> Future:
+        """
+        Run fn(*args, **kwargs) in the stage, blocking while the stage queue is full
+        """
+        pool, slots, stats = self._stage(stage)
+        slots.acquire()
+        queued = time.perf_counter()
+
+        def _task():
+            started = time.perf_counter()
+            try:
+                with span(f"stage.{stage}", queue_ms=round((started - queued) * 1000, 3)):
+                    return fn(*args, **kwargs)
+            except BaseException:
+                with self._lock:
+                    stats["errors"] += 1
+                raise
+            finally:
+                ended = time.perf_counter()
+                with self._lock:
+                    stats["tasks"] += 1
+                    stats["busy_seconds"] += ended - started
+                    stats["queue_seconds"] += started - queued
+                    stats["first_start"] = started if stats["first_start"] is None else min(stats["first_start"], started)
+                    stats["last_end"] = ended if stats["last_end"] is None else max(stats["last_end"], ended)
+                slots.release()
+
+        try:
+            return pool.submit(propagate(_task))
+        except BaseException:
+            slots.release()
+            raise
+
+    def then(self, futures, stage:str, fn) -> Future:
+        """
+        Run fn(*results) in the stage once every future in futures is done
+
+        futures: a Future or a list of Futures
+        return: Future of fn's result (fails with the first dependency error)
+        """
+        futures = [futures] if isinstance(futures, Future) else list(futures)
+        out = Future()
+        remaining = [len(futures)]
+        lock = threading.Lock()
+
+        def _resolve(task):
+            error = task.exception()
+            if error is not None:
+                out.set_exception(error)
+            else:
+                out.set_result(task.result())
+
+        def _ready(_):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0] or out.done():
+                    return
+            error = next((f.exception() for f in futures if f.exception() is not None), None)
+            if error is not None:
+                out.set_exception(error)
+                return
+            try:
+                self.submit(stage, fn, *[f.result() for f in futures]).add_done_callback(_resolve)
+            except BaseException as e:
+                out.set_exception(e)
+
+        for future in futures:
+            future.add_done_callback(_ready)
+        return out
+
+    def stats(self) -> dict:
+        """
+        Per stage task count, errors, busy/queue seconds and active wall time
+        """
+        with self._lock:
+            output = {}
+            for stage, stats in self._stats.items():
+                wall = (stats["last_end"] - stats["first_start"]) if stats["last_end"] is not None else 0.0
+                output[stage] = {"tasks": stats["tasks"], "errors": stats["errors"], "busy_seconds": round(stats["busy_seconds"], 3),
+                                 "queue_seconds": round(stats["queue_seconds"], 3), "wall_seconds": round(wall, 3)}
+            return output
+
+    def shutdown(self, wait:bool=True) -> None:
+        for pool in list(self._pools.values()):
+            pool.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.shutdown(wait=exc_type is None)
+        return False
+
+def _resolved(value) -> Future:
+    future = Future()
+    future.set_result(value)
+    return future
+
+def _preprocessor_params(preprocessor) -> dict:
+    if preprocessor is None:
+        return None
+    return {"detail": preprocessor.detail, "max_dim": preprocessor.max_dim, "format": preprocessor.image_format, "quality": preprocessor.quality}
+
+def video_summary_pipeline(client, youtube_url:str, folder_path:str, topic_num:int, number_pic_per_topic:int=3, limits:dict=None, queue_size:int=2, cache=None, preprocessor=None, use_cache:bool=True, executor:StageExecutor=None, store:ArtifactStore=None):
+    """
+    Summarize a youtube video with overlapping stages
+
+    The audio and the video are downloaded at the same time and transcription starts as soon as
+    the audio lands. After segmentation every topic gets its own frame extraction task, and the
+    summary of topic i starts as soon as its frames exist while later topics are still extracted.
+
+    With a store, the transcript, the segmentation, the frames of every topic window and every
+    topic summary are kept as artifacts and a rerun only computes what is missing or invalid:
+    a failed last topic is retried alone, and a new topic_num reuses the transcript (and the
+    frames of unchanged windows). Media is downloaded only when a stage still needs it.
+
+    client: OpenAI client
+    youtube_url: youtube video url
+    folder_path: folder for raw_data/ and the topic{i}/ frame folders (unused with a store)
+    topic_num: number of topics to be segmented
+    number_pic_per_topic: number of frames per topic
+    limits: {stage: workers} for "download", "transcribe", "segment", "frames", "summary"
+    queue_size: tasks waiting per stage before the previous stage is held back
+    cache: optional ResponseCache to reuse responses of identical requests
+    preprocessor: optional ImagePreprocessor that downscales and recompresses the frames
+    use_cache: reuse previous downloads of the same video
+    executor: optional StageExecutor shared by several videos (its stats() then covers all of them)
+    store: optional ArtifactStore keeping the stage outputs between runs
+
+    yield: (topic index, paragraph, response) in topic order, each as soon as it is ready.
+           The response has a "frame_dir" with the output{n}.png frames of the topic.
+           A topic that failed is returned as {"image index": 0, "summary": "", "error": message}
+    """
+    raw_data_path = os.path.join(store.run_dir(youtube_url) if store is not None else folder_path, "raw_data")
+    own_executor = executor is None
+    executor = executor or StageExecutor(limits, queue_size)
+    video = []
+
+    def _video() -> Future:
+        # 프레임 artifact 가 모두 있으면 영상을 받지 않음
+        if not video:
+            video.append(executor.submit("download", download_media, youtube_url, "video", raw_data_path, use_cache))
+        return video[0]
+
+    def _transcribe(audio_path):
+        text_segments = transcribe_audio(client, audio_path)
+        if store is None:
+            return text_segments
+        store.save_json(youtube_url, "transcript", transcript_params, text_segments)
+        return store.load_json(youtube_url, "transcript", transcript_params) # 저장된 것과 같은 형태로 이후 단계에 전달
+
+    def _segment(text_segments):
+        compute = lambda: text_segmentation(client, topic_num=topic_num, text_segments=text_segments, cache=cache)
+        if store is None:
+            return compute()
+        params = {"model": SEGMENTATION_MODEL, "topic_num": topic_num, "transcript": data_digest(text_segments)}
+        return store.cached_json(youtube_url, "segments", params, compute)
+
+    def _frames_params(s, e):
+        return {"start": s, "end": e, "frames": number_pic_per_topic, "format": MEDIA_FORMATS["video"][0]}
+
+    def _frames(video_path, s, e, cur_dir):
+        if store is None:
+            extract_frames(video_path, [(s, e, cur_dir)], number_pic_per_topic, mode="serial")
+            return {"path": cur_dir, "digest": None}
+        with store.create(youtube_url, "frames", _frames_params(s, e)) as artifact:
+            extract_frames(video_path, [(s, e, artifact["path"])], number_pic_per_topic, mode="serial")
+        return artifact["manifest"]
+
+    def _summarize(frames, paragraph):
+        compute = lambda: summarize_paragraph(client, paragraph, frames["path"], cache=cache, preprocessor=preprocessor)
+        if store is None:
+            output = compute()
+        else:
+            params = {"model": SUMMARY_MODEL, "paragraph": data_digest(paragraph), "frames": frames["digest"], "preprocessor": _preprocessor_params(preprocessor)}
+            output = store.cached_json(youtube_url, "summary", params, compute)
+        return {**output, "frame_dir": frames["path"]}
+
+    transcript_params = {"model": TRANSCRIPTION_MODEL, "format": MEDIA_FORMATS["audio"][0]}
+    try:
+        text_segments = store.load_json(youtube_url, "transcript", transcript_params) if store is not None else None
+        if text_segments is None:
+            audio = executor.submit("download", download_media, youtube_url, "audio", raw_data_path, use_cache)
+            _video()
+            transcript = executor.then(audio, "transcribe", _transcribe)
+        else:
+            transcript = _resolved(text_segments)
+        segments = executor.then(transcript, "segment", _segment)
+
+        text_segments, segment_info = transcript.result(), segments.result()
+        topics = SegmentIndex(text_segments).split(segment_info)
+
+        summaries = []
+        for i, (paragraph, s, e) in enumerate(topics):
+            cur_dir = os.path.join(folder_path, f"topic{i+1}")
+            stored = store.get(youtube_url, "frames", _frames_params(s, e)) if store is not None else None
+            if stored is not None:
+                frames = _resolved(stored)
+            else:
+                frames = executor.then(_video(), "frames", lambda video_path, s=s, e=e, cur_dir=cur_dir: _frames(video_path, s, e, cur_dir))
+            summaries.append(executor.then(frames, "summary", lambda frames, paragraph=paragraph: _summarize(frames, paragraph)))
+
+        for i, ((paragraph, _, _), summary) in enumerate(zip(topics, summaries)):
+            try:
+                output = summary.result()
+            except Exception as e: # 한 주제의 실패가 다른 주제의 결과를 버리지 않도록 격리
+                print(f"Paragraph {i+1} summary failed: {e}")
+                output = {"image index": 0, "summary": "", "error": str(e)}
+            yield i, paragraph, output
+    finally:
+        if own_executor:
+            executor.shutdown(wait=False)
@@ -0,0 +1,65 @@
+from bisect import bisect_left
+
+class SegmentIndex:
+    """
+    Sorted start/end index over whisper transcript segments
+
+    Topic boundaries returned by the model are matched to the nearest segment start/end
+    with a binary search instead of exact float equality, so slightly different timestamps
+    still map to a paragraph.
+    """
+
+    def __init__(self, transcript_segments:list):
+        self.segments = sorted(transcript_segments, key=lambda x: (x["start"], x["end"]))
+        self.starts = [x["start"] for x in self.segments]
+        self.ends = [x["end"] for x in self.segments]
+        # segment 끼리 겹칠 수 있으므로 end 는 별도로 정렬해 둠
+        self._end_order = sorted(range(len(self.ends)), key=lambda i: self.ends[i])
+        self._sorted_ends = [self.ends[i] for i in self._end_order]
+
+    def __len__(self):
+        return len(self.segments)
+
+    @staticmethod
+    def _nearest(values:list, x:float) -> int:
+        i = bisect_left(values, x)
+        if i == 0:
+            return 0
+        if i == len(values):
+            return len(values) - 1
+        return i if values[i] - x < x - values[i - 1] else i - 1
+
+    def nearest_start(self, x:float) -> int:
+        """
+        Index of the segment whose start is closest to x
+        """
+        return self._nearest(self.starts, x)
+
+    def nearest_end(self, x:float) -> int:
+        """
+        Index of the segment whose end is closest to x
+        """
+        return self._end_order[self._nearest(self._sorted_ends, x)]
+
+    def split(self, topic_start_end_info:dict, tolerance:float=2.0) -> list:
+        """
+        Split the transcript into one paragraph per topic
+
+        topic_start_end_info: dict of topic groups with start and end timestamps
+        tolerance: distance in seconds above which a boundary is reported as a loose match
+
+        return: list of (paragraph segments, start, end) per topic, in topic order
+        """
+        outputs = []
+        if not self.segments:
+            return [([], item["start"], item["end"]) for item in topic_start_end_info.values()]
+
+        for i, item in enumerate(topic_start_end_info.values()):
+            s, e = float(item["start"]), float(item["end"])
+            si, ei = self.nearest_start(s), self.nearest_end(e)
+            if ei < si:
+                si, ei = ei, si
+            if abs(self.starts[si] - s) > tolerance or abs(self.ends[ei] - e) > tolerance:
+                print(f"Paragraph {i+1}: boundary ({s}, {e}) matched loosely to ({self.starts[si]}, {self.ends[ei]})")
+            outputs.append((self.segments[si:ei + 1], self.starts[si], self.ends[ei]))
+        return outputs
@@ -0,0 +1,232 @@
+"""
+End-to-end benchmarks against the local stand-in server
+
+    $ python benchmarks/bench_e2e.py --scenario all --iterations 20 --concurrency 4
+
+Scenarios
+    news       Project1 run_news_summary (routing call, news fetch, streamed summary)
+    service    the same prompts through the Project1 asyncio NewsService (coalesced fetches
+               and summary streams, admission control); --prompt sends one prompt from every user
+    assistant  Project2 thread / message / streamed run / incremental message fetch
+    video      Project3 download_youtube -> transcribe_audio -> text_segmentation
+               -> extract_image_frames -> make_video_summary (needs ffmpeg and yt-dlp);
+               --video-mode pipeline runs the overlapping stage pipeline instead
+
+Each scenario reports latency percentiles (p50/p90/p99), mean, errors and throughput.
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from common.standin_server import start_standin_server
+from common.tracing import Tracer, set_tracer
+
+def percentile(values:list, q:float) -> float:
+    values = sorted(values)
+    if not values:
+        return float("nan")
+    k = (len(values) - 1) * q
+    lower = int(k)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (k - lower)
+
+def run_load(name:str, task, iterations:int, concurrency:int) -> dict:
+    """
+    Run task(i) iterations times with concurrency workers and report latencies
+    """
+    latencies, errors = [], []
+
+    def _one(i):
+        start = time.perf_counter()
+        try:
+            task(i)
+            latencies.append(time.perf_counter() - start)
+        except Exception as e:
+            errors.append(repr(e))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(_one, range(iterations)))
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "scenario": name,
+        "n": len(latencies),
+        "errors": len(errors),
+        "p50": percentile(latencies, 0.5),
+        "p90": percentile(latencies, 0.9),
+        "p99": percentile(latencies, 0.99),
+        "mean": sum(latencies) / len(latencies) if latencies else float("nan"),
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+    }
+    if errors:
+        print(f"[{name}] first error: {errors[0]}")
+    return report
+
+NEWS_PROMPTS = ["IT 뉴스 한국어로 알려줘", "business news in english", "오늘 스포츠 소식", "korean tech news", "과학 뉴스 영어로"]
+
+def news_scenario(client, base_url:str, cold:bool, prompt:str=None):
+    os.environ["RAPIDAPI_NEWS_URL"] = base_url + "/google-news"
+    os.environ["SLACK_API_URL"] = base_url + "/slack/api"
+    sys.path.append(os.path.join(ROOT, "Project1"))
+    import gpt_helper
+
+    prompts = [prompt] if prompt else NEWS_PROMPTS
+
+    def task(i):
+        if cold:
+            gpt_helper.news_feed_cache.invalidate()
+        prompt = prompts[i % len(prompts)]
+        messages = [{"role": "assistant", "content": "안녕하세요!"}, {"role": "user", "content": prompt}]
+        for _ in gpt_helper.run_news_summary(client, prompt, messages):
+            pass
+    return task
+
+def service_scenario(client, base_url:str, cold:bool, prompt:str=None, max_inflight:int=64, max_queue:int=256):
+    os.environ["RAPIDAPI_NEWS_URL"] = base_url + "/google-news"
+    os.environ["SLACK_API_URL"] = base_url + "/slack/api"
+    sys.path.append(os.path.join(ROOT, "Project1"))
+    import gpt_helper
+    from memory_helper import ConversationMemory
+    from news_service import NewsService
+
+    prompts = [prompt] if prompt else NEWS_PROMPTS
+    service = NewsService(client, max_inflight=max_inflight, max_queue=max_queue)
+
+    def task(i):
+        if cold:
+            gpt_helper.news_feed_cache.invalidate()
+        memory = ConversationMemory.from_messages([{"role": "assistant", "content": "안녕하세요!"}])
+        for _ in service.stream(prompts[i % len(prompts)], memory):
+            pass
+    task.service = service
+    return task
+
+def assistant_scenario(client):
+    sys.path.append(os.path.join(ROOT, "Project2"))
+    import assistant_helper
+    from message_cache import ThreadMessageCache
+
+    assistant_id = next(iter(assistant_helper.list_assistants(client).values()))
+
+    def task(i):
+        thread = assistant_helper.create_thread(client)
+        cache = ThreadMessageCache(client, thread.id)
+        for question in ("안녕?", "오늘 날씨 어때?"):
+            assistant_helper.add_message(client, thread, question)
+            for _ in assistant_helper.run_and_stream(client, assistant_id, thread):
+                pass
+            cache.refresh()
+    return task
+
+def make_sample_video(path:str, duration:int) -> None:
+    command = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+               "-f", "lavfi", "-i", f"testsrc=duration={duration}:size=640x360:rate=25",
+               "-f", "lavfi", "-i", f"sine=frequency=440:duration={duration}",
+               "-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac", "-shortest", path]
+    subprocess.run(command, check=True)
+
+def video_scenario(client, base_url:str, work_dir:str, topics:int, mode:str="sequential"):
+    sys.path.append(os.path.join(ROOT, "Project3"))
+    import gpt_tools
+    import pipeline
+
+    def pipelined(i):
+        folder_path = os.path.join(work_dir, f"run{i}")
+        for _, _, output in pipeline.video_summary_pipeline(client, base_url + "/media/sample.mp4", folder_path, topics, use_cache=False):
+            if output.get("error"):
+                raise RuntimeError(output["error"])
+
+    def task(i):
+        folder_path = os.path.join(work_dir, f"run{i}")
+        raw_data_path = os.path.join(folder_path, "raw_data")
+        gpt_tools.download_youtube(base_url + "/media/sample.mp4", output_path=raw_data_path, use_cache=False)
+        text_segments = gpt_tools.transcribe_audio(client, os.path.join(raw_data_path, "audio.m4a"))
+        segment_info = gpt_tools.text_segmentation(client, topic_num=topics, text_segments=text_segments)
+        paragraphs = gpt_tools.extract_image_frames(segment_info, text_segments, folder_path, os.path.join(raw_data_path, "video.mp4"))
+        outputs = gpt_tools.make_video_summary(client, paragraphs, folder_path, max_workers=4)
+        errors = [output["error"] for output in outputs if output.get("error")]
+        if errors:
+            raise RuntimeError(errors[0])
+    return pipelined if mode == "pipeline" else task
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", choices=["news", "service", "assistant", "video", "all"], default="all")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.2, help="stand-in latency per request (s)")
+    parser.add_argument("--token-rate", type=float, default=200, help="stand-in generated tokens per second")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--cold", action="store_true", help="invalidate the news cache before every news request")
+    parser.add_argument("--prompt", help="send this prompt from every news/service user (default: five different prompts)")
+    parser.add_argument("--max-inflight", type=int, default=64, help="service scenario: requests answered at the same time")
+    parser.add_argument("--max-queue", type=int, default=256, help="service scenario: requests waiting before ServiceBusy")
+    parser.add_argument("--video-duration", type=int, default=120)
+    parser.add_argument("--topics", type=int, default=3)
+    parser.add_argument("--video-mode", choices=["sequential", "pipeline"], default="sequential")
+    parser.add_argument("--trace", help="write spans to this JSONL file and print per-stage metrics")
+    args = parser.parse_args()
+    tracer = Tracer(args.trace) if args.trace else None
+    if tracer is not None:
+        set_tracer(tracer)
+
+    from openai import OpenAI
+
+    work_dir = tempfile.mkdtemp(prefix="bench_e2e_")
+    scenarios = ["news", "service", "assistant", "video"] if args.scenario == "all" else [args.scenario]
+    server = start_standin_server(latency=args.latency, token_rate=args.token_rate, error_rate=args.error_rate,
+                                  rate_limit_rate=args.rate_limit_rate, media_dir=work_dir)
+    client = OpenAI(base_url=server.base_url + "/v1", api_key="standin")
+    try:
+        reports = []
+        for scenario in scenarios:
+            if scenario == "news":
+                task = news_scenario(client, server.base_url, args.cold, args.prompt)
+            elif scenario == "service":
+                task = service_scenario(client, server.base_url, args.cold, args.prompt, args.max_inflight, args.max_queue)
+            elif scenario == "assistant":
+                task = assistant_scenario(client)
+            else:
+                if shutil.which("ffmpeg") is None:
+                    print("[video] skipped: ffmpeg not found")
+                    continue
+                try:
+                    import yt_dlp # noqa: F401
+                except ImportError:
+                    print("[video] skipped: yt-dlp not installed")
+                    continue
+                make_sample_video(os.path.join(work_dir, "sample.mp4"), args.video_duration)
+                task = video_scenario(client, server.base_url, work_dir, args.topics, args.video_mode)
+            counters = dict(server.state.counters)
+            reports.append(run_load(scenario, task, args.iterations, args.concurrency))
+            upstream = {k: v - counters.get(k, 0) for k, v in server.state.counters.items() if v != counters.get(k, 0)}
+            print(f"[{scenario}] upstream requests: {upstream}")
+            if hasattr(task, "service"):
+                print(f"[{scenario}] service: {task.service.stats()}")
+                task.service.close()
+
+        print(f"\n{'scenario':<10}{'n':>5}{'err':>5}{'p50':>8}{'p90':>8}{'p99':>8}{'mean':>8}{'req/s':>8}")
+        for r in reports:
+            print(f"{r['scenario']:<10}{r['n']:>5}{r['errors']:>5}{r['p50']:>8.2f}{r['p90']:>8.2f}{r['p99']:>8.2f}{r['mean']:>8.2f}{r['throughput']:>8.2f}")
+        print(f"\nstand-in requests: {server.state.counters}")
+        if tracer is not None:
+            print(f"\n{'span':<24}{'count':>7}{'err':>5}{'mean':>8}  tokens / bytes / cache")
+            for name, metric in sorted(tracer.metrics().items()):
+                extra = {k: v for k, v in metric.items() if k not in ("count", "errors", "seconds") and v}
+                print(f"{name:<24}{metric['count']:>7}{metric['errors']:>5}{metric['seconds'] / metric['count']:>8.3f}  {extra}")
+            tracer.close()
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
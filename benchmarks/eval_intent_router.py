@@ -0,0 +1,134 @@
+"""
+Accuracy and latency of the Project1 local intent router on a labeled prompt set
+
+    $ python benchmarks/eval_intent_router.py --threshold 0.75 --standin
+
+Every line of the prompt set is {"prompt", "intent": "news" | "slack" | "none", "calls"}
+where calls lists the expected [category, language_location] pairs (or ["send_message_to_slack"]).
+
+Reported
+    coverage   share of prompts routed locally (the rest falls back to GPT tool calling)
+    accuracy   share of local decisions whose calls equal the label exactly
+    wrong      local decisions that differ from the label (the costly mistakes)
+    latency    router time per prompt; with --standin also the GPT routing call it replaces
+    residual   prompt pairs over the same feed that must (or must not) share a cached summary
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "Project1"))
+from intent_router import IntentRouter
+from bench_e2e import percentile
+
+LAST_SUMMARY = "오늘의 뉴스 요약입니다."
+
+# (prompt, prompt, 같은 요약을 써도 되는지) - 같은 카테고리/언어로 라우팅되는 프롬프트 쌍
+SUMMARY_PAIRS = [
+    ("IT 뉴스 한국어로", "korean tech news", True),
+    ("IT 뉴스 한국어로", "기술 소식 알려줘", True),
+    ("손흥민 소식 알려줘", "손흥민 뉴스", True),
+    ("손흥민 소식 알려줘", "야구 뉴스 알려줘", False),
+    ("오늘 주식 뉴스", "부동산 뉴스", False),
+    ("IT 뉴스 한국어로", "반도체 뉴스", False),
+    ("IT 뉴스 한국어로", "IT 뉴스 세 줄로 짧게", False),
+]
+
+def load_prompts(path:str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def decision(route) -> list:
+    calls = []
+    for name, arguments in route.calls:
+        calls.append(["send_message_to_slack"] if name == "send_message_to_slack" else [arguments["category"], arguments["language_location"]])
+    return sorted(calls)
+
+def evaluate(router:IntentRouter, samples:list, repeat:int) -> dict:
+    local, correct, wrong, latencies = 0, 0, [], []
+    for sample in samples:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            route = router.route(sample["prompt"], LAST_SUMMARY)
+            latencies.append(time.perf_counter() - start)
+        if not router.confident(route):
+            continue
+        local += 1
+        if sample["intent"] != "none" and decision(route) == sorted(sample["calls"]):
+            correct += 1
+        else:
+            wrong.append((sample["prompt"], sample["calls"], decision(route), route.confidence))
+    return {"n": len(samples), "local": local, "correct": correct, "wrong": wrong, "latencies": latencies}
+
+def summary_pair_errors(router:IntentRouter) -> list:
+    """
+    Pairs where the semantic cache would share (or split) a summary against the label
+    """
+    from semantic_cache import SemanticCache
+    errors = []
+    for first, second, shared in SUMMARY_PAIRS:
+        cache = SemanticCache(normalize=router.residual, max_entries=4)
+        feeds = [("any", "ko-KR", "v1")]
+        cache.set(first, feeds, ["summary"])
+        if (cache.get(second, feeds) is not None) != shared:
+            errors.append((first, second, shared))
+    return errors
+
+def llm_routing_latency(samples:list, iterations:int, latency:float) -> list:
+    """
+    Latency of the GPT function selection call on the stand-in server
+    """
+    from openai import OpenAI
+    from common.standin_server import start_standin_server
+    import gpt_helper
+    from memory_helper import ConversationMemory
+
+    server = start_standin_server(latency=latency)
+    client = OpenAI(base_url=server.base_url + "/v1", api_key="standin")
+    try:
+        latencies = []
+        for i in range(iterations):
+            prompt = samples[i % len(samples)]["prompt"]
+            memory = ConversationMemory.from_messages([{"role": "assistant", "content": LAST_SUMMARY}])
+            start = time.perf_counter()
+            gpt_helper.select_functions(client, f"{prompt} #{i}", memory) # 응답 캐시를 피하도록 매번 다른 프롬프트
+            latencies.append(time.perf_counter() - start)
+        return latencies
+    finally:
+        server.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prompts", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_prompts.jsonl"))
+    parser.add_argument("--threshold", type=float, default=0.75)
+    parser.add_argument("--repeat", type=int, default=100, help="routes per prompt for the latency numbers")
+    parser.add_argument("--standin", action="store_true", help="also time the GPT routing call on the stand-in server")
+    parser.add_argument("--latency", type=float, default=0.2, help="stand-in latency per request (s)")
+    args = parser.parse_args()
+
+    samples = load_prompts(args.prompts)
+    report = evaluate(IntentRouter(threshold=args.threshold), samples, args.repeat)
+    latencies = report["latencies"]
+
+    print(f"prompts:   {report['n']}")
+    print(f"coverage:  {report['local'] / report['n']:.1%} routed locally ({report['n'] - report['local']} fall back to GPT)")
+    print(f"accuracy:  {report['correct'] / report['local'] if report['local'] else float('nan'):.1%} of local decisions ({len(report['wrong'])} wrong)")
+    print(f"router:    p50 {percentile(latencies, 0.5) * 1e6:.1f}us  p99 {percentile(latencies, 0.99) * 1e6:.1f}us")
+    for prompt, expected, got, confidence in report["wrong"]:
+        print(f"  wrong: {prompt!r} expected {expected} got {got} (confidence {confidence:.2f})")
+
+    pair_errors = summary_pair_errors(IntentRouter(threshold=args.threshold))
+    print(f"residual:  {len(SUMMARY_PAIRS) - len(pair_errors)}/{len(SUMMARY_PAIRS)} summary sharing decisions correct")
+    for first, second, shared in pair_errors:
+        print(f"  wrong: {first!r} / {second!r} should {'share' if shared else 'not share'} a summary")
+
+    if args.standin:
+        llm = llm_routing_latency(samples, 20, args.latency)
+        print(f"gpt route: p50 {percentile(llm, 0.5) * 1e3:.1f}ms  p99 {percentile(llm, 0.99) * 1e3:.1f}ms (stand-in latency {args.latency}s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+"""
+Project1 ~ Project3 에서 함께 사용하는 공통 모듈
+"""
@@ -0,0 +1,46 @@
+import hashlib
+import threading
+
+_clients = {}
+_lock = threading.Lock()
+
+def client_key(api_key:str, base_url:str=None) -> str:
+    """
+    Key identifying an account (API key and base url) in process wide registries
+
+    The API key is hashed so registries never hold it in plain text.
+    """
+    return hashlib.sha256(f"{base_url or ''}|{api_key}".encode("utf-8")).hexdigest()
+
+def get_client(api_key:str, base_url:str=None, **kwargs):
+    """
+    Process wide OpenAI client for an API key
+
+    Streamlit reruns the whole script on every interaction; reusing one client per key
+    keeps its HTTP connection pool alive between reruns and sessions.
+
+    Args:
+        api_key: OpenAI API key
+        base_url: optional API base url (e.g. a local stand-in server)
+        kwargs: extra OpenAI client arguments used when the client is first created
+
+    Returns:
+        OpenAI: shared client object
+    """
+    from openai import OpenAI
+    key = client_key(api_key, base_url)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            client = OpenAI(api_key=api_key, base_url=base_url, **kwargs)
+            _clients[key] = client
+    return client
+
+def drop_client(api_key:str, base_url:str=None) -> None:
+    """
+    Close and forget the shared client of an API key
+    """
+    with _lock:
+        client = _clients.pop(client_key(api_key, base_url), None)
+    if client is not None:
+        client.close()
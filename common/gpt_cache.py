@@ -0,0 +1,236 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from .tracing import current_span
+
+DEFAULT_CACHE_DIR = os.environ.get("GPT_CACHE_DIR", "")
+
+def make_cache_key(request:dict) -> str:
+    """
+    Build a content-addressed key from a chat completion request
+
+    Args:
+        request: keyword arguments passed to client.chat.completions.create
+
+    Returns:
+        str: sha256 hex digest of the canonical JSON encoding of the request
+    """
+    canonical = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class ResponseCache:
+    """
+    Two tier (memory LRU + disk) cache for chat completion responses
+
+    Entries are stored as plain JSON so streamed and non-streamed responses can be replayed later.
+    The disk tier is bounded by total size and every entry expires after ttl seconds.
+    """
+
+    def __init__(self, cache_dir:str="./.cache/gpt", max_memory_items:int=128, max_disk_bytes:int=256*1024*1024, ttl:float=7*24*3600):
+        self.cache_dir = cache_dir
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key:str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def _expired(self, entry:dict) -> bool:
+        return self.ttl is not None and time.time() - entry["created"] > self.ttl
+
+    def _remember(self, key:str, entry:dict) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key:str):
+        """
+        Look up a cached entry, memory tier first
+
+        Returns:
+            dict: cached entry ({"stream", "data", "created"}) or None
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and self._expired(entry):
+                del self._memory[key]
+                entry = None
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return entry
+
+            if self.cache_dir:
+                path = self._path(key)
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        entry = json.load(f)
+                except (OSError, ValueError):
+                    entry = None
+                if entry is not None and self._expired(entry):
+                    self._remove_file(path)
+                    entry = None
+                if entry is not None:
+                    os.utime(path) # LRU 순서 갱신을 위해 mtime 업데이트
+                    self._remember(key, entry)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return entry
+
+            self.misses += 1
+            return None
+
+    def set(self, key:str, stream:bool, data) -> None:
+        """
+        Store a response payload in both tiers
+
+        Args:
+            key: cache key from make_cache_key
+            stream: whether data is a list of stream chunks
+            data: JSON serializable response (or list of chunks)
+        """
+        entry = {"stream": stream, "data": data, "created": time.time()}
+        with self._lock:
+            self._remember(key, entry)
+            if not self.cache_dir:
+                return
+            path = self._path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(size for _, _, size in self._disk_entries())
+            else:
+                self._disk_bytes += os.path.getsize(path)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict()
+
+    def _disk_entries(self) -> list:
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for file_name in files:
+                if not file_name.endswith(".json"):
+                    continue
+                path = os.path.join(root, file_name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, path, st.st_size))
+        return entries
+
+    def _remove_file(self, path:str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        # 만료된 항목과 가장 오래 사용되지 않은 항목부터 삭제
+        now = time.time()
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, _, size in entries)
+        for mtime, path, size in entries:
+            if total <= self.max_disk_bytes and (self.ttl is None or now - mtime <= self.ttl):
+                continue
+            self._remove_file(path)
+            total -= size
+        self._disk_bytes = total
+
+    def clear(self) -> None:
+        """
+        Remove every entry from both tiers
+        """
+        with self._lock:
+            self._memory.clear()
+            if self.cache_dir:
+                for _, path, _ in self._disk_entries():
+                    self._remove_file(path)
+            self._disk_bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Hit/miss counters of the cache
+
+        Returns:
+            dict: hits, misses, memory_hits, disk_hits, hit_rate
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+_default_cache = None
+
+def default_cache():
+    """
+    Process wide cache enabled by the GPT_CACHE_DIR environment variable
+
+    Returns:
+        ResponseCache: shared cache, or None when GPT_CACHE_DIR is not set
+    """
+    global _default_cache
+    if _default_cache is None and DEFAULT_CACHE_DIR:
+        _default_cache = ResponseCache(cache_dir=DEFAULT_CACHE_DIR)
+    return _default_cache
+
+def _replay_stream(chunks:list):
+    from openai.types.chat import ChatCompletionChunk
+    for chunk in chunks:
+        yield ChatCompletionChunk.model_validate(chunk)
+
+def _record_stream(cache:ResponseCache, key:str, response):
+    chunks = []
+    for chunk in response:
+        chunks.append(chunk.model_dump(mode="json"))
+        yield chunk
+    # 스트림을 끝까지 소비한 경우에만 저장 (중간에 끊긴 응답은 캐시하지 않음)
+    cache.set(key, True, chunks)
+
+def cached_completion(cache:ResponseCache, client, request:dict, create=None):
+    """
+    Call client.chat.completions.create through the cache
+
+    Args:
+        cache: ResponseCache object
+        client: OpenAI client object
+        request: keyword arguments for client.chat.completions.create
+        create: callable used instead of client.chat.completions.create on a miss (e.g. a rate limited client)
+
+    Returns:
+        ChatCompletion object, or a generator of ChatCompletionChunk objects when request["stream"] is True
+    """
+    key = make_cache_key(request)
+    entry = cache.get(key)
+    current_span().set(cache="hit" if entry is not None else "miss")
+    if entry is not None:
+        if entry["stream"]:
+            return _replay_stream(entry["data"])
+        from openai.types.chat import ChatCompletion
+        return ChatCompletion.model_validate(entry["data"])
+
+    response = (create or client.chat.completions.create)(**request)
+    if request.get("stream"):
+        return _record_stream(cache, key, response)
+    cache.set(key, False, response.model_dump(mode="json"))
+    return response
@@ -0,0 +1,152 @@
+import io
+import math
+import base64
+import hashlib
+import mimetypes
+import threading
+from collections import OrderedDict
+
+try:
+    from PIL import Image
+except ImportError: # Pillow 가 없으면 원본 이미지를 그대로 인코딩
+    Image = None
+
+# detail 단계별 기본 최대 변 길이 (low 는 서버에서 512x512 로 처리됨)
+DETAIL_MAX_DIM = {"low": 512, "high": 1024, "auto": 1024}
+
+def estimate_image_tokens(width:int, height:int, detail:str="high") -> int:
+    """
+    Estimated vision tokens of an image
+
+    low detail costs a flat 85 tokens. high (and auto) detail fits the image in 2048x2048,
+    scales the shortest side down to 768 and costs 170 tokens per 512px tile plus 85.
+
+    Args:
+        width, height: image size in pixels
+        detail: "low", "high" or "auto"
+
+    Returns:
+        int: estimated token count
+    """
+    if detail == "low":
+        return 85
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    return 170 * math.ceil(width / 512) * math.ceil(height / 512) + 85
+
+class ImagePreprocessor:
+    """
+    Downscale and recompress images before they are sent as data urls
+
+    Encoded payloads are cached by file hash, and the bytes and estimated
+    image tokens saved compared with sending the original file are counted.
+    """
+
+    def __init__(self, detail:str="high", max_dim:int=None, image_format:str="JPEG", quality:int=80, cache_size:int=256):
+        self.detail = detail
+        self.max_dim = max_dim or DETAIL_MAX_DIM.get(detail, 1024)
+        self.image_format = image_format.upper()
+        self.quality = quality
+        self.cache_size = cache_size
+        self.original_bytes = 0
+        self.encoded_bytes = 0
+        self.original_tokens = 0
+        self.encoded_tokens = 0
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _encode(self, data:bytes):
+        if Image is None:
+            return data, None, None, None
+        with Image.open(io.BytesIO(data)) as img:
+            size = img.size
+            img = img.convert("RGB") if self.image_format in ("JPEG", "WEBP") else img.copy()
+        img.thumbnail((self.max_dim, self.max_dim))
+        buffer = io.BytesIO()
+        img.save(buffer, format=self.image_format, quality=self.quality)
+        if img.size == size and buffer.tell() >= len(data): # 줄어들지 않으면 원본 사용
+            return data, None, size, size
+        return buffer.getvalue(), f"image/{self.image_format.lower()}", size, img.size
+
+    def encode(self, image_path:str) -> tuple:
+        """
+        Preprocess an image file
+
+        Args:
+            image_path: path to the image file
+
+        Returns:
+            tuple: (base64 payload, mime type)
+        """
+        with open(image_path, "rb") as f:
+            data = f.read()
+        key = (hashlib.sha256(data).hexdigest(), self.max_dim, self.image_format, self.quality)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+        if cached is None:
+            encoded, mime, original_size, encoded_size = self._encode(data)
+            mime = mime or mimetypes.guess_type(image_path)[0] or "image/png"
+            cached = (base64.b64encode(encoded).decode("utf-8"), mime, len(data), len(encoded), original_size, encoded_size)
+            with self._lock:
+                self.misses += 1
+                self._cache[key] = cached
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        payload, mime, original_bytes, encoded_bytes, original_size, encoded_size = cached
+        with self._lock:
+            self.original_bytes += original_bytes
+            self.encoded_bytes += encoded_bytes
+            if original_size is not None:
+                self.original_tokens += estimate_image_tokens(*original_size, "high")
+                self.encoded_tokens += estimate_image_tokens(*encoded_size, self.detail)
+        return payload, mime
+
+    def image_url_part(self, image_path:str) -> dict:
+        """
+        Chat message content part for an image file
+
+        Args:
+            image_path: path to the image file
+
+        Returns:
+            dict: {"type": "image_url", "image_url": {"url": data url, "detail": detail}}
+        """
+        payload, mime = self.encode(image_path)
+        return {"type": "image_url", "image_url": {"url": f"data:{mime};base64,{payload}", "detail": self.detail}}
+
+    def stats(self) -> dict:
+        """
+        Bytes and estimated image tokens before/after preprocessing
+
+        Returns:
+            dict: original/encoded bytes and tokens, bytes_saved, tokens_saved, cache hits/misses
+        """
+        return {
+            "original_bytes": self.original_bytes,
+            "encoded_bytes": self.encoded_bytes,
+            "bytes_saved": self.original_bytes - self.encoded_bytes,
+            "original_tokens": self.original_tokens,
+            "encoded_tokens": self.encoded_tokens,
+            "tokens_saved": self.original_tokens - self.encoded_tokens,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+_default_preprocessor = None
+
+def default_image_preprocessor() -> ImagePreprocessor:
+    """
+    Process wide ImagePreprocessor shared between requests
+    """
+    global _default_preprocessor
+    if _default_preprocessor is None:
+        _default_preprocessor = ImagePreprocessor()
+    return _default_preprocessor
@@ -0,0 +1,364 @@
+import os
+import time
+import random
+import asyncio
+import threading
+import weakref
+from .clients import client_key
+from .gpt_cache import cached_completion, make_cache_key
+from .image_prep import estimate_image_tokens
+from .tokens import count_tokens
+from .tracing import default_tracer, request_bytes, traced_completion
+
+DEFAULT_RPM = int(os.environ.get("OPENAI_RPM", "500"))
+DEFAULT_TPM = int(os.environ.get("OPENAI_TPM", "150000"))
+DEFAULT_TIMEOUT = float(os.environ.get("OPENAI_TIMEOUT", "60"))
+RETRY_STATUS = (408, 409, 429, 500, 502, 503, 504)
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at rate_per_minute
+
+    The bucket holds at most one minute of budget. A request larger than the whole
+    bucket is let through once the bucket is full, so it cannot wait forever.
+    """
+
+    def __init__(self, rate_per_minute:float, capacity:float=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now:float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount:float) -> float:
+        """
+        Take amount from the bucket if possible
+
+        Returns:
+            float: 0 when taken, otherwise seconds to wait before trying again
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self.paused_until:
+                return self.paused_until - now
+            needed = min(amount, self.capacity)
+            if self.tokens >= needed:
+                self.tokens -= amount
+                return 0.0
+            return (needed - self.tokens) / self.rate
+
+    def acquire(self, amount:float=1) -> float:
+        """
+        Block until amount is taken
+
+        Returns:
+            float: seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            wait = self.reserve(amount)
+            if wait <= 0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    async def acquire_async(self, amount:float=1) -> float:
+        """
+        acquire() for asyncio code
+        """
+        waited = 0.0
+        while True:
+            wait = self.reserve(amount)
+            if wait <= 0:
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds:float) -> None:
+        """
+        Stop handing out budget for seconds (e.g. after a 429 with Retry-After)
+        """
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+def estimate_request_tokens(request:dict) -> int:
+    """
+    Tokens a chat completion request counts against the TPM limit
+
+    The server counts the prompt plus max_tokens when the request arrives,
+    so the estimate reserves the whole completion budget.
+    """
+    model = request.get("model", "gpt-4-turbo")
+    total = 0
+    for message in request.get("messages", []):
+        total += 4 # 메시지별 role/구분자 토큰
+        content = message.get("content")
+        if isinstance(content, str):
+            total += count_tokens(content, model)
+        elif isinstance(content, list):
+            for part in content:
+                if part.get("type") == "text":
+                    total += count_tokens(part.get("text", ""), model)
+                elif part.get("type") == "image_url":
+                    detail = (part.get("image_url") or {}).get("detail", "auto")
+                    total += estimate_image_tokens(1024, 1024, detail)
+    if request.get("tools"):
+        total += count_tokens(str(request["tools"]), model)
+    return total + (request.get("max_tokens") or 0)
+
+def _retry_after(error) -> float:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError: # HTTP date 형식은 무시하고 backoff 사용
+        pass
+    return None
+
+def _is_retryable(error) -> bool:
+    import openai
+    if isinstance(error, openai.APIConnectionError): # APITimeoutError 포함
+        return True
+    return getattr(error, "status_code", None) in RETRY_STATUS
+
+class SlotStream:
+    """
+    Chunk stream that holds a concurrency slot until it is exhausted, closed or garbage collected
+    """
+
+    def __init__(self, stream, release):
+        self.stream = stream
+        self._release = release
+
+    def _done(self) -> None:
+        release, self._release = self._release, None
+        if release is not None:
+            release()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self.stream)
+        except BaseException:
+            self._done()
+            raise
+
+    def close(self) -> None:
+        self._done()
+        self.stream.close()
+
+    def __del__(self):
+        self._done()
+
+class AsyncSlotStream(SlotStream):
+    """
+    Async version of SlotStream
+    """
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self.stream.__anext__()
+        except BaseException:
+            self._done()
+            raise
+
+    async def close(self) -> None:
+        self._done()
+        await self.stream.close()
+
+    aclose = close
+
+class LLMClient:
+    """
+    Chat completion client shared by the projects
+
+    Every request waits for the requests-per-minute and tokens-per-minute buckets and a
+    concurrency slot, then is sent with retries (exponential backoff with jitter, honoring
+    Retry-After). A 429 pauses the buckets so concurrent callers back off together.
+    The underlying OpenAI clients keep their HTTP connections alive between requests.
+    """
+
+    def __init__(self, client, rpm:int=DEFAULT_RPM, tpm:int=DEFAULT_TPM, max_concurrency:int=16, max_retries:int=5, timeout:float=DEFAULT_TIMEOUT, max_backoff:float=30):
+        """
+        Args:
+            client: OpenAI client object (its connection pool is reused)
+            rpm: requests per minute allowed by the account
+            tpm: tokens per minute allowed by the account
+            max_concurrency: requests in flight at the same time
+            max_retries: retries of a failed request
+            timeout: per request timeout in seconds
+            max_backoff: upper bound of a single backoff sleep
+        """
+        # 재시도는 여기서 처리하므로 SDK 자체 재시도는 끔 (같은 connection pool 공유)
+        self.client = client.with_options(max_retries=0, timeout=timeout)
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.retries = 0
+        self.throttled_seconds = 0.0
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._async_client = None
+        self._async_slots = weakref.WeakKeyDictionary() # event loop -> asyncio.Semaphore
+
+    def _backoff(self, error, attempt:int) -> float:
+        delay = _retry_after(error)
+        if delay is None:
+            delay = min(2 ** attempt, self.max_backoff) * random.uniform(0.5, 1.0)
+        if getattr(error, "status_code", None) == 429:
+            self.requests.pause(delay)
+            self.tokens.pause(delay)
+        self.retries += 1
+        return delay
+
+    def create(self, **request):
+        """
+        client.chat.completions.create with rate limiting and retries
+
+        For streams only opening the stream is retried; the chunks are returned as they arrive
+        and the concurrency slot is held until the stream is exhausted or closed.
+        """
+        estimate = estimate_request_tokens(request)
+        for attempt in range(self.max_retries + 1):
+            self.throttled_seconds += self.requests.acquire(1) + self.tokens.acquire(estimate)
+            self._slots.acquire()
+            try:
+                response = self.client.chat.completions.create(**request)
+            except BaseException as e:
+                self._slots.release()
+                if not isinstance(e, Exception) or attempt == self.max_retries or not _is_retryable(e):
+                    raise
+                delay = self._backoff(e, attempt)
+                time.sleep(delay)
+                continue
+            if request.get("stream"):
+                return SlotStream(response, self._slots.release)
+            self._slots.release()
+            return response
+
+    def chat(self, request:dict, cache=None):
+        """
+        Run a chat completion request (traced, through the response cache when given)
+
+        Args:
+            request: keyword arguments for client.chat.completions.create
+            cache: optional ResponseCache
+
+        Returns:
+            ChatCompletion object, or a generator of ChatCompletionChunk objects when request["stream"] is True
+        """
+        if cache is not None:
+            return traced_completion(lambda **kwargs: cached_completion(cache, self.client, kwargs, create=self.create), request)
+        return traced_completion(self.create, request)
+
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            from openai import AsyncOpenAI
+            self._async_client = AsyncOpenAI(api_key=self.client.api_key, base_url=self.client.base_url, max_retries=0, timeout=self.timeout)
+        return self._async_client
+
+    def _loop_slots(self) -> asyncio.Semaphore:
+        # asyncio.Semaphore 는 이벤트 루프마다 따로 생성. 대기한 적이 있는 Semaphore 는 루프를 참조해
+        # weak key 만으로는 지워지지 않으므로 닫힌 루프의 항목도 정리
+        loop = asyncio.get_running_loop()
+        slots = self._async_slots.get(loop)
+        if slots is None:
+            for closed in [other for other in self._async_slots.keys() if other.is_closed()]:
+                self._async_slots.pop(closed, None)
+            slots = self._async_slots[loop] = asyncio.Semaphore(self.max_concurrency)
+        return slots
+
+    async def acreate(self, **request):
+        """
+        Async version of create (AsyncOpenAI client, same rate limit buckets)
+        """
+        estimate = estimate_request_tokens(request)
+        for attempt in range(self.max_retries + 1):
+            self.throttled_seconds += await self.requests.acquire_async(1) + await self.tokens.acquire_async(estimate)
+            slots = self._loop_slots()
+            await slots.acquire()
+            try:
+                response = await self.async_client.chat.completions.create(**request)
+            except BaseException as e: # 취소된 경우에도 slot 반환
+                slots.release()
+                if not isinstance(e, Exception) or attempt == self.max_retries or not _is_retryable(e):
+                    raise
+                delay = self._backoff(e, attempt)
+                await asyncio.sleep(delay)
+                continue
+            if request.get("stream"):
+                return AsyncSlotStream(response, slots.release)
+            slots.release()
+            return response
+
+    async def achat(self, request:dict, cache=None):
+        """
+        Async version of chat; the cache is used for non-streamed requests only
+        """
+        tracer = default_tracer()
+        span = tracer.span("gpt.chat", model=request.get("model"), stream=bool(request.get("stream")))
+        key = make_cache_key(request) if cache is not None and not request.get("stream") else None
+        try:
+            entry = cache.get(key) if key else None
+            if key:
+                span.set(cache="hit" if entry is not None else "miss")
+            if entry is not None:
+                from openai.types.chat import ChatCompletion
+                response = ChatCompletion.model_validate(entry["data"])
+            else:
+                response = await self.acreate(**request)
+                if tracer.enabled: # 이미지가 포함된 요청은 직렬화 비용이 있으므로 tracing 중에만 계산
+                    span.set(bytes_uploaded=request_bytes(request))
+                if key:
+                    cache.set(key, False, response.model_dump(mode="json"))
+                if not request.get("stream"):
+                    span.record_usage(response.usage)
+        except BaseException as e:
+            span.finish(e)
+            raise
+        span.finish()
+        return response
+
+    def stats(self) -> dict:
+        return {"retries": self.retries, "throttled_seconds": round(self.throttled_seconds, 3)}
+
+_llm_clients = {}
+_llm_lock = threading.Lock()
+
+def get_llm_client(client, **kwargs) -> LLMClient:
+    """
+    Process wide LLMClient of an OpenAI client's account
+
+    Rate limits belong to the API key, so every caller using the same key and
+    base url shares one set of buckets.
+
+    Args:
+        client: OpenAI client object
+        kwargs: LLMClient arguments used when the LLMClient is first created
+
+    Returns:
+        LLMClient: shared client
+    """
+    key = client_key(client.api_key, str(client.base_url))
+    with _llm_lock:
+        llm = _llm_clients.get(key)
+        if llm is None:
+            llm = _llm_clients[key] = LLMClient(client, **kwargs)
+    return llm
@@ -0,0 +1,660 @@
+"""
+Local stand-in for the OpenAI, RapidAPI google-news and Slack APIs
+
+    $ python -m common.standin_server --port 8900 --latency 0.3 --token-rate 80
+
+Point the projects at it with
+    OpenAI(base_url="http://127.0.0.1:8900/v1", api_key="test")
+    RAPIDAPI_NEWS_URL=http://127.0.0.1:8900/google-news
+    SLACK_API_URL=http://127.0.0.1:8900/slack/api
+
+Latency, token rate, response length and error injection (5xx and 429) are configurable,
+so the benchmarks measure the client code without live endpoints.
+"""
+import os
+import re
+import json
+import math
+import time
+import random
+import argparse
+import itertools
+import threading
+from email.parser import BytesParser
+from email.policy import default as email_policy
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+CATEGORY_KEYWORDS = {
+    "technology": ["tech", "it ", "기술", "테크", "ai", "인공지능", "반도체"],
+    "business": ["business", "경제", "비즈니스", "주식", "금융", "market"],
+    "entertainment": ["entertainment", "연예", "엔터", "movie", "영화", "drama"],
+    "world": ["world", "세계", "국제", "global"],
+    "health": ["health", "건강", "의료", "medical"],
+    "science": ["science", "과학", "space", "우주"],
+    "sport": ["sport", "스포츠", "축구", "야구", "football", "baseball"],
+}
+
+class StandinConfig:
+    """
+    Behaviour of the stand-in server
+
+    latency: seconds before the first byte of every response
+    jitter: random extra latency in seconds (uniform 0..jitter)
+    token_rate: generated tokens per second for completions and runs
+    response_tokens: number of tokens of a generated text response
+    error_rate: probability of a 500 response
+    rate_limit_rate: probability of a 429 response with Retry-After
+    retry_after: Retry-After seconds of injected 429 responses
+    assistants: number of assistants returned by the assistants list
+    news_items: number of news items per feed
+    media_dir: folder served under /media/
+    batch_delay: seconds a Batch API job takes from creation to completion
+    """
+
+    def __init__(self, latency:float=0.2, jitter:float=0.05, token_rate:float=100, response_tokens:int=120, error_rate:float=0.0, rate_limit_rate:float=0.0, retry_after:float=1.0, assistants:int=3, news_items:int=20, media_dir:str=None, batch_delay:float=2.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.token_rate = token_rate
+        self.response_tokens = response_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.assistants = assistants
+        self.news_items = news_items
+        self.media_dir = media_dir
+        self.batch_delay = batch_delay
+
+WORDS = "오늘 뉴스 요약 the market moved while new chips launched and researchers shared results 그리고 경기 결과 발표".split()
+
+def _words(n:int, seed:int=0) -> list:
+    rng = random.Random(seed)
+    return [rng.choice(WORDS) for _ in range(n)]
+
+def _estimate_tokens(data) -> int:
+    return max(1, len(json.dumps(data, ensure_ascii=False)) // 4)
+
+class StandinState:
+    """
+    In-memory state of the stand-in (assistants, threads, messages, runs, files, batches)
+    """
+
+    def __init__(self, config:StandinConfig):
+        self.config = config
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.assistants = [{"id": f"asst_{i}", "object": "assistant", "created_at": 1700000000 + i, "name": f"assistant-{i}", "description": None, "model": "gpt-4-turbo", "instructions": "", "tools": [], "file_ids": [], "metadata": {}} for i in range(config.assistants)]
+        self.threads = {}
+        self.runs = {}
+        self.files = {}
+        self.batches = {}
+        self.counters = {}
+
+    def new_id(self, prefix:str) -> str:
+        return f"{prefix}_{next(self.ids):06d}"
+
+    def count(self, name:str) -> None:
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + 1
+
+    def add_file(self, filename:str, purpose:str, content:bytes) -> dict:
+        file = {"id": self.new_id("file"), "object": "file", "bytes": len(content), "created_at": int(time.time()), "filename": filename, "purpose": purpose, "status": "processed", "status_details": None}
+        with self.lock:
+            self.files[file["id"]] = {**file, "content": content}
+        return file
+
+def _user_section(messages:list) -> str:
+    text = ""
+    for message in messages:
+        if message.get("role") == "user":
+            content = message.get("content")
+            if isinstance(content, list):
+                content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+            text = content or ""
+    match = re.search(r"## 유저 메시지\s*(.*?)\s*##", text, re.S)
+    return (match.group(1) if match else text).lower()
+
+def route_tool_call(messages:list) -> tuple:
+    """
+    Tool call the stand-in answers for the news chatbot routing prompt
+
+    Returns:
+        tuple: (function name, arguments)
+    """
+    text = _user_section(messages)
+    if "slack" in text or "슬랙" in text:
+        return "send_message_to_slack", {"text": "뉴스 요약본"}
+    category = next((c for c, words in CATEGORY_KEYWORDS.items() if any(w in text for w in words)), "technology")
+    language = "en-US" if any(w in text for w in ("english", "영어", "en-us", "미국")) else "ko-KR"
+    return "call_news_api", {"category": category, "language_location": language}
+
+def json_answer(messages:list, n_tokens:int) -> str:
+    """
+    JSON mode answer matching the Project3 prompts (segmentation, frame summary)
+    """
+    system = " ".join(str(m.get("content")) for m in messages if m.get("role") == "system")
+    user = _user_section(messages)
+    if "segment index" in system:
+        indices = [int(x) for x in re.findall(r"^\s*\[(\d+)\]", user, re.M)] or [0]
+        match = re.search(r"그룹 (\d+)개", user)
+        topics = max(1, min(int(match.group(1)) if match else 3, len(indices)))
+        step = len(indices) / topics
+        bounds = [indices[int(i * step)] for i in range(topics)] + [indices[-1] + 1]
+        return json.dumps({str(i): {"start": bounds[i], "end": bounds[i + 1] - 1} for i in range(topics)})
+    if "image index" in system:
+        return json.dumps({"image index": 0, "summary": " ".join(_words(n_tokens, len(user)))}, ensure_ascii=False)
+    return json.dumps({"result": " ".join(_words(n_tokens, len(user)))}, ensure_ascii=False)
+
+def chat_answer(state:StandinState, request:dict) -> tuple:
+    """
+    Assistant message the stand-in returns for a chat completion request
+
+    Returns:
+        tuple: (message, finish_reason, prompt_tokens, completion_tokens)
+    """
+    messages = request.get("messages", [])
+    n_tokens = min(state.config.response_tokens, request.get("max_tokens") or state.config.response_tokens)
+    prompt_tokens = _estimate_tokens(messages)
+    message = {"role": "assistant", "content": None}
+    finish_reason = "stop"
+    if request.get("tools"):
+        name, arguments = route_tool_call(messages)
+        message["tool_calls"] = [{"id": state.new_id("call"), "type": "function", "function": {"name": name, "arguments": json.dumps(arguments, ensure_ascii=False)}}]
+        finish_reason = "tool_calls"
+        n_tokens = _estimate_tokens(arguments)
+    elif (request.get("response_format") or {}).get("type") == "json_object":
+        message["content"] = json_answer(messages, n_tokens)
+    else:
+        message["content"] = " ".join(_words(n_tokens, prompt_tokens))
+    return message, finish_reason, prompt_tokens, n_tokens
+
+def completion_object(completion_id:str, model:str, message:dict, finish_reason:str, prompt_tokens:int, n_tokens:int) -> dict:
+    return {
+        "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": model,
+        "choices": [{"index": 0, "message": message, "finish_reason": finish_reason, "logprobs": None}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": n_tokens, "total_tokens": prompt_tokens + n_tokens},
+        "system_fingerprint": "standin",
+    }
+
+def process_batch(state:StandinState, batch_id:str) -> None:
+    """
+    Answer every line of a batch input file and publish the output / error files
+    """
+    batch = state.batches[batch_id]
+    delay = state.config.batch_delay
+    time.sleep(delay * 0.2)
+    if batch["status"] != "validating":
+        return
+    lines = [line for line in state.files[batch["input_file_id"]]["content"].decode("utf-8").splitlines() if line.strip()]
+    batch.update(status="in_progress", in_progress_at=int(time.time()), request_counts={"total": len(lines), "completed": 0, "failed": 0})
+
+    outputs, errors = [], []
+    for i, line in enumerate(lines):
+        time.sleep(delay * 0.6 / max(len(lines), 1))
+        if batch["status"] == "cancelling":
+            break
+        try:
+            item = json.loads(line)
+            custom_id = item["custom_id"]
+        except (ValueError, KeyError):
+            errors.append({"id": f"batch_req_{i}", "custom_id": None, "response": None, "error": {"code": "invalid_json", "message": f"line {i+1} is not a valid request"}})
+            batch["request_counts"]["failed"] += 1
+            continue
+        if item.get("url") != batch["endpoint"]:
+            errors.append({"id": f"batch_req_{i}", "custom_id": custom_id, "response": None, "error": {"code": "invalid_url", "message": f"url must be {batch['endpoint']}"}})
+            batch["request_counts"]["failed"] += 1
+            continue
+        body = item.get("body") or {}
+        message, finish_reason, prompt_tokens, n_tokens = chat_answer(state, body)
+        completion = completion_object(state.new_id("chatcmpl"), body.get("model", "gpt-4-turbo"), message, finish_reason, prompt_tokens, n_tokens)
+        outputs.append({"id": f"batch_req_{i}", "custom_id": custom_id, "response": {"status_code": 200, "request_id": f"req_{i}", "body": completion}, "error": None})
+        batch["request_counts"]["completed"] += 1
+
+    if batch["status"] == "cancelling":
+        batch.update(status="cancelled", cancelled_at=int(time.time()))
+    else:
+        batch.update(status="finalizing", finalizing_at=int(time.time()))
+        time.sleep(delay * 0.2)
+    for key, rows in (("output_file_id", outputs), ("error_file_id", errors)):
+        if rows:
+            content = "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows).encode("utf-8")
+            batch[key] = state.add_file(f"{batch_id}_{key[:-8]}.jsonl", "batch_output", content)["id"]
+    if batch["status"] == "finalizing":
+        batch.update(status="completed", completed_at=int(time.time()))
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "StandinServer/1.0"
+
+    @property
+    def state(self) -> StandinState:
+        return self.server.state
+
+    @property
+    def config(self) -> StandinConfig:
+        return self.server.state.config
+
+    def log_message(self, *args):
+        pass
+
+    # ---------- helpers ----------
+    def _delay(self, seconds:float=None) -> None:
+        if seconds is None:
+            seconds = self.config.latency + random.uniform(0, self.config.jitter)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def _body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _json_body(self) -> dict:
+        body = self._body()
+        try:
+            return json.loads(body) if body else {}
+        except ValueError:
+            return {}
+
+    def _send_json(self, data, status:int=200, headers:dict=None) -> None:
+        payload = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _start_sse(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+    def _sse(self, data, event:str=None) -> None:
+        chunk = (f"event: {event}\n" if event else "") + "data: " + (data if isinstance(data, str) else json.dumps(data, ensure_ascii=False)) + "\n\n"
+        self.wfile.write(chunk.encode("utf-8"))
+        self.wfile.flush()
+
+    def _inject_error(self) -> bool:
+        if random.random() >= self.config.rate_limit_rate + self.config.error_rate:
+            return False
+        self._body() # keep-alive 연결을 위해 요청 본문은 읽어서 버림
+        if random.random() < self.config.rate_limit_rate / (self.config.rate_limit_rate + self.config.error_rate):
+            self.state.count("injected_429")
+            self._send_json({"error": {"message": "Rate limit reached (stand-in)", "type": "requests", "code": "rate_limit_exceeded"}}, 429, {
+                # Retry-After 는 정수 초만 허용 (urllib3 등), 정밀한 값은 retry-after-ms 로 전달
+                "Retry-After": str(math.ceil(self.config.retry_after)),
+                "retry-after-ms": str(int(self.config.retry_after * 1000)),
+            })
+            return True
+        self.state.count("injected_500")
+        self._send_json({"error": {"message": "Internal error (stand-in)", "type": "server_error"}}, 500)
+        return True
+
+    def _not_found(self) -> None:
+        self._send_json({"error": {"message": f"unknown path {self.path}", "type": "invalid_request_error"}}, 404)
+
+    # ---------- routing ----------
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method:str) -> None:
+        url = urlparse(self.path)
+        path, query = url.path.rstrip("/"), {k: v[-1] for k, v in parse_qs(url.query).items()}
+        endpoint = re.sub(r"/(asst|thread|msg|run|file|batch)_[0-9]+", r"/{\1}", path)
+        self.state.count(f"{method} {endpoint}")
+
+        if method == "GET" and path.startswith("/media/"):
+            return self._media(path[len("/media/"):])
+        if method == "GET" and path == "/stats":
+            return self._send_json(self.state.counters)
+        if self._inject_error():
+            return
+
+        routes = [
+            ("POST", r"/v1/chat/completions", self._chat_completions),
+            ("POST", r"/v1/audio/transcriptions", self._transcriptions),
+            ("GET", r"/v1/assistants", self._list_assistants),
+            ("POST", r"/v1/threads", self._create_thread),
+            ("POST", r"/v1/threads/(thread_\d+)/messages", self._create_message),
+            ("GET", r"/v1/threads/(thread_\d+)/messages", self._list_messages),
+            ("POST", r"/v1/threads/(thread_\d+)/runs", self._create_run),
+            ("GET", r"/v1/threads/(thread_\d+)/runs/(run_\d+)", self._retrieve_run),
+            ("POST", r"/v1/threads/(thread_\d+)/runs/(run_\d+)/cancel", self._cancel_run),
+            ("POST", r"/v1/files", self._upload_file),
+            ("GET", r"/v1/files/(file_\d+)", self._retrieve_file),
+            ("GET", r"/v1/files/(file_\d+)/content", self._file_content),
+            ("POST", r"/v1/batches", self._create_batch),
+            ("GET", r"/v1/batches/(batch_\d+)", self._retrieve_batch),
+            ("POST", r"/v1/batches/(batch_\d+)/cancel", self._cancel_batch),
+            ("GET", r"/google-news/(\w+)", self._news),
+            ("POST", r"/slack/api/chat\.postMessage", self._slack),
+        ]
+        for route_method, pattern, handler in routes:
+            match = re.fullmatch(pattern, path)
+            if route_method == method and match:
+                return handler(query, *match.groups())
+        self._not_found()
+
+    # ---------- chat completions ----------
+    def _chat_completions(self, query:dict) -> None:
+        request = self._json_body()
+        model = request.get("model", "gpt-4-turbo")
+        created = int(time.time())
+        completion_id = self.state.new_id("chatcmpl")
+        self._delay()
+        message, finish_reason, prompt_tokens, n_tokens = chat_answer(self.state, request)
+
+        if request.get("stream") and message["content"] is not None:
+            self._start_sse()
+            words = message["content"].split(" ")
+            for i, word in enumerate(words):
+                chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model, "choices": [{"index": 0, "delta": {"role": "assistant", "content": word + (" " if i + 1 < len(words) else "")} if i == 0 else {"content": word + (" " if i + 1 < len(words) else "")}, "finish_reason": None}]}
+                self._sse(chunk)
+                self._delay(1 / self.config.token_rate)
+            self._sse({"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model, "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}]})
+            self._sse("[DONE]")
+            return
+
+        self._delay(n_tokens / self.config.token_rate)
+        self._send_json(completion_object(completion_id, model, message, finish_reason, prompt_tokens, n_tokens))
+
+    # ---------- audio ----------
+    def _transcriptions(self, query:dict) -> None:
+        body = self._body()
+        # 업로드 크기로 음성 길이를 추정 (약 128kbps)
+        duration = max(30.0, len(body) / 16000)
+        self._delay(self.config.latency + duration / 200)
+        segments, start, i = [], 0.0, 0
+        while start < duration:
+            end = min(start + 5.0, duration)
+            segments.append({"id": i, "seek": 0, "start": round(start, 2), "end": round(end, 2), "text": " " + " ".join(_words(8, i)), "tokens": [], "temperature": 0.0, "avg_logprob": -0.2, "compression_ratio": 1.2, "no_speech_prob": 0.01})
+            start, i = end, i + 1
+        self._send_json({"task": "transcribe", "language": "korean", "duration": duration, "text": "".join(x["text"] for x in segments), "segments": segments})
+
+    # ---------- assistants ----------
+    def _page(self, items:list, query:dict) -> dict:
+        limit = int(query.get("limit", 20))
+        if query.get("order", "desc") == "desc":
+            items = list(reversed(items))
+        if query.get("after"):
+            ids = [x["id"] for x in items]
+            items = items[ids.index(query["after"]) + 1:] if query["after"] in ids else []
+        page = items[:limit]
+        return {"object": "list", "data": page, "first_id": page[0]["id"] if page else None, "last_id": page[-1]["id"] if page else None, "has_more": len(items) > limit}
+
+    def _list_assistants(self, query:dict) -> None:
+        self._delay()
+        self._send_json(self._page(self.state.assistants, query))
+
+    def _create_thread(self, query:dict) -> None:
+        self._json_body()
+        self._delay()
+        thread_id = self.state.new_id("thread")
+        with self.state.lock:
+            self.state.threads[thread_id] = []
+        self._send_json({"id": thread_id, "object": "thread", "created_at": int(time.time()), "metadata": {}})
+
+    def _message(self, thread_id:str, role:str, text:str, run_id:str=None, assistant_id:str=None) -> dict:
+        return {"id": self.state.new_id("msg"), "object": "thread.message", "created_at": int(time.time()), "thread_id": thread_id, "role": role, "status": "completed",
+                "content": [{"type": "text", "text": {"value": text, "annotations": []}}], "assistant_id": assistant_id, "run_id": run_id, "file_ids": [], "metadata": {}}
+
+    def _create_message(self, query:dict, thread_id:str) -> None:
+        request = self._json_body()
+        self._delay()
+        if thread_id not in self.state.threads:
+            return self._not_found()
+        message = self._message(thread_id, request.get("role", "user"), request.get("content", ""))
+        with self.state.lock:
+            self.state.threads[thread_id].append(message)
+        self._send_json(message)
+
+    def _list_messages(self, query:dict, thread_id:str) -> None:
+        self._delay()
+        if thread_id not in self.state.threads:
+            return self._not_found()
+        self._complete_runs(thread_id)
+        with self.state.lock:
+            messages = list(self.state.threads[thread_id])
+        self._send_json(self._page(messages, query))
+
+    def _run_object(self, run:dict) -> dict:
+        return {key: value for key, value in run.items() if not key.startswith("_")}
+
+    def _run_status(self, run:dict) -> str:
+        if run["status"] in ("cancelled", "completed"):
+            return run["status"]
+        elapsed = time.monotonic() - run["_started"]
+        if elapsed < self.config.latency:
+            return "queued"
+        if elapsed < self.config.latency + self.config.response_tokens / self.config.token_rate:
+            return "in_progress"
+        return "completed"
+
+    def _complete_runs(self, thread_id:str) -> None:
+        with self.state.lock:
+            runs = [run for run in self.state.runs.values() if run["thread_id"] == thread_id]
+        for run in runs:
+            status = self._run_status(run)
+            if status == "completed" and run["status"] != "completed":
+                message = self._message(thread_id, "assistant", run["_text"], run["id"], run["assistant_id"])
+                with self.state.lock:
+                    self.state.threads[thread_id].append(message)
+                    run.update(status="completed", completed_at=int(time.time()))
+            elif run["status"] not in ("completed", "cancelled"):
+                run["status"] = status
+
+    def _create_run(self, query:dict, thread_id:str) -> None:
+        request = self._json_body()
+        if thread_id not in self.state.threads:
+            return self._not_found()
+        run_id = self.state.new_id("run")
+        run = {"id": run_id, "object": "thread.run", "created_at": int(time.time()), "thread_id": thread_id, "assistant_id": request.get("assistant_id"),
+               "status": "queued", "required_action": None, "last_error": None, "expires_at": None, "started_at": None, "cancelled_at": None, "failed_at": None,
+               "completed_at": None, "model": "gpt-4-turbo", "instructions": "", "tools": [], "file_ids": [], "metadata": {}, "usage": None,
+               "_started": time.monotonic(), "_text": " ".join(_words(self.config.response_tokens, len(self.state.runs)))}
+        with self.state.lock:
+            self.state.runs[run_id] = run
+
+        if not request.get("stream"):
+            self._delay()
+            return self._send_json(self._run_object(run))
+
+        self._start_sse()
+        self._sse(self._run_object(run), "thread.run.created")
+        self._delay()
+        run.update(status="in_progress", started_at=int(time.time()))
+        self._sse(self._run_object(run), "thread.run.in_progress")
+        message = self._message(thread_id, "assistant", "", run_id, run["assistant_id"])
+        message.update(status="in_progress", content=[])
+        self._sse(message, "thread.message.created")
+        words = run["_text"].split(" ")
+        for i, word in enumerate(words):
+            text = word + (" " if i + 1 < len(words) else "")
+            self._sse({"id": message["id"], "object": "thread.message.delta", "delta": {"content": [{"index": 0, "type": "text", "text": {"value": text, "annotations": []}}]}}, "thread.message.delta")
+            self._delay(1 / self.config.token_rate)
+        message.update(status="completed", content=[{"type": "text", "text": {"value": run["_text"], "annotations": []}}])
+        self._sse(message, "thread.message.completed")
+        with self.state.lock:
+            self.state.threads[thread_id].append(message)
+            run.update(status="completed", completed_at=int(time.time()))
+        self._sse(self._run_object(run), "thread.run.completed")
+        self._sse("[DONE]", "done")
+
+    def _retrieve_run(self, query:dict, thread_id:str, run_id:str) -> None:
+        self._delay(self.config.latency / 4)
+        run = self.state.runs.get(run_id)
+        if run is None:
+            return self._not_found()
+        self._complete_runs(thread_id)
+        self._send_json(self._run_object(run))
+
+    def _cancel_run(self, query:dict, thread_id:str, run_id:str) -> None:
+        self._json_body()
+        run = self.state.runs.get(run_id)
+        if run is None:
+            return self._not_found()
+        run.update(status="cancelled", cancelled_at=int(time.time()))
+        self._send_json(self._run_object(run))
+
+    # ---------- files / batches ----------
+    def _upload_file(self, query:dict) -> None:
+        body = self._body()
+        form = BytesParser(policy=email_policy).parsebytes(b"Content-Type: " + self.headers.get("Content-Type", "").encode("latin-1") + b"\r\n\r\n" + body)
+        fields, filename, content = {}, "upload", b""
+        for part in form.iter_parts():
+            name = part.get_param("name", header="content-disposition")
+            if part.get_filename():
+                filename, content = part.get_filename(), part.get_payload(decode=True) or b""
+            else:
+                fields[name] = part.get_content().strip()
+        self._delay()
+        self._send_json(self.state.add_file(filename, fields.get("purpose", "batch"), content))
+
+    def _retrieve_file(self, query:dict, file_id:str) -> None:
+        file = self.state.files.get(file_id)
+        if file is None:
+            return self._not_found()
+        self._send_json({key: value for key, value in file.items() if key != "content"})
+
+    def _file_content(self, query:dict, file_id:str) -> None:
+        file = self.state.files.get(file_id)
+        if file is None:
+            return self._not_found()
+        self._delay()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(file["content"])))
+        self.end_headers()
+        self.wfile.write(file["content"])
+
+    def _create_batch(self, query:dict) -> None:
+        request = self._json_body()
+        if request.get("input_file_id") not in self.state.files:
+            return self._send_json({"error": {"message": "input file not found", "type": "invalid_request_error"}}, 400)
+        batch_id = self.state.new_id("batch")
+        batch = {"id": batch_id, "object": "batch", "endpoint": request.get("endpoint", "/v1/chat/completions"), "errors": None, "input_file_id": request["input_file_id"],
+                 "completion_window": request.get("completion_window", "24h"), "status": "validating", "output_file_id": None, "error_file_id": None,
+                 "created_at": int(time.time()), "in_progress_at": None, "expires_at": int(time.time()) + 24 * 3600, "finalizing_at": None, "completed_at": None,
+                 "failed_at": None, "expired_at": None, "cancelling_at": None, "cancelled_at": None, "request_counts": {"total": 0, "completed": 0, "failed": 0},
+                 "metadata": request.get("metadata")}
+        with self.state.lock:
+            self.state.batches[batch_id] = batch
+        threading.Thread(target=process_batch, args=(self.state, batch_id), daemon=True).start()
+        self._delay()
+        self._send_json(dict(batch))
+
+    def _retrieve_batch(self, query:dict, batch_id:str) -> None:
+        self._delay(self.config.latency / 4)
+        batch = self.state.batches.get(batch_id)
+        if batch is None:
+            return self._not_found()
+        self._send_json(dict(batch))
+
+    def _cancel_batch(self, query:dict, batch_id:str) -> None:
+        self._json_body()
+        batch = self.state.batches.get(batch_id)
+        if batch is None:
+            return self._not_found()
+        if batch["status"] in ("validating", "in_progress"):
+            batch.update(status="cancelling", cancelling_at=int(time.time()))
+        self._send_json(dict(batch))
+
+    # ---------- RapidAPI google-news / Slack / media ----------
+    def _news(self, query:dict, category:str) -> None:
+        self._delay()
+        language = query.get("lr", "ko-KR")
+        # 같은 시간대(분)에는 같은 뉴스를 반환해서 feed version 이 유지되도록 함
+        seed = f"{category}-{language}-{int(time.time() // 60)}"
+        rng = random.Random(seed)
+        items = []
+        for i in range(self.config.news_items):
+            snippet = " ".join(rng.choice(WORDS) for _ in range(30))
+            subnews = [{"title": f"{category} sub {i}-{j}", "snippet": " ".join(rng.choice(WORDS) for _ in range(20)), "newsUrl": f"https://news.example/{category}/{i}/{j}"} for j in range(rng.randint(0, 3))]
+            items.append({"title": f"[{language}] {category} headline {i}", "snippet": snippet, "newsUrl": f"https://news.example/{category}/{i}", "hasSubnews": bool(subnews), "subnews": subnews})
+        self._send_json({"status": "success", "items": items})
+
+    def _slack(self, query:dict) -> None:
+        body = self._body().decode("utf-8", errors="ignore")
+        self._delay()
+        fields = {k: v[-1] for k, v in parse_qs(body).items()}
+        self._send_json({"ok": True, "channel": fields.get("channel", ""), "ts": f"{time.time():.6f}", "message": {"text": fields.get("text", "")[:100]}})
+
+    def _media(self, name:str) -> None:
+        if not self.config.media_dir:
+            return self._not_found()
+        path = os.path.join(self.config.media_dir, os.path.basename(name))
+        if not os.path.isfile(path):
+            return self._not_found()
+        size = os.path.getsize(path)
+        self.send_response(200)
+        self.send_header("Content-Type", "video/mp4" if path.endswith(".mp4") else "application/octet-stream")
+        self.send_header("Content-Length", str(size))
+        self.end_headers()
+        with open(path, "rb") as f:
+            while True:
+                data = f.read(1024 * 1024)
+                if not data:
+                    break
+                self.wfile.write(data)
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address:tuple, config:StandinConfig):
+        super().__init__(address, StandinHandler)
+        self.state = StandinState(config)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+def start_standin_server(host:str="127.0.0.1", port:int=0, **config) -> StandinServer:
+    """
+    Start the stand-in server on a background thread
+
+    Args:
+        host, port: address to listen on (port 0 picks a free port)
+        config: StandinConfig arguments
+
+    Returns:
+        StandinServer: running server; use server.base_url and server.shutdown()
+    """
+    server = StandinServer((host, port), StandinConfig(**config))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--token-rate", type=float, default=100)
+    parser.add_argument("--response-tokens", type=int, default=120)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--assistants", type=int, default=3)
+    parser.add_argument("--media-dir", default=None)
+    parser.add_argument("--batch-delay", type=float, default=2.0)
+    args = parser.parse_args()
+
+    config = StandinConfig(latency=args.latency, jitter=args.jitter, token_rate=args.token_rate, response_tokens=args.response_tokens,
+                           error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, assistants=args.assistants, media_dir=args.media_dir,
+                           batch_delay=args.batch_delay)
+    server = StandinServer((args.host, args.port), config)
+    print(f"stand-in server listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+from functools import lru_cache
+
+try:
+    import tiktoken
+except ImportError: # tiktoken 이 없으면 대략적인 추정치를 사용
+    tiktoken = None
+
+@lru_cache(maxsize=None)
+def _encoding(model:str):
+    if tiktoken is None:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception: # 인코딩 파일을 내려받지 못한 경우 (오프라인 등)
+        return None
+
+def _estimate_tokens(text:str) -> int:
+    # 영어는 4 bytes 당 1 token, 한글 음절 등 non-ASCII 문자는 글자당 1 token 으로 추정
+    ascii_chars = sum(1 for ch in text if ch < "\x80")
+    return (ascii_chars + 3) // 4 + len(text) - ascii_chars
+
+def count_tokens(text:str, model:str="gpt-4-turbo") -> int:
+    """
+    Number of tokens of text for the given model
+
+    Uses tiktoken when it is installed, otherwise an estimate of 4 ASCII
+    characters per token and 1 token per non-ASCII character (e.g. a Korean syllable).
+
+    Args:
+        text: text to measure
+        model: model identifier used to pick the tokenizer
+
+    Returns:
+        int: token count
+    """
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return _estimate_tokens(text)
+
+def truncate_tokens(text:str, max_tokens:int, model:str="gpt-4-turbo") -> str:
+    """
+    Cut text down to at most max_tokens tokens
+
+    Args:
+        text: text to cut
+        max_tokens: token limit
+        model: model identifier used to pick the tokenizer
+
+    Returns:
+        str: text itself when it fits, otherwise its longest prefix that fits
+    """
+    if max_tokens <= 0:
+        return ""
+    encoding = _encoding(model)
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    budget = max_tokens * 4 # ASCII 문자는 1, non-ASCII 문자는 4 를 사용
+    for i, ch in enumerate(text):
+        budget -= 1 if ch < "\x80" else 4
+        if budget < 0:
+            return text[:i]
+    return text
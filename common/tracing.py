@@ -0,0 +1,344 @@
+import os
+import json
+import time
+import uuid
+import functools
+import threading
+import contextvars
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# span 속성 중 Prometheus 카운터로 합산하는 값
+COUNTED_ATTRS = ("prompt_tokens", "completion_tokens", "bytes_uploaded", "bytes_downloaded")
+
+_current = contextvars.ContextVar("current_span", default=None)
+
+class Span:
+    """
+    One timed operation with attributes (tokens, bytes, cache status, ...)
+
+    Use it as a context manager from Tracer.span(); an exception leaving the block is
+    recorded as the span error and re-raised.
+    """
+
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id", "attrs", "error", "start", "duration", "_token", "_t0")
+
+    def __init__(self, tracer, name:str, attrs:dict, parent=None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attrs = attrs
+        self.error = None
+        self.start = time.time()
+        self.duration = None
+        self._token = None
+        self._t0 = time.perf_counter()
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def add(self, key:str, value) -> None:
+        """
+        Add to a numeric attribute (e.g. bytes uploaded by several requests)
+        """
+        self.attrs[key] = self.attrs.get(key, 0) + value
+
+    def record_usage(self, usage) -> None:
+        """
+        Record the token usage of an OpenAI response (usage may be None)
+        """
+        if usage is not None:
+            self.set(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+
+    def finish(self, error:BaseException=None) -> None:
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self._t0
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        self.tracer._export(self)
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        self.finish(exc)
+        return False
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 3),
+            "attrs": self.attrs,
+            "error": self.error,
+        }
+
+class _NoopSpan:
+    """
+    Span returned while tracing is disabled; every method does nothing
+    """
+
+    __slots__ = ()
+
+    def set(self, **attrs) -> None:
+        pass
+
+    def add(self, key:str, value) -> None:
+        pass
+
+    def record_usage(self, usage) -> None:
+        pass
+
+    def finish(self, error:BaseException=None) -> None:
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+NOOP_SPAN = _NoopSpan()
+
+class Tracer:
+    """
+    Records spans to a JSONL file and aggregates them as Prometheus style metrics
+
+    A disabled tracer hands out NOOP_SPAN, so instrumented code costs one attribute check per call.
+    """
+
+    def __init__(self, path:str=None, enabled:bool=True):
+        """
+        Args:
+            path: JSONL file the finished spans are appended to (None keeps metrics only)
+            enabled: record spans at all
+        """
+        self.path = path
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._file = None
+        self._metrics = {}
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = open(path, "a", encoding="utf-8")
+
+    def span(self, name:str, **attrs):
+        """
+        Span child of the current span
+
+        Use it as a context manager, or call span.finish() for work that outlives a block
+        (e.g. a streamed response).
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        return Span(self, name, attrs, _current.get())
+
+    def _export(self, span:Span) -> None:
+        with self._lock:
+            metric = self._metrics.setdefault(span.name, {"count": 0, "errors": 0, "seconds": 0.0, "cache": {}, **{k: 0 for k in COUNTED_ATTRS}})
+            metric["count"] += 1
+            metric["seconds"] += span.duration
+            if span.error:
+                metric["errors"] += 1
+            for key in COUNTED_ATTRS:
+                value = span.attrs.get(key)
+                if isinstance(value, (int, float)):
+                    metric[key] += value
+            status = span.attrs.get("cache")
+            if status:
+                metric["cache"][status] = metric["cache"].get(status, 0) + 1
+            if self._file is not None:
+                self._file.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n")
+                self._file.flush()
+
+    def metrics(self) -> dict:
+        """
+        Aggregated counters per span name
+        """
+        with self._lock:
+            return {name: {**metric, "cache": dict(metric["cache"])} for name, metric in self._metrics.items()}
+
+    def prometheus_text(self) -> str:
+        """
+        Metrics in the Prometheus text exposition format
+        """
+        lines = [
+            "# TYPE span_duration_seconds summary",
+            "# TYPE span_errors_total counter",
+            "# TYPE span_attr_total counter",
+            "# TYPE span_cache_total counter",
+        ]
+        for name, metric in sorted(self.metrics().items()):
+            label = f'span="{name}"'
+            lines.append(f"span_duration_seconds_count{{{label}}} {metric['count']}")
+            lines.append(f"span_duration_seconds_sum{{{label}}} {metric['seconds']:.6f}")
+            lines.append(f"span_errors_total{{{label}}} {metric['errors']}")
+            for key in COUNTED_ATTRS:
+                if metric[key]:
+                    lines.append(f'span_attr_total{{{label},attr="{key}"}} {metric[key]}')
+            for status, count in sorted(metric["cache"].items()):
+                lines.append(f'span_cache_total{{{label},status="{status}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def serve_metrics(self, port:int, host:str="127.0.0.1") -> ThreadingHTTPServer:
+        """
+        Serve prometheus_text() on http://host:port/metrics from a background thread
+        """
+        tracer = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = tracer.prometheus_text().encode("utf-8")
+                self.send_response(200 if self.path.startswith("/metrics") else 404)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), _Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+def default_tracer() -> Tracer:
+    """
+    Process wide tracer configured from the environment
+
+    TRACE_FILE: JSONL file for finished spans (enables tracing)
+    TRACE_METRICS_PORT: serve Prometheus metrics on this port (enables tracing)
+    TRACE_ENABLED=1: aggregate metrics in memory only
+    Tracing is disabled when none of them is set.
+    """
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                path = os.environ.get("TRACE_FILE") or None
+                port = os.environ.get("TRACE_METRICS_PORT")
+                enabled = bool(path or port or os.environ.get("TRACE_ENABLED", "") not in ("", "0"))
+                tracer = Tracer(path, enabled=enabled)
+                if port:
+                    tracer.serve_metrics(int(port))
+                _tracer = tracer
+    return _tracer
+
+def set_tracer(tracer:Tracer) -> None:
+    """
+    Replace the process wide tracer (e.g. Tracer("./data/trace.jsonl") from a benchmark)
+    """
+    global _tracer
+    _tracer = tracer
+
+def span(name:str, **attrs):
+    """
+    default_tracer().span(name, **attrs)
+    """
+    return default_tracer().span(name, **attrs)
+
+def traced(name:str=None):
+    """
+    Decorator running the function inside a span of the default tracer
+    """
+    def decorator(func):
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = default_tracer()
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def current_span():
+    """
+    Innermost active span (NOOP_SPAN outside any span or when tracing is disabled)
+    """
+    return _current.get() or NOOP_SPAN
+
+def propagate(func):
+    """
+    Wrap func so it runs in the caller's tracing context (for ThreadPoolExecutor workers)
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+    return wrapper
+
+def trace_stream(span, stream):
+    """
+    Yield the chunks of a streamed completion and finish the span when the stream ends
+    """
+    chunks = 0
+    try:
+        for chunk in stream:
+            chunks += 1
+            yield chunk
+    except BaseException as e:
+        span.set(chunks=chunks)
+        span.finish(e)
+        raise
+    span.set(chunks=chunks)
+    span.finish()
+
+def request_bytes(request:dict) -> int:
+    """
+    Size of the JSON body sent for a chat completion request (images included as base64)
+    """
+    body = {key: value for key, value in request.items() if value is not None}
+    return len(json.dumps(body, ensure_ascii=False, default=str).encode("utf-8"))
+
+def traced_completion(create, request:dict, name:str="gpt.chat"):
+    """
+    Run a chat completion call inside a span recording model, tokens and cache status
+
+    Args:
+        create: callable taking the request keyword arguments (client.chat.completions.create or a cached wrapper)
+        request: keyword arguments for the call
+        name: span name
+
+    Returns:
+        the response of create (streams are wrapped so the span ends with the stream)
+    """
+    tracer = default_tracer()
+    if not tracer.enabled:
+        return create(**request)
+    span = tracer.span(name, model=request.get("model"), stream=bool(request.get("stream")))
+    token = _current.set(span)
+    try:
+        response = create(**request)
+    except BaseException as e:
+        span.finish(e)
+        raise
+    finally:
+        _current.reset(token)
+    if span.attrs.get("cache") != "hit": # 캐시에서 재생한 응답은 업로드도 토큰도 쓰지 않음
+        span.set(bytes_uploaded=request_bytes(request))
+    if request.get("stream"):
+        return trace_stream(span, response)
+    if span.attrs.get("cache") != "hit":
+        span.record_usage(getattr(response, "usage", None))
+    span.finish()
+    return response